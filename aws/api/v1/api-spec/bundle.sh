@@ -1,2 +1,4 @@
 openapi bundle main.yaml -o bundled.yaml
-openapi lint bundled.yaml
\ No newline at end of file
+openapi lint bundled.yaml
+python ../../../../utils/ci/compile_validators.py
+python ../../../../utils/ci/generate_cache_settings.py
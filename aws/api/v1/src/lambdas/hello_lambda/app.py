@@ -1,48 +1,22 @@
-import http
-import json
-import logging
-import os
-import traceback
 from typing import Dict
 
-from utils.errors import (
-    DEFAULT_HTTP_ERROR,
-    INVALID_NAME_ERROR,
-    JSON_SERIALIZING_ERROR,
-    REQUIRED_NAME_ERROR,
-    UNEXPECTED_HTTP_ERROR,
-    CustomError,
-    InvalidQueryStringParameterError,
-    MissingRequiredQueryStringParameterError,
-)
-from utils.logging import ENDED_PROCESSING_LOG, STARTED_PROCESSING_LOG
-
-# Set up specific logger for this module
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
-
-
-def validate_input(event: Dict) -> str:
-    """
-    Validate the input from the event.
-    :param event: Lambda event data
-    :return: Validated name string
-    """
-    query_parameters = event.get("queryStringParameters", {})
-
-    if not query_parameters:
-        raise MissingRequiredQueryStringParameterError(REQUIRED_NAME_ERROR)
+from utils.pipeline import Pipeline
+from utils.warmup import warmup
 
-    if "name" not in query_parameters:
-        raise MissingRequiredQueryStringParameterError(REQUIRED_NAME_ERROR)
-
-    name = query_parameters.get("name")
-    if not name or name.strip() == "":
-        raise InvalidQueryStringParameterError(INVALID_NAME_ERROR)
+# Greetings only depend on the name, clients revalidate them with their ETag once stale
+CACHE_CONTROL = "public, max-age=300"
+# Sample requests run through the routes during the init phase
+WARMUP_EVENTS = (
+    {"httpMethod": "GET", "resource": "/hello", "queryStringParameters": {"name": "World"}},
+    {"httpMethod": "POST", "resource": "/hello/batch", "body": '["World"]'},
+)
 
-    return name
+# Built once per container, warm invocations only run the registered functions
+pipeline = Pipeline()
 
 
+@pipeline.batch_route("POST", "/hello/batch")
+@pipeline.route("GET", "/hello", cached=True, cache_control=CACHE_CONTROL)
 def greet_user(name: str) -> Dict:
     """
     Generate the greeting message.
@@ -52,53 +26,16 @@ def greet_user(name: str) -> Dict:
     return {"message": f"Hello, {name}!"}
 
 
-def generate_response(body: Dict, status_code: int = http.HTTPStatus.OK) -> Dict:
-    """
-    Generate an HTTP response.
-    :param body: Response body content
-    :param status_code: HTTP status code (default: 200)
-    :return: HTTP response dictionary
-    """
-    DOCS_DOMAIN_NAME = os.getenv("DOCS_DOMAIN_NAME")
-
-    try:
-        body_json = json.dumps(body)
-    except TypeError as e:
-        logger.error(JSON_SERIALIZING_ERROR.format(e))
-        body_json = json.dumps({"error": UNEXPECTED_HTTP_ERROR})
-        status_code = http.HTTPStatus.INTERNAL_SERVER_ERROR
-
-    return {
-        "statusCode": status_code,
-        "headers": {
-            "Content-Type": "application/json",
-            "Access-Control-Allow-Headers": "Content-Type",
-            "Access-Control-Allow-Origin": f"https://{DOCS_DOMAIN_NAME}",
-            "Access-Control-Allow-Methods": "OPTIONS,GET,POST,PUT,DELETE",
-        },
-        "body": body_json,
-    }
-
+@warmup.register
+def warm_routes() -> None:
+    """Run the sample requests through the pipeline, before the first request."""
+    for event in WARMUP_EVENTS:
+        pipeline.warm(event)
 
-def handle_exception(
-    e: Exception,
-    default_message: str = DEFAULT_HTTP_ERROR,
-) -> Dict:
-    """
-    Handle exceptions in a uniform way.
-    :param e: Exception instance
-    :param default_message: Default error message if exception is not specific
-        (default: generic server error message)
-    :return: HTTP response dictionary
-    """
-    logger.error({"error": str(e), "trace": traceback.format_exc()})
-
-    status_code = (
-        e.status_code if isinstance(e, CustomError) else http.HTTPStatus.INTERNAL_SERVER_ERROR
-    )
-    error_message = str(e) if isinstance(e, CustomError) else default_message
 
-    return generate_response({"error": error_message}, status_code)
+# Registered callbacks run once, at import time: in the init phase, with provisioned concurrency
+# before the container takes traffic
+warmup.run()
 
 
 def lambda_handler(event, context) -> Dict:
@@ -108,18 +45,4 @@ def lambda_handler(event, context) -> Dict:
     :param context: Lambda context data
     :return: Response dictionary
     """
-    print(event)
-    try:
-        # Log start of function execution and event data
-        logger.info(STARTED_PROCESSING_LOG.format(event))
-
-        # Process request
-        name = validate_input(event)
-        response_body = greet_user(name)
-        response = generate_response(response_body)
-
-        # Log end of function execution
-        logger.info(ENDED_PROCESSING_LOG.format(event))
-    except Exception as e:
-        response = handle_exception(e)
-    return response
+    return pipeline(event, context)
@@ -0,0 +1,194 @@
+import asyncio
+import functools
+import os
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Coroutine, Dict, List, Optional
+
+from utils.errors import (
+    DOWNSTREAM_TIMEOUT_ERROR,
+    DOWNSTREAM_UNAVAILABLE_ERROR,
+    CustomError,
+    GatewayTimeoutError,
+    ServiceUnavailableError,
+)
+
+# Time kept from the invocation's deadline to answer with an error and flush the logs
+DEFAULT_DEADLINE_MARGIN_MS = 100
+DEFAULT_MAX_WORKERS = 8
+# asyncio.TimeoutError is not the builtin TimeoutError before Python 3.11, nor is socket.timeout
+TIMEOUT_ERRORS = (asyncio.TimeoutError, TimeoutError, socket.timeout)
+
+Handler = Callable[[Dict, Any], Dict]
+
+
+class AsyncRunner:
+    """
+    Run coroutine producers from the synchronous pipeline, on an event loop kept per container.
+
+    The loop and the thread pool running blocking calls are created by the first run and reused
+    by warm invocations. `handler` binds the deadline of each invocation, derived from
+    `context.get_remaining_time_in_millis()`, and every downstream call awaited through `call`
+    or `fan_out` is bounded by it. A call that times out raises a `GatewayTimeoutError`, one
+    that can not reach its service (any `OSError`) a `ServiceUnavailableError`, so the pipeline
+    answers 504 and 503. Errors of the layer pass through unchanged.
+    """
+
+    def __init__(
+        self,
+        margin_ms: int = DEFAULT_DEADLINE_MARGIN_MS,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.margin_ms = margin_ms
+        self.max_workers = max_workers
+        self.clock = clock
+        self.deadline: Optional[float] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    def from_env(cls) -> "AsyncRunner":
+        """
+        Create a runner configured from the lambda environment.
+        :return: Async runner
+        """
+        return cls(
+            margin_ms=int(os.getenv("DOWNSTREAM_DEADLINE_MARGIN_MS", DEFAULT_DEADLINE_MARGIN_MS)),
+            max_workers=int(os.getenv("DOWNSTREAM_MAX_WORKERS", DEFAULT_MAX_WORKERS)),
+        )
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Event loop of the container, created on first use."""
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+            self._loop.set_default_executor(ThreadPoolExecutor(max_workers=self.max_workers))
+            asyncio.set_event_loop(self._loop)
+        return self._loop
+
+    def start(self, context) -> None:
+        """
+        Bind the deadline of an invocation.
+        :param context: Lambda context data, without a remaining time there is no deadline
+        """
+        get_remaining_time = getattr(context, "get_remaining_time_in_millis", None)
+        remaining_ms = get_remaining_time() if callable(get_remaining_time) else None
+        if isinstance(remaining_ms, (int, float)):
+            self.deadline = self.clock() + (remaining_ms - self.margin_ms) / 1000
+        else:
+            self.deadline = None
+
+    def remaining(self) -> Optional[float]:
+        """
+        Time left before the invocation's deadline.
+        :return: Seconds, or None if there is no deadline
+        """
+        return None if self.deadline is None else self.deadline - self.clock()
+
+    def timeout(self, timeout: Optional[float] = None) -> Optional[float]:
+        """
+        Timeout of a downstream call, bounded by the invocation's deadline.
+        :param timeout: Timeout of the call itself, in seconds (default: none)
+        :return: Seconds, or None for no timeout
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        return remaining if timeout is None else min(timeout, remaining)
+
+    async def call(self, awaitable: Awaitable, timeout: Optional[float] = None) -> Any:
+        """
+        Await a downstream call within its deadline.
+        :param awaitable: Coroutine or future of the call
+        :param timeout: Timeout of the call, in seconds, the invocation's deadline also applies
+            (default: none)
+        :return: Result of the call
+        """
+        timeout = self.timeout(timeout)
+        try:
+            # Past the deadline, the call is cancelled as soon as it is scheduled
+            return await asyncio.wait_for(awaitable, None if timeout is None else max(timeout, 0))
+        except CustomError:
+            raise
+        except TIMEOUT_ERRORS as e:
+            raise GatewayTimeoutError(DOWNSTREAM_TIMEOUT_ERROR) from e
+        except OSError as e:
+            raise ServiceUnavailableError(DOWNSTREAM_UNAVAILABLE_ERROR) from e
+
+    async def call_blocking(
+        self, function: Callable, *args, timeout: Optional[float] = None, **kwargs
+    ) -> Any:
+        """
+        Run a blocking call (e.g. an SDK client) in the runner's thread pool, within its deadline.
+        A call that times out keeps its thread until it returns, give it its own timeout too.
+        :param function: Blocking function
+        :param args: Positional arguments of the function
+        :param timeout: Timeout of the call, in seconds, the invocation's deadline also applies
+            (default: none)
+        :param kwargs: Keyword arguments of the function
+        :return: Result of the call
+        """
+        future = self.loop.run_in_executor(None, functools.partial(function, *args, **kwargs))
+        return await self.call(future, timeout)
+
+    async def fan_out(self, *awaitables: Awaitable, timeout: Optional[float] = None) -> List[Any]:
+        """
+        Run downstream calls concurrently, each within its deadline.
+        The first call to fail cancels the others and its error is raised.
+        :param awaitables: Coroutines or futures of the calls
+        :param timeout: Timeout of each call, in seconds, the invocation's deadline also applies
+            (default: none)
+        :return: Results of the calls, in order
+        """
+        tasks = [asyncio.ensure_future(self.call(awaitable, timeout)) for awaitable in awaitables]
+        try:
+            return await asyncio.gather(*tasks)
+        finally:
+            pending = [task for task in tasks if not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            for awaitable in awaitables:
+                if asyncio.iscoroutine(awaitable):
+                    # Calls cancelled before they started never awaited their coroutine
+                    awaitable.close()
+
+    def run(self, coroutine: Coroutine) -> Any:
+        """
+        Run a coroutine to completion on the container's loop, within the invocation's deadline.
+        :param coroutine: Coroutine to run
+        :return: Result of the coroutine
+        """
+        return self.loop.run_until_complete(self.call(coroutine))
+
+    def producer(self, produce: Callable[..., Coroutine]) -> Callable[..., Any]:
+        """
+        Turn a coroutine function into a body producer the pipeline can register.
+        :param produce: Coroutine function taking the validated keyword arguments
+        :return: Synchronous producer
+        """
+
+        @functools.wraps(produce)
+        def run_producer(**kwargs) -> Any:
+            return self.run(produce(**kwargs))
+
+        return run_producer
+
+    def handler(self, handle: Handler) -> Handler:
+        """
+        Wrap a lambda handler so its invocations bind their deadline first.
+        :param handle: Handler, usually a pipeline
+        :return: Lambda handler
+        """
+
+        def handle_with_deadline(event: Dict, context) -> Dict:
+            self.start(context)
+            return handle(event, context)
+
+        return handle_with_deadline
+
+
+# Configured once per container, the event loop is created by the first run
+runner = AsyncRunner.from_env()
@@ -0,0 +1,114 @@
+import os
+import sys
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+DEFAULT_MAX_BYTES = 1024 * 1024
+
+
+class BodyCache:
+    """
+    Least recently used cache of serialized response bodies, bounded in entries and bytes.
+
+    The size of an entry is the memory taken by its body string. Entries are evicted, least
+    recently used first, until both bounds hold again, and a body larger than `max_bytes` is
+    never stored, nor is a body under an unhashable key. A cache with `max_entries=0` is disabled
+    and stores nothing.
+    """
+
+    def __init__(self, max_entries: int = 0, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_entries = max(max_entries, 0)
+        self.max_bytes = max(max_bytes, 0)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size_bytes = 0
+        self._entries: "OrderedDict[Hashable, str]" = OrderedDict()
+
+    @classmethod
+    def from_env(cls) -> "BodyCache":
+        """
+        Create a cache configured from the lambda environment, disabled by default.
+        :return: Body cache
+        """
+        return cls(
+            max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 0)),
+            max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[str]:
+        """
+        Look up a body and mark it as the most recently used.
+        :param key: Cache key
+        :return: Serialized body, or None on a miss
+        """
+        try:
+            body = self._entries.get(key)
+        except TypeError:
+            body = None
+        if body is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put(self, key: Hashable, body: str) -> None:
+        """
+        Store a body, evicting the least recently used ones if a bound is exceeded.
+        :param key: Cache key
+        :param body: Serialized body
+        """
+        if not self.enabled:
+            return
+        size = sys.getsizeof(body)
+        if size > self.max_bytes:
+            return
+        try:
+            previous = self._entries.pop(key, None)
+        except TypeError:
+            return
+        if previous is not None:
+            self.size_bytes -= sys.getsizeof(previous)
+        self._entries[key] = body
+        self.size_bytes += size
+        while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size_bytes -= sys.getsizeof(evicted)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry, the counters are kept."""
+        self._entries.clear()
+        self.size_bytes = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of the lookups answered from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Counters of the cache since the container started.
+        :return: Hits, misses, evictions, hit rate, entries and bytes stored
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRate": self.hit_rate,
+            "entries": len(self._entries),
+            "bytes": self.size_bytes,
+        }
+
+
+# Configured once per container, RESPONSE_CACHE_MAX_ENTRIES enables it
+body_cache = BodyCache.from_env()
@@ -0,0 +1,220 @@
+import os
+import socket
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_MAX_POOL_CONNECTIONS = 10
+# Below the 3 second function timeout, a stuck connection fails the call and not the invocation
+DEFAULT_CONNECT_TIMEOUT = 1.0
+DEFAULT_READ_TIMEOUT = 2.0
+DEFAULT_MAX_ATTEMPTS = 2
+DEFAULT_RETRY_MODE = "standard"
+# Probe idle connections before NAT gateways and load balancers drop them (350 s and more)
+KEEPALIVE_IDLE_SECONDS = 60
+KEEPALIVE_INTERVAL_SECONDS = 10
+KEEPALIVE_PROBES = 3
+DEFAULT_HTTP_POOL = "default"
+
+
+def keepalive_socket_options() -> List[Tuple[int, int, int]]:
+    """
+    Socket options turning TCP keepalive on, with the probe timings where the platform has them.
+    :return: (level, option, value) tuples, as urllib3 takes them
+    """
+    options = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    for name, value in (
+        ("TCP_KEEPIDLE", KEEPALIVE_IDLE_SECONDS),
+        ("TCP_KEEPINTVL", KEEPALIVE_INTERVAL_SECONDS),
+        ("TCP_KEEPCNT", KEEPALIVE_PROBES),
+    ):
+        if hasattr(socket, name):
+            options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+    return options
+
+
+def pool_stats(manager) -> List[Dict[str, Any]]:
+    """
+    Occupation of the connection pools of a urllib3 pool manager, one per host.
+    :param manager: urllib3 PoolManager
+    :return: Per host: pool size, connections in use and idle, connections opened and requests
+        sent since the pool was created, and saturation (share of the pool in use)
+    """
+    stats = []
+    for key in manager.pools.keys():
+        pool = manager.pools.get(key)
+        if pool is None or pool.pool is None:
+            continue
+        # The queue holds idle connections and None placeholders for connections not opened yet
+        queued = list(pool.pool.queue)
+        maxsize = pool.pool.maxsize
+        in_use = max(maxsize - len(queued), 0)
+        stats.append(
+            {
+                "host": f"{pool.scheme}://{pool.host}:{pool.port}",
+                "maxsize": maxsize,
+                "inUse": in_use,
+                "idle": sum(connection is not None for connection in queued),
+                "connectionsOpened": pool.num_connections,
+                "requests": pool.num_requests,
+                "saturation": in_use / maxsize if maxsize else 0.0,
+            }
+        )
+    return stats
+
+
+class ClientRegistry:
+    """
+    AWS SDK clients and HTTP connection pools, created once per container on first use.
+
+    Clients are kept by service, region and endpoint, so warm invocations reuse their open
+    connections instead of paying a TCP and TLS handshake per call. Every client shares the
+    registry's botocore configuration: pool size, timeouts below the function's, retries and
+    TCP keepalive. boto3 and urllib3 (shipped with the Lambda runtime) are only imported by the
+    first client created, lambdas that call nothing do not pay for them on cold start.
+    Creation is locked, clients can be shared by the threads of `AsyncRunner.call_blocking`.
+    """
+
+    def __init__(
+        self,
+        max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        retry_mode: str = DEFAULT_RETRY_MODE,
+    ):
+        self.max_pool_connections = max_pool_connections
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_attempts = max_attempts
+        self.retry_mode = retry_mode
+        self._clients: Dict[Tuple[str, Optional[str], Optional[str]], Any] = {}
+        self._http_pools: Dict[str, Any] = {}
+        self._session: Optional[Any] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ClientRegistry":
+        """
+        Create a registry configured from the lambda environment.
+        :return: Client registry
+        """
+        return cls(
+            max_pool_connections=int(
+                os.getenv("CLIENT_MAX_POOL_CONNECTIONS", DEFAULT_MAX_POOL_CONNECTIONS)
+            ),
+            connect_timeout=float(os.getenv("CLIENT_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)),
+            read_timeout=float(os.getenv("CLIENT_READ_TIMEOUT", DEFAULT_READ_TIMEOUT)),
+            max_attempts=int(os.getenv("CLIENT_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)),
+            retry_mode=os.getenv("CLIENT_RETRY_MODE", DEFAULT_RETRY_MODE),
+        )
+
+    def config(self):
+        """
+        botocore configuration shared by the clients.
+        :return: botocore Config
+        """
+        from botocore.config import Config
+
+        return Config(
+            max_pool_connections=self.max_pool_connections,
+            connect_timeout=self.connect_timeout,
+            read_timeout=self.read_timeout,
+            retries={"total_max_attempts": self.max_attempts, "mode": self.retry_mode},
+            tcp_keepalive=True,
+        )
+
+    def client(
+        self,
+        service_name: str,
+        region_name: Optional[str] = None,
+        endpoint_url: Optional[str] = None,
+    ):
+        """
+        Get the boto3 client of a service, created on first use.
+        :param service_name: AWS service, e.g. `s3`
+        :param region_name: Region (default: the function's)
+        :param endpoint_url: Endpoint, e.g. of a local stand-in (default: the service's)
+        :return: boto3 client
+        """
+        key = (service_name, region_name, endpoint_url)
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    session = self._session
+                    if session is None:
+                        import boto3
+
+                        # Sessions are not thread safe, the clients they create are
+                        session = self._session = boto3.session.Session()
+                    client = session.client(
+                        service_name,
+                        region_name=region_name,
+                        endpoint_url=endpoint_url,
+                        config=self.config(),
+                    )
+                    self._clients[key] = client
+        return client
+
+    def http(self, name: str = DEFAULT_HTTP_POOL):
+        """
+        Get a keep-alive HTTP pool manager, created on first use.
+        Responses must be read or released for their connection to return to the pool.
+        :param name: Pool manager name, to size or isolate the pools of a dependency
+        :return: urllib3 PoolManager with one pool of `max_pool_connections` per host
+        """
+        manager = self._http_pools.get(name)
+        if manager is None:
+            with self._lock:
+                manager = self._http_pools.get(name)
+                if manager is None:
+                    import urllib3
+                    from urllib3.connection import HTTPConnection
+
+                    manager = urllib3.PoolManager(
+                        maxsize=self.max_pool_connections,
+                        timeout=urllib3.Timeout(
+                            connect=self.connect_timeout, read=self.read_timeout
+                        ),
+                        retries=urllib3.Retry(total=self.max_attempts - 1, redirect=False),
+                        socket_options=HTTPConnection.default_socket_options
+                        + keepalive_socket_options(),
+                    )
+                    self._http_pools[name] = manager
+        return manager
+
+    def stats(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Occupation of the connection pools of every client and HTTP pool manager created.
+        A saturation of 1 means calls are waiting for a connection, or opening extra ones that
+        are discarded afterwards: raise CLIENT_MAX_POOL_CONNECTIONS.
+        :return: Pool stats (see `pool_stats`) by client, e.g. `s3` or `http:default`
+        """
+        stats = {}
+        for (service_name, region_name, endpoint_url), client in list(self._clients.items()):
+            name = ":".join(part for part in (service_name, region_name, endpoint_url) if part)
+            # Not a public API of botocore, clients without it are reported without pools
+            http_session = getattr(getattr(client, "_endpoint", None), "http_session", None)
+            manager = getattr(http_session, "_manager", None)
+            stats[name] = pool_stats(manager) if manager is not None else []
+        for name, manager in list(self._http_pools.items()):
+            stats[f"http:{name}"] = pool_stats(manager)
+        return stats
+
+    def clear(self) -> None:
+        """Close every connection and forget the clients, the next calls create new ones."""
+        with self._lock:
+            for client in self._clients.values():
+                close = getattr(client, "close", None)
+                if close is not None:
+                    close()
+            for manager in self._http_pools.values():
+                manager.clear()
+            self._clients = {}
+            self._http_pools = {}
+            self._session = None
+
+
+# Configured once per container, clients and pools are created by their first use
+clients = ClientRegistry.from_env()
@@ -0,0 +1,115 @@
+import os
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from utils.logging import logger
+from utils.metrics import Metrics, metrics
+from utils.serializers import Serializer, serializer
+from utils.validators import RESPONSES
+
+RESPONSE_VIOLATION_LOG = "Response does not conform to the API spec"
+VIOLATION_METRIC = "ResponseSchemaViolations"
+# Timed as a phase of the invocation, the metric is `ResponseCheckTime`
+CHECK_PHASE = "ResponseCheck"
+
+RouteKey = Tuple[Optional[str], Optional[str]]
+
+
+class ResponseChecker:
+    """
+    Check a sample of the outgoing responses against the response schemas of the API spec.
+
+    Checkers are compiled from the spec ahead of time (see `utils.validators`), so a check costs
+    one parse of the emitted body and a few isinstance calls. Sampling is deterministic: every
+    response adds `sample_rate` to a credit and a response is checked once the credit reaches
+    one, which spreads the checks evenly and keeps their overhead bounded by the rate.
+    Violations are logged and counted in the invocation's metrics, never raised: a response that
+    does not conform is still better than a failed one.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = 0.0,
+        checkers: Optional[Dict[Tuple[str, str, int], Callable]] = None,
+        json_serializer: Serializer = serializer,
+        clock: Callable[[], int] = time.perf_counter_ns,
+        recorder: Metrics = metrics,
+    ):
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self.checkers = checkers if checkers is not None else RESPONSES
+        self.json_serializer = json_serializer
+        self.clock = clock
+        self.metrics = recorder
+        self.checked = 0
+        self.violations = 0
+        self.check_ns = 0
+        self._credit = 0.0
+
+    @classmethod
+    def from_env(cls) -> "ResponseChecker":
+        """
+        Create a checker configured from the lambda environment, disabled by default.
+        :return: Response checker
+        """
+        return cls(sample_rate=float(os.getenv("RESPONSE_CHECK_SAMPLE_RATE", 0.0)))
+
+    def sampled(self) -> bool:
+        """
+        Decide whether the current response is checked.
+        :return: True once every `1 / sample_rate` responses
+        """
+        if not self.sample_rate:
+            return False
+        self._credit += self.sample_rate
+        if self._credit < 1.0:
+            return False
+        self._credit -= 1.0
+        return True
+
+    def check(self, key: RouteKey, response: Dict) -> Optional[str]:
+        """
+        Check a response if it is sampled and a schema is declared for its route and status.
+        :param key: Method and API Gateway resource path of the route
+        :param response: HTTP response dictionary, as returned to API Gateway
+        :return: Violation found, as a `$.path: problem` string, or None
+        """
+        if not self.sampled():
+            return None
+        method, path = key
+        status_code = response.get("statusCode")
+        if method is None or path is None or status_code is None:
+            return None
+        checker = self.checkers.get((method, path, status_code))
+        if checker is None:
+            return None
+        start = self.clock()
+        try:
+            # The emitted body is parsed again so what is checked is exactly what was sent
+            violation = checker(self.json_serializer.loads(response["body"]))
+        except Exception as e:
+            violation = f"$: {type(e).__name__}: {e}"
+        finally:
+            elapsed = self.clock() - start
+            self.checked += 1
+            self.check_ns += elapsed
+            self.metrics.add_elapsed(CHECK_PHASE, elapsed)
+
+        if violation is not None:
+            self.violations += 1
+            self.metrics.count(VIOLATION_METRIC)
+            logger.warning(
+                RESPONSE_VIOLATION_LOG,
+                route=f"{key[0]} {key[1]}",
+                statusCode=response["statusCode"],
+                violation=violation,
+            )
+        return violation
+
+    @property
+    def mean_check_us(self) -> float:
+        """Mean time spent per checked response, in microseconds."""
+        return self.check_ns / self.checked / 1000 if self.checked else 0.0
+
+
+# Configured once per container, RESPONSE_CHECK_SAMPLE_RATE enables it
+response_checker = ResponseChecker.from_env()
@@ -1,19 +1,42 @@
 import http
 
-REQUIRED_NAME_ERROR = "'name' query string parameter is required"
-INVALID_NAME_ERROR = "Invalid name provided"
+from utils.logging import ERROR, INFO, WARNING
+
+REQUIRED_QUERY_PARAMETER_ERROR = "'{}' query string parameter is required"
+INVALID_QUERY_PARAMETER_ERROR = "Invalid {} provided"
+REQUIRED_NAME_ERROR = REQUIRED_QUERY_PARAMETER_ERROR.format("name")
+INVALID_NAME_ERROR = INVALID_QUERY_PARAMETER_ERROR.format("name")
 DEFAULT_HTTP_ERROR = "An error occurred processing your request."
 UNEXPECTED_HTTP_ERROR = "An unexpected error occurred while processing the response."
 JSON_SERIALIZING_ERROR = "Error serializing response body to JSON: {}"
+ROUTE_NOT_FOUND_ERROR = "The requested resource was not found."
+INVALID_BODY_ERROR = "Request body must be a JSON array of names"
+BATCH_SIZE_ERROR = "A batch can not contain more than {} names"
+DOWNSTREAM_TIMEOUT_ERROR = "Request to an external service timed out."
+DOWNSTREAM_UNAVAILABLE_ERROR = "An external service is unavailable."
+TOO_MANY_REQUESTS_ERROR = "Too many requests, retry later."
 
 
 class CustomError(Exception):
-    """Base class for other custom exceptions."""
+    """Base class for other custom exceptions.
+
+    `log_level` and `log_traceback` set how the error is logged when it is handled.
+    """
 
     status_code = http.HTTPStatus.INTERNAL_SERVER_ERROR
+    log_level = ERROR
+    log_traceback = True
+
 
+class ClientError(CustomError):
+    """Base class for expected client errors (4xx), logged without traceback."""
+
+    status_code = http.HTTPStatus.BAD_REQUEST
+    log_level = INFO
+    log_traceback = False
 
-class BadRequestError(CustomError):
+
+class BadRequestError(ClientError):
     """Custom error for bad requests (400)."""
 
     status_code = http.HTTPStatus.BAD_REQUEST
@@ -31,24 +54,36 @@ class InvalidQueryStringParameterError(BadRequestError):
     pass
 
 
-class UnauthorizedError(CustomError):
+class InvalidRequestBodyError(BadRequestError):
+    """Raised when the request body is invalid"""
+
+    pass
+
+
+class UnauthorizedError(ClientError):
     """Custom error for unauthorized requests (401)."""
 
     status_code = http.HTTPStatus.UNAUTHORIZED
 
 
-class ForbiddenError(CustomError):
+class ForbiddenError(ClientError):
     """Custom error for forbidden requests (403)."""
 
     status_code = http.HTTPStatus.FORBIDDEN
 
 
-class NotFoundError(CustomError):
+class NotFoundError(ClientError):
     """Custom error for not found requests (404)."""
 
     status_code = http.HTTPStatus.NOT_FOUND
 
 
+class TooManyRequestsError(ClientError):
+    """Custom error for rate limited requests (429)."""
+
+    status_code = http.HTTPStatus.TOO_MANY_REQUESTS
+
+
 class InternalServerError(CustomError):
     """Custom error for internal server errors (500)."""
 
@@ -67,7 +102,29 @@ class ServiceUnavailableError(CustomError):
     status_code = http.HTTPStatus.SERVICE_UNAVAILABLE
 
 
+class LoadSheddingError(ServiceUnavailableError):
+    """Raised when a call is shed before reaching its service (503), logged without traceback."""
+
+    log_level = WARNING
+    log_traceback = False
+
+
 class GatewayTimeoutError(CustomError):
     """Custom error for gateway timeout errors (504)."""
 
     status_code = http.HTTPStatus.GATEWAY_TIMEOUT
+
+
+# Errors raised with a fixed message, their responses are serialized once per container
+PREDEFINED_ERRORS = (
+    (MissingRequiredQueryStringParameterError, REQUIRED_NAME_ERROR),
+    (InvalidQueryStringParameterError, INVALID_NAME_ERROR),
+    (InvalidRequestBodyError, INVALID_BODY_ERROR),
+    (NotFoundError, ROUTE_NOT_FOUND_ERROR),
+    (TooManyRequestsError, TOO_MANY_REQUESTS_ERROR),
+    (InternalServerError, DEFAULT_HTTP_ERROR),
+    (InternalServerError, UNEXPECTED_HTTP_ERROR),
+    (ServiceUnavailableError, DOWNSTREAM_UNAVAILABLE_ERROR),
+    (LoadSheddingError, DOWNSTREAM_UNAVAILABLE_ERROR),
+    (GatewayTimeoutError, DOWNSTREAM_TIMEOUT_ERROR),
+)
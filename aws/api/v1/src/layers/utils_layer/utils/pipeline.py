@@ -0,0 +1,514 @@
+import http
+import os
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from utils.cache import BodyCache, body_cache
+from utils.conformance import ResponseChecker, response_checker
+from utils.errors import (
+    BATCH_SIZE_ERROR,
+    DEFAULT_HTTP_ERROR,
+    INVALID_BODY_ERROR,
+    INVALID_NAME_ERROR,
+    JSON_SERIALIZING_ERROR,
+    ROUTE_NOT_FOUND_ERROR,
+    UNEXPECTED_HTTP_ERROR,
+    CustomError,
+    InternalServerError,
+    InvalidRequestBodyError,
+    NotFoundError,
+    TooManyRequestsError,
+)
+from utils.logging import ENDED_PROCESSING_LOG, EXCEPTION_LOG, STARTED_PROCESSING_LOG, logger
+from utils.metrics import (
+    EXCEPTION_PHASE,
+    PRODUCE_PHASE,
+    SERIALIZE_PHASE,
+    VALIDATE_PHASE,
+    Metrics,
+    metrics,
+)
+from utils.ratelimit import RateLimiter, rate_limiter, throttled_response
+from utils.responses import (
+    CACHE_CONTROL_HEADER,
+    ETAG_HEADER,
+    IF_NONE_MATCH_HEADER,
+    compute_etag,
+    error_responses,
+    etag_matches,
+    request_header,
+    response_builder,
+)
+from utils.serializers import serializer
+from utils.streaming import STREAMING_ENABLED, accepts_stream, iter_json
+from utils.validators import ROUTES, is_valid_name
+from utils.warmup import WARMER_RESPONSE, is_warmer_event
+
+Validator = Callable[[Dict], Dict]
+Producer = Callable[..., Any]
+Encoder = Callable[[Any], Dict]
+Streamer = Callable[[Any], Iterator[str]]
+
+# Names accepted in a single batch request, the whole batch shares one invocation's timeout
+MAX_BATCH_SIZE = int(os.getenv("BATCH_MAX_SIZE", "10000"))
+# Batch responses are JSON objects with the per-item results in a `results` array
+BATCH_RESPONSE_PREFIX = '{"results":['
+BATCH_RESPONSE_SUFFIX = "]}"
+CACHE_HIT_METRIC = "ResponseCacheHits"
+CACHE_MISS_METRIC = "ResponseCacheMisses"
+NOT_MODIFIED_METRIC = "NotModifiedResponses"
+STREAMED_METRIC = "StreamedResponses"
+STREAM_ERROR_METRIC = "StreamErrors"
+
+
+class Route(NamedTuple):
+    """
+    A validator and body producer pair registered for one method and path.
+    The encoder turns the body into the HTTP response (default: `generate_response`). Bodies of
+    cached routes are kept serialized by validated arguments, see `BodyCache`. Successful
+    responses of routes with a `Cache-Control` policy carry an ETag and support `If-None-Match`.
+    Routes with a streamer turn the body into JSON chunks instead when the response can be
+    streamed, see `accepts_stream`.
+    """
+
+    validate: Validator
+    produce: Producer
+    encode: Optional[Encoder] = None
+    cached: bool = False
+    cache_control: Optional[str] = None
+    stream: Optional[Streamer] = None
+
+
+def validate_batch(event: Dict) -> Dict:
+    """
+    Validate a batch of names sent as a JSON array in the event's body.
+    Only a malformed body fails the request, invalid names are reported per item.
+    :param event: Lambda event data
+    :return: Keyword arguments for the batch producer
+    """
+    body = event.get("body")
+    try:
+        names = serializer.loads(body) if body else None
+    except ValueError:
+        names = None
+
+    if not isinstance(names, list):
+        raise InvalidRequestBodyError(INVALID_BODY_ERROR)
+    if len(names) > MAX_BATCH_SIZE:
+        raise InvalidRequestBodyError(BATCH_SIZE_ERROR.format(MAX_BATCH_SIZE))
+
+    # Checked in a single pass, with the spec's `name` schema, before any item is produced
+    return {"names": names, "valid": [is_valid_name(name) for name in names]}
+
+
+class BatchProducer:
+    """Apply an item producer to every valid name of a batch, reporting errors per item."""
+
+    invalid_item = {"error": INVALID_NAME_ERROR}
+
+    def __init__(self, produce: Producer):
+        self.produce = produce
+
+    def __call__(self, names: List[Any], valid: List[bool]) -> Iterator[Dict]:
+        """
+        Produce the results of a batch lazily, in the order of the names.
+        :param names: Names from the batch body
+        :param valid: Whether each name passed validation
+        :return: Iterator over the item bodies, or `{"error": ...}` for failed items
+        """
+        produce = self.produce
+        invalid_item = self.invalid_item
+        for name, is_valid in zip(names, valid):
+            if not is_valid:
+                yield invalid_item
+                continue
+            try:
+                yield produce(name=name)
+            except CustomError as e:
+                yield {"error": str(e)}
+
+
+def generate_response(body: Dict, status_code: int = http.HTTPStatus.OK) -> Dict:
+    """
+    Generate an HTTP response.
+    :param body: Response body content
+    :param status_code: HTTP status code (default: 200)
+    :return: HTTP response dictionary
+    """
+    try:
+        body_json = serializer.dumps(body)
+    except serializer.errors as e:
+        logger.error(JSON_SERIALIZING_ERROR.format(e))
+        return error_responses.get(InternalServerError, UNEXPECTED_HTTP_ERROR)
+
+    return response_builder.build(body_json, status_code)
+
+
+def generate_batch_response(items: Iterable[Dict], status_code: int = http.HTTPStatus.OK) -> Dict:
+    """
+    Generate an HTTP response for a batch, encoding the items one at a time as they are produced.
+    :param items: Item bodies, in request order
+    :param status_code: HTTP status code (default: 200)
+    :return: HTTP response dictionary
+    """
+    try:
+        body_json = (
+            BATCH_RESPONSE_PREFIX + ",".join(map(serializer.dumps, items)) + BATCH_RESPONSE_SUFFIX
+        )
+    except serializer.errors as e:
+        logger.error(JSON_SERIALIZING_ERROR.format(e))
+        return error_responses.get(InternalServerError, UNEXPECTED_HTTP_ERROR)
+
+    return response_builder.build(body_json, status_code)
+
+
+def stream_batch_response(items: Iterable[Dict]) -> Iterator[str]:
+    """
+    Stream a batch body, encoding the items as they are produced and written.
+    :param items: Item bodies, in request order
+    :return: Iterator over the JSON chunks of the body, as `generate_batch_response` would build it
+    """
+    return iter_json({"results": items})
+
+
+def event_key(event: Dict) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Get the method and path of an API Gateway REST proxy event, or of a function URL event,
+    which carries no resource and is routed by its path.
+    :param event: Lambda event data
+    :return: Method and path, both None if the event carries no routing information
+    """
+    method = event.get("httpMethod")
+    if method is None:
+        http_context = (event.get("requestContext") or {}).get("http")
+        if http_context is not None:
+            return http_context.get("method"), event.get("rawPath")
+    return method, event.get("resource")
+
+
+def handle_exception(
+    e: Exception,
+    default_message: str = DEFAULT_HTTP_ERROR,
+) -> Dict:
+    """
+    Handle exceptions in a uniform way.
+    :param e: Exception instance
+    :param default_message: Default error message if exception is not specific
+        (default: generic server error message)
+    :return: HTTP response dictionary
+    """
+    if isinstance(e, CustomError):
+        # Expected errors follow the logging policy of their class
+        logger.exception(EXCEPTION_LOG, e, e.log_level, e.log_traceback)
+        return error_responses.get(type(e), str(e))
+
+    logger.exception(EXCEPTION_LOG, e)
+    return error_responses.get(InternalServerError, default_message)
+
+
+class Pipeline:
+    """
+    Request pipeline shared by the lambdas: route -> validate -> produce body -> serialize ->
+    respond.
+
+    A pipeline is built once per container at import time, so warm invocations only pay for a
+    route lookup and the registered functions. The first registered route also serves events
+    that carry no routing information (e.g. direct invocations). A sample of the responses is
+    checked against the response schemas of the API spec, see `ResponseChecker`.
+
+    Every invocation writes one metrics line (see `Metrics`) with the time spent validating,
+    producing and serializing the body or handling an exception, and the errors answered with.
+    Batch bodies are produced lazily, so for batch routes production is timed as serialization.
+
+    With `streaming` enabled, routes with a streamer answer function URL events with a body
+    that is an iterator of JSON chunks, serialized while the runtime writes them, after the
+    invocation's metrics and logs. Such bodies are neither cached nor checked, an error raised
+    while serializing them is logged and counted on a metrics line of its own, see
+    `guard_stream`. API Gateway REST events always get the buffered body of the route's encoder.
+
+    With a rate limiter enabled, requests of a client over its limit are answered with a
+    pre-serialized 429 before their event is logged or validated, see `RateLimiter`. Warmer
+    events only keep the container warm, they are answered without being routed, logged or
+    counted.
+    """
+
+    def __init__(
+        self,
+        checker: ResponseChecker = response_checker,
+        recorder: Metrics = metrics,
+        cache: BodyCache = body_cache,
+        streaming: bool = STREAMING_ENABLED,
+        limiter: RateLimiter = rate_limiter,
+    ):
+        self.routes: Dict[Tuple[str, str], Route] = {}
+        self.default_route: Optional[Route] = None
+        self.default_key: Tuple[Optional[str], Optional[str]] = (None, None)
+        self.checker = checker
+        self.metrics = recorder
+        self.cache = cache
+        self.streaming = streaming
+        self.limiter = limiter
+
+    def route(
+        self,
+        method: str,
+        path: str,
+        validator: Optional[Validator] = None,
+        encoder: Optional[Encoder] = None,
+        cached: bool = False,
+        cache_control: Optional[str] = None,
+        streamer: Optional[Streamer] = None,
+    ):
+        """
+        Register a body producer for the given method and path.
+        :param method: HTTP method, as sent in the event's `httpMethod`
+        :param path: API Gateway resource path, as sent in the event's `resource`
+        :param validator: Function turning the event into keyword arguments for the producer
+            (default: validator compiled from the API spec for this method and path)
+        :param encoder: Function turning the produced body into the HTTP response
+            (default: `generate_response`)
+        :param cached: Whether successful bodies are cached by validated arguments, only for
+            producers whose body depends on nothing else (default: False)
+        :param cache_control: `Cache-Control` header of successful responses, which also get an
+            ETag and are answered with 304 Not Modified when the client's copy is current
+            (default: none, no caching headers)
+        :param streamer: Function turning the produced body into JSON chunks, for responses that
+            can be streamed (default: none, the body is always buffered)
+        :return: Decorator returning the producer unchanged
+        """
+
+        method = method.upper()
+        validate = validator or ROUTES.get((method, path))
+        if validate is None:
+            raise ValueError(
+                f"No validator given or compiled from the API spec for {method} {path}."
+            )
+
+        def decorator(produce: Producer) -> Producer:
+            route = Route(validate, produce, encoder, cached, cache_control, streamer)
+            self.routes[(method, path)] = route
+            if self.default_route is None:
+                self.default_route = route
+                self.default_key = (method, path)
+            return produce
+
+        return decorator
+
+    def batch_route(self, method: str, path: str):
+        """
+        Register a single-name producer for batches of names sent as a JSON array in the body.
+        The response holds one result per name, so a whole batch takes one invocation and one
+        serialization pass, which is streamed when the response can be. Register it after the
+        single-name route, which stays the default.
+        :param method: HTTP method, as sent in the event's `httpMethod`
+        :param path: API Gateway resource path, as sent in the event's `resource`
+        :return: Decorator returning the producer unchanged
+        """
+
+        def decorator(produce: Producer) -> Producer:
+            self.route(
+                method,
+                path,
+                validate_batch,
+                generate_batch_response,
+                streamer=stream_batch_response,
+            )(BatchProducer(produce))
+            return produce
+
+        return decorator
+
+    def route_key(self, event: Dict) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Get the method and path an event is routed by, which its response is checked against.
+        :param event: Lambda event data
+        :return: Method and API Gateway resource path, those of the default route if the event
+            carries no routing information
+        """
+        key = event_key(event)
+        return self.default_key if key == (None, None) else key
+
+    def conditional(self, event: Dict, cache_control: str, response: Dict) -> Dict:
+        """
+        Add caching headers to a successful response, or replace it with a 304 Not Modified
+        response if the client sent the ETag of its body.
+        :param event: Lambda event data
+        :param cache_control: `Cache-Control` policy of the route
+        :param response: Successful HTTP response dictionary
+        :return: HTTP response dictionary
+        """
+        headers = {ETAG_HEADER: compute_etag(response["body"]), CACHE_CONTROL_HEADER: cache_control}
+        if etag_matches(request_header(event, IF_NONE_MATCH_HEADER), headers[ETAG_HEADER]):
+            self.metrics.count(NOT_MODIFIED_METRIC)
+            return response_builder.build("", http.HTTPStatus.NOT_MODIFIED, headers)
+        response["headers"].update(headers)
+        return response
+
+    def cache_key(self, route: Route, kwargs: Dict) -> Optional[Tuple]:
+        """
+        Key the body of a cached route by its producer and validated arguments.
+        A validator always builds its arguments in the same order, so their values are enough.
+        :param route: Route of the event
+        :param kwargs: Keyword arguments for the producer
+        :return: Key, or None if the cache is disabled
+        """
+        if not self.cache.enabled:
+            return None
+        return (route.produce, *kwargs.values())
+
+    def resolve(self, event: Dict) -> Route:
+        """
+        Find the route registered for the event.
+        :param event: Lambda event data
+        :return: Matching route
+        """
+        method, path = event_key(event)
+        if method is not None and path is not None:
+            route = self.routes.get((method, path))
+            if route is not None:
+                return route
+        elif method is None and path is None and self.default_route is not None:
+            return self.default_route
+        raise NotFoundError(ROUTE_NOT_FOUND_ERROR)
+
+    def warm(self, event: Dict) -> Dict:
+        """
+        Run an event through its route during the init phase, so the first request does not
+        execute the validator, producer, encoder, metrics line and log record formatting for the
+        first time. Nothing is written, cached or checked, and the first request still counts as
+        the cold start. Register it as a warm-up callback, see `Warmup`.
+        :param event: Lambda event data, valid for its route
+        :return: HTTP response dictionary
+        """
+        recorder = self.metrics
+        route = self.resolve(event)
+        recorder.start()
+        started_at = recorder.clock()
+        kwargs = route.validate(event)
+        started_at = recorder.add_time(VALIDATE_PHASE, started_at)
+        response_body = route.produce(**kwargs)
+        started_at = recorder.add_time(PRODUCE_PHASE, started_at)
+        response = (route.encode or generate_response)(response_body)
+        recorder.add_time(SERIALIZE_PHASE, started_at)
+        if route.cached:
+            recorder.count(CACHE_MISS_METRIC)
+        if route.cache_control is not None and response["statusCode"] == http.HTTPStatus.OK:
+            compute_etag(response["body"])
+        # Formatted as a request's would be, the metrics line declaration stays cached
+        recorder.format()
+        recorder.start()
+        logger.format({"message": STARTED_PROCESSING_LOG, "event": event})
+        return response
+
+    def guard_stream(
+        self,
+        chunks: Iterator[str],
+        request_id: Optional[str],
+        key: Optional[Tuple[str, str]],
+    ) -> Iterator[str]:
+        """
+        Relay the chunks of a streamed body, reporting an error raised while serializing them.
+
+        The runtime consumes the body after the invocation's metrics and logs were flushed, and
+        the status code is already sent: the error is logged and counted on a metrics line of
+        its own, then re-raised so the runtime cuts the stream.
+        :param chunks: JSON chunks of the body
+        :param request_id: Invocation's request ID
+        :param key: Registered route the body answers, if any
+        :return: The same chunks
+        """
+        try:
+            yield from chunks
+        except Exception as e:
+            recorder = self.metrics
+            logger.bind(request_id)
+            recorder.start(request_id)
+            if key is not None:
+                recorder.route = f"{key[0]} {key[1]}"
+            handle_exception(e)
+            recorder.count(STREAM_ERROR_METRIC)
+            recorder.count_error(type(e) if isinstance(e, CustomError) else InternalServerError)
+            recorder.flush()
+            logger.flush()
+            raise
+
+    def __call__(self, event: Dict, context) -> Dict:
+        """
+        Process a single Lambda invocation.
+        :param event: Lambda event data
+        :param context: Lambda context data
+        :return: HTTP response dictionary
+        """
+        if is_warmer_event(event):
+            return dict(WARMER_RESPONSE)
+        request_id = getattr(context, "aws_request_id", None)
+        recorder = self.metrics
+        logger.bind(request_id)
+        recorder.start(request_id)
+        response = None
+        try:
+            # Throttled clients only cost a bucket lookup, their requests are not logged
+            retry_after = self.limiter.check(event) if self.limiter.enabled else None
+            if retry_after is not None:
+                response = throttled_response(retry_after)
+                recorder.count_error(TooManyRequestsError)
+                return response
+
+            # Log start of function execution, the event is only summarized if the record is kept
+            logger.info(STARTED_PROCESSING_LOG, event=event)
+
+            # Process request
+            route = self.resolve(event)
+            streamer = route.stream if self.streaming and accepts_stream(event) else None
+            streamed = streamer is not None
+            started_at = recorder.clock()
+            kwargs = route.validate(event)
+            started_at = recorder.add_time(VALIDATE_PHASE, started_at)
+            cache_key = self.cache_key(route, kwargs) if route.cached and not streamed else None
+            body_json = self.cache.get(cache_key) if cache_key is not None else None
+            if body_json is not None:
+                recorder.count(CACHE_HIT_METRIC)
+                response = response_builder.build(body_json)
+            else:
+                response_body = route.produce(**kwargs)
+                started_at = recorder.add_time(PRODUCE_PHASE, started_at)
+                if streamer is not None:
+                    # Serialized as the runtime writes it, only the response is built here
+                    chunks = streamer(response_body)
+                    key = self.route_key(event)
+                    response = response_builder.build(
+                        self.guard_stream(chunks, request_id, key if key in self.routes else None)
+                    )
+                    recorder.count(STREAMED_METRIC)
+                else:
+                    response = (route.encode or generate_response)(response_body)
+                    recorder.add_time(SERIALIZE_PHASE, started_at)
+                if cache_key is not None:
+                    recorder.count(CACHE_MISS_METRIC)
+                    if response["statusCode"] == http.HTTPStatus.OK:
+                        self.cache.put(cache_key, response["body"])
+            if (
+                route.cache_control is not None
+                and not streamed
+                and response["statusCode"] == http.HTTPStatus.OK
+            ):
+                response = self.conditional(event, route.cache_control, response)
+
+            # Log end of function execution
+            logger.info(ENDED_PROCESSING_LOG, statusCode=response["statusCode"])
+        except Exception as e:
+            started_at = recorder.clock()
+            response = handle_exception(e)
+            recorder.add_time(EXCEPTION_PHASE, started_at)
+            recorder.count_error(type(e) if isinstance(e, CustomError) else InternalServerError)
+        finally:
+            if isinstance(event, dict):
+                key = self.route_key(event)
+                # Only registered routes become a metric dimension, unknown paths would not scale
+                if key in self.routes:
+                    recorder.route = f"{key[0]} {key[1]}"
+                # Error responses are checked too, they are part of the contract, streamed bodies
+                # are not serialized yet
+                if response is not None and isinstance(response["body"], str):
+                    self.checker.check(key, response)
+            recorder.flush()
+            logger.flush()
+        return response
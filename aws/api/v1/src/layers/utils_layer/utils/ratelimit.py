@@ -0,0 +1,230 @@
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from utils.errors import TOO_MANY_REQUESTS_ERROR, TooManyRequestsError
+from utils.logging import logger
+from utils.metrics import Metrics, metrics
+from utils.responses import error_responses
+
+RETRY_AFTER_HEADER = "Retry-After"
+API_KEY_PREFIX = "apiKey:"
+SOURCE_IP_PREFIX = "ip:"
+DEFAULT_KEY_PREFIX = "ratelimit:"
+# Buckets kept per container, the least recently seen client is forgotten (its bucket refilled)
+DEFAULT_MAX_KEYS = 10_000
+# A rate limit check should cost a fraction of the invocation it protects
+DEFAULT_REDIS_TIMEOUT = 0.1
+BACKEND_ERROR_METRIC = "RateLimitBackendErrors"
+BACKEND_ERROR_LOG = "Rate limit backend failed, request allowed"
+
+# Takes a token from the bucket in KEYS[1], refilled at ARGV[1] tokens per second up to ARGV[2],
+# at ARGV[3] milliseconds. Returns 0, or the milliseconds until a token is available.
+# Idle buckets expire once full again, a missing bucket is a full one.
+TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "updatedAt")
+local tokens = tonumber(bucket[1]) or burst
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(now - updated_at, 0) * rate / 1000)
+local wait = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  wait = math.ceil((1 - tokens) * 1000 / rate)
+end
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "updatedAt", tostring(now))
+redis.call("PEXPIRE", KEYS[1], math.ceil(burst * 1000 / rate))
+return wait
+"""
+
+
+def client_key(event: Dict) -> Optional[str]:
+    """
+    Identify the client of a request, by API key if it sent one, by source IP otherwise.
+    The API key id is used, the key itself is a secret and is not kept in the buckets.
+    :param event: Lambda event data, from API Gateway or a function URL
+    :return: Client key, e.g. `ip:203.0.113.1`, or None if the event does not identify one
+    """
+    request_context = event.get("requestContext") or {}
+    identity = request_context.get("identity") or {}
+    api_key_id = identity.get("apiKeyId")
+    if api_key_id:
+        return f"{API_KEY_PREFIX}{api_key_id}"
+    source_ip = identity.get("sourceIp") or (request_context.get("http") or {}).get("sourceIp")
+    if source_ip:
+        return f"{SOURCE_IP_PREFIX}{source_ip}"
+    return None
+
+
+def take_token(
+    tokens: float, updated_at: float, rate: float, burst: float, now: float
+) -> Tuple[float, float]:
+    """
+    Refill a token bucket for the time elapsed, then take a token if one is available.
+    :param tokens: Tokens in the bucket when it was last updated
+    :param updated_at: Time of the last update, in seconds
+    :param rate: Tokens added per second
+    :param burst: Capacity of the bucket
+    :param now: Current time, in seconds
+    :return: Tokens left, and 0 if a token was taken or the seconds until one is available
+    """
+    tokens = min(burst, tokens + max(now - updated_at, 0.0) * rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
+
+
+class BucketBackend:
+    """Storage of the token buckets, by client key."""
+
+    def take(self, key: str, rate: float, burst: float, now: float) -> float:
+        """
+        Take a token from a client's bucket, created full.
+        :param key: Client key
+        :param rate: Tokens added per second
+        :param burst: Capacity of the bucket
+        :param now: Current time, in seconds
+        :return: 0 if a token was taken, otherwise the seconds until one is available
+        """
+        raise NotImplementedError
+
+
+class MemoryBucketBackend(BucketBackend):
+    """
+    Buckets kept in the container, least recently used first out past `max_keys`.
+    Each container limits on its own: a client spread over N containers gets up to N times the
+    rate. Use a shared backend when that matters.
+    """
+
+    def __init__(self, max_keys: int = DEFAULT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def take(self, key: str, rate: float, burst: float, now: float) -> float:
+        tokens, updated_at = self._buckets.pop(key, (burst, now))
+        tokens, wait = take_token(tokens, updated_at, rate, burst, now)
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class RedisBucketBackend(BucketBackend):
+    """
+    Buckets shared by every container in a Redis compatible store (Redis, Valkey, ElastiCache).
+    A take is one round trip running `TAKE_SCRIPT`, atomic however many containers share a
+    bucket. The client only needs an `eval(script, numkeys, *keys_and_args)` method, as
+    redis-py's has.
+    """
+
+    def __init__(self, client: Any, prefix: str = DEFAULT_KEY_PREFIX):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, timeout: float = DEFAULT_REDIS_TIMEOUT) -> "RedisBucketBackend":
+        """
+        Create a backend connected to a store, with redis-py (not shipped in the layer).
+        :param url: Store URL, e.g. `rediss://cache.example.com:6379/0`
+        :param timeout: Connect and read timeout, in seconds
+        :return: Redis backend
+        """
+        import redis
+
+        return cls(
+            redis.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+        )
+
+    def take(self, key: str, rate: float, burst: float, now: float) -> float:
+        wait_ms = self.client.eval(TAKE_SCRIPT, 1, self.prefix + key, rate, burst, int(now * 1000))
+        return int(wait_ms) / 1000
+
+
+def throttled_response(retry_after: float) -> Dict:
+    """
+    Build the 429 response of a rate limited request, from its pre-serialized body.
+    :param retry_after: Seconds until the client's next request is allowed
+    :return: HTTP response dictionary, with a `Retry-After` header in whole seconds
+    """
+    response = error_responses.get(TooManyRequestsError, TOO_MANY_REQUESTS_ERROR)
+    response["headers"][RETRY_AFTER_HEADER] = str(max(math.ceil(retry_after), 1))
+    return response
+
+
+class RateLimiter:
+    """
+    Per-client rate limit with a token bucket: a client gets `burst` requests at once, then
+    `rate` requests per second.
+
+    Requests are keyed by API key or source IP (see `client_key`), events that identify no
+    client are not limited. The buckets are kept by a backend, in the container by default. A
+    failing backend lets requests through, its errors are counted in the invocation's metrics.
+    A limiter with a rate of 0 is disabled.
+    """
+
+    def __init__(
+        self,
+        rate: float = 0.0,
+        burst: Optional[float] = None,
+        backend: Optional[BucketBackend] = None,
+        clock: Callable[[], float] = time.time,
+        recorder: Metrics = metrics,
+    ):
+        self.rate = max(rate, 0.0)
+        self.burst = max(burst if burst is not None else rate, 1.0)
+        self.backend = backend if backend is not None else MemoryBucketBackend()
+        self.clock = clock
+        self.metrics = recorder
+
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        """
+        Create a limiter configured from the lambda environment, disabled by default.
+        RATE_LIMIT_REDIS_URL shares the buckets between containers.
+        :return: Rate limiter
+        """
+        burst = os.getenv("RATE_LIMIT_BURST")
+        url = os.getenv("RATE_LIMIT_REDIS_URL")
+        backend = None
+        if url:
+            timeout = float(os.getenv("RATE_LIMIT_REDIS_TIMEOUT", DEFAULT_REDIS_TIMEOUT))
+            backend = RedisBucketBackend.from_url(url, timeout)
+        return cls(
+            rate=float(os.getenv("RATE_LIMIT_PER_SECOND", 0)),
+            burst=float(burst) if burst else None,
+            backend=backend,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def check(self, event: Dict) -> Optional[float]:
+        """
+        Take a token for the client of a request.
+        :param event: Lambda event data
+        :return: None if the request is allowed, otherwise the seconds until it would be
+        """
+        key = client_key(event)
+        if key is None:
+            return None
+        try:
+            wait = self.backend.take(key, self.rate, self.burst, self.clock())
+        except Exception as e:
+            # Failing open, an unavailable limiter should not take the API down with it
+            self.metrics.count(BACKEND_ERROR_METRIC)
+            logger.warning(BACKEND_ERROR_LOG, error=f"{type(e).__name__}: {e}")
+            return None
+        return wait if wait > 0 else None
+
+
+# Configured once per container, RATE_LIMIT_PER_SECOND enables it
+rate_limiter = RateLimiter.from_env()
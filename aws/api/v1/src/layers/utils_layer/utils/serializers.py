@@ -0,0 +1,70 @@
+import json
+import os
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple, Type
+
+# Backends that can be selected with JSON_BACKEND. The standard library is the default:
+# importing orjson adds about 10 ms to a cold start (it pulls in datetime, zoneinfo and more),
+# while it saves about a microsecond per warm invocation on the greeting bodies
+DEFAULT_JSON_BACKEND = "json"
+JSON_BACKENDS = ("json", "orjson", "ujson")
+
+
+class Serializer(NamedTuple):
+    """
+    A JSON backend and the exceptions it raises for bodies it can not serialize.
+    `loads` raises a ValueError for documents it can not parse, whatever the backend.
+    """
+
+    name: str
+    dumps: Callable[[Any], str]
+    errors: Tuple[Type[Exception], ...]
+    loads: Callable[[str], Any]
+
+
+def _load_orjson() -> Serializer:
+    import orjson
+
+    orjson_dumps = orjson.dumps
+    option = orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj: Any) -> str:
+        return orjson_dumps(obj, option=option).decode()
+
+    # orjson.JSONEncodeError is a TypeError
+    return Serializer("orjson", dumps, (TypeError,), orjson.loads)
+
+
+def _load_ujson() -> Serializer:
+    import ujson
+
+    return Serializer("ujson", ujson.dumps, (TypeError, OverflowError), ujson.loads)
+
+
+def _load_json() -> Serializer:
+    return Serializer("json", json.dumps, (TypeError,), json.loads)
+
+
+_LOADERS: Dict[str, Callable[[], Serializer]] = {
+    "orjson": _load_orjson,
+    "ujson": _load_ujson,
+    "json": _load_json,
+}
+
+
+def load_serializer(preferred: Optional[str] = None) -> Serializer:
+    """
+    Load a JSON backend.
+    :param preferred: Backend to use instead of the standard library, if it can be imported
+        (default: none)
+    :return: Serializer for the preferred backend, for the standard library otherwise
+    """
+    if preferred in _LOADERS:
+        try:
+            return _LOADERS[preferred]()
+        except ImportError:
+            pass
+    return _LOADERS[DEFAULT_JSON_BACKEND]()
+
+
+# Resolved once per container, JSON_BACKEND=orjson opts in to a faster backend for large bodies
+serializer = load_serializer(os.getenv("JSON_BACKEND"))
@@ -0,0 +1,96 @@
+import os
+import time
+from typing import Callable, Dict, List
+
+from utils.logging import WARNING, logger
+
+# Payload of the scheduled rule keeping containers warm, see the `Warmer` events of the template
+WARMER_KEY = "warmer"
+SCHEDULED_EVENT_SOURCE = "aws.events"
+SCHEDULED_EVENT_TYPE = "Scheduled Event"
+# Answer to warmer events, which reach no route
+WARMER_RESPONSE = {"warmed": True}
+WARMUP_LOG = "Warm-up finished"
+WARMUP_FAILED_LOG = "Warm-up callback failed"
+
+WarmupCallback = Callable[[], object]
+
+
+def is_warmer_event(event) -> bool:
+    """
+    Tell whether an event only keeps the container warm: a `{"warmer": true}` payload, or an
+    EventBridge scheduled event.
+    :param event: Lambda event data
+    :return: True if the event should not reach a route
+    """
+    if not isinstance(event, dict):
+        return False
+    if event.get(WARMER_KEY) is True:
+        return True
+    return (
+        event.get("source") == SCHEDULED_EVENT_SOURCE
+        and event.get("detail-type") == SCHEDULED_EVENT_TYPE
+    )
+
+
+class Warmup:
+    """
+    Callbacks run once per container, during the init phase, so the first request does not pay
+    for what would otherwise be built lazily (clients, connections, caches, first calls).
+
+    Lambdas register callbacks at import time and call `run()` at the end of their module. With
+    provisioned concurrency the init phase, and so the warm-up, happens before any request is
+    routed to the container. A failing callback is logged and skipped: whatever it built is
+    built by the first request instead. WARMUP_ENABLED=false skips the callbacks.
+    """
+
+    def __init__(self, enabled: bool = True, clock: Callable[[], int] = time.perf_counter_ns):
+        self.enabled = enabled
+        self.clock = clock
+        self.callbacks: List[WarmupCallback] = []
+        self.timings: Dict[str, float] = {}
+        self._done = 0
+
+    @classmethod
+    def from_env(cls) -> "Warmup":
+        """
+        Create a warm-up registry configured from the lambda environment.
+        :return: Warm-up registry
+        """
+        return cls(enabled=os.getenv("WARMUP_ENABLED", "true").lower() != "false")
+
+    def register(self, callback: WarmupCallback) -> WarmupCallback:
+        """
+        Register a warm-up callback, usable as a decorator.
+        :param callback: Function without arguments
+        :return: The callback unchanged
+        """
+        self.callbacks.append(callback)
+        return callback
+
+    def run(self) -> Dict[str, float]:
+        """
+        Run the callbacks registered since the last run, in registration order.
+        :return: Duration of every callback run so far, in milliseconds, by qualified name
+        """
+        if not self.enabled:
+            return self.timings
+        done, self._done = self._done, len(self.callbacks)
+        pending = self.callbacks[done:]
+        for callback in pending:
+            name = f"{getattr(callback, '__module__', '')}.{getattr(callback, '__qualname__', '')}"
+            started_at = self.clock()
+            try:
+                callback()
+            except Exception as e:
+                logger.exception(WARMUP_FAILED_LOG, e, WARNING)
+            self.timings[name] = (self.clock() - started_at) / 1e6
+        if pending:
+            # Written during the init phase, not with the first request's records
+            logger.info(WARMUP_LOG, timings=dict(self.timings))
+            logger.flush()
+        return self.timings
+
+
+# Configured once per container, lambdas register their callbacks at import time
+warmup = Warmup.from_env()
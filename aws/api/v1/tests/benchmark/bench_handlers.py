@@ -0,0 +1,237 @@
+import argparse
+import contextlib
+import importlib
+import inspect
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from unittest.mock import MagicMock
+
+import utils.errors
+from utils.errors import CustomError
+from utils.pipeline import Pipeline
+
+ROOT_DIR = Path(__file__).resolve().parents[5]
+DEFAULT_OUTPUT = ROOT_DIR / ".benchmarks" / "handlers.json"
+
+HANDLER_MODULES = {
+    "hello": "aws.api.v1.src.lambdas.hello_lambda.app",
+    "goodbye": "aws.api.v1.src.lambdas.goodbye_lambda.app",
+}
+EVENTS = {
+    "valid": {"httpMethod": "GET", "queryStringParameters": {"name": "John"}},
+    "missing_name": {"httpMethod": "GET", "queryStringParameters": None},
+    "invalid_name": {"httpMethod": "GET", "queryStringParameters": {"name": " "}},
+}
+
+# Measured in a fresh interpreter: module import, then the first invocation
+COLD_START_SCRIPT = """
+import json, time
+started = time.perf_counter()
+import {module} as app
+imported = time.perf_counter()
+app.lambda_handler({event}, None)
+invoked = time.perf_counter()
+import_ms, first_call_ms = (imported - started) * 1e3, (invoked - imported) * 1e3
+print(json.dumps({{"import_ms": import_ms, "first_call_ms": first_call_ms}}))
+"""
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """Nearest-rank percentile of the samples."""
+    ordered = sorted(samples)
+    return ordered[min(int(q / 100 * len(ordered)), len(ordered) - 1)]
+
+
+@contextlib.contextmanager
+def silenced_stdout():
+    """Discard what the handlers log, so that the terminal does not skew the timings."""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def bench_cold_start(module: str, runs: int, warmup: bool = True) -> Dict:
+    """
+    Measure import and first invocation time, each run in a fresh interpreter.
+    :param module: Lambda module
+    :param runs: Number of interpreters started
+    :param warmup: Whether the lambda's warm-up callbacks run at import (default: True)
+    :return: Median and minimum timings in milliseconds
+    """
+    script = COLD_START_SCRIPT.format(module=module, event=repr(EVENTS["valid"]))
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(ROOT_DIR),
+        "LOG_LEVEL": "WARNING",
+        "WARMUP_ENABLED": str(warmup).lower(),
+    }
+    samples = []
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, "-c", script], cwd=ROOT_DIR, env=env)
+        samples.append(json.loads(output.splitlines()[-1]))
+
+    result = {}
+    for key in ("import_ms", "first_call_ms"):
+        values = [sample[key] for sample in samples]
+        result[key] = {"median": statistics.median(values), "min": min(values)}
+    return result
+
+
+def bench_warm(call: Callable[[], object], iterations: int) -> Dict:
+    """
+    Measure warm invocation latency and allocations.
+    :param call: Invocation to measure
+    :param iterations: Number of timed invocations
+    :return: Latency percentiles in microseconds and peak traced memory per call in bytes
+    """
+    with silenced_stdout():
+        for _ in range(min(iterations, 100)):
+            call()
+
+        samples = []
+        perf_counter_ns = time.perf_counter_ns
+        for _ in range(iterations):
+            started = perf_counter_ns()
+            call()
+            samples.append((perf_counter_ns() - started) / 1e3)
+
+        tracemalloc.start()
+        peaks = []
+        for _ in range(min(iterations, 200)):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            call()
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+        tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "p50_us": percentile(samples, 50),
+        "p90_us": percentile(samples, 90),
+        "p99_us": percentile(samples, 99),
+        "mean_us": statistics.fmean(samples),
+        "peak_alloc_bytes": statistics.median(peaks),
+    }
+
+
+def custom_error_classes() -> List[type]:
+    """All CustomError subclasses declared in utils.errors."""
+    return [
+        cls
+        for _, cls in inspect.getmembers(utils.errors, inspect.isclass)
+        if issubclass(cls, CustomError) and cls is not CustomError
+    ]
+
+
+def error_pipeline(error_class: type) -> Pipeline:
+    """Pipeline whose only route raises the given error, to measure the full error path."""
+    pipeline = Pipeline()
+
+    def raise_error(event):
+        raise error_class(f"{error_class.__name__} raised by benchmark")
+
+    pipeline.route("GET", "/error", validator=raise_error)(lambda: {})
+    return pipeline
+
+
+def run(iterations: int = 10_000, cold_start_runs: int = 5) -> Dict:
+    """
+    Run the whole suite.
+    :param iterations: Timed invocations per warm benchmark
+    :param cold_start_runs: Fresh interpreters per cold start benchmark
+    :return: Results, keyed by handler then benchmark
+    """
+    context = MagicMock(aws_request_id="benchmark")
+    results: Dict[str, Dict] = {}
+
+    for name, module_name in HANDLER_MODULES.items():
+        handler = importlib.import_module(module_name).lambda_handler
+        results[name] = {
+            "cold_start": bench_cold_start(module_name, cold_start_runs),
+            "cold_start_without_warmup": bench_cold_start(module_name, cold_start_runs, False),
+        }
+        for event_name, event in EVENTS.items():
+            results[name][f"warm_{event_name}"] = bench_warm(
+                lambda: handler(event, context), iterations
+            )
+
+    results["errors"] = {}
+    for error_class in custom_error_classes():
+        pipeline = error_pipeline(error_class)
+        results["errors"][error_class.__name__] = bench_warm(
+            lambda: pipeline({}, context), max(iterations // 10, 100)
+        )
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_report(results: Dict, output: Path) -> Dict:
+    """
+    Write the results with enough metadata to compare them across commits.
+    :param results: Suite results
+    :param output: JSON file to write
+    :return: Report
+    """
+    report = {
+        "commit": git_commit(),
+        "timestamp": int(time.time()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, sort_keys=True))
+    return report
+
+
+def compare(baseline: Dict, current: Dict, prefix: str = "") -> List[str]:
+    """
+    Describe the relative change of every metric between two reports' results.
+    :param baseline: Results of the reference commit
+    :param current: Results of the commit under test
+    :return: One line per metric present in both
+    """
+    lines = []
+    for key, value in current.items():
+        previous = baseline.get(key)
+        if isinstance(value, dict) and isinstance(previous, dict):
+            lines += compare(previous, value, f"{prefix}{key}.")
+        elif isinstance(value, (int, float)) and isinstance(previous, (int, float)) and previous:
+            change = (value - previous) / previous * 100
+            lines.append(f"{prefix}{key}: {previous:.1f} -> {value:.1f} ({change:+.1f}%)")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the lambda handlers.")
+    parser.add_argument("--iterations", type=int, default=10_000, help="Warm invocations")
+    parser.add_argument("--cold-start-runs", type=int, default=5, help="Fresh interpreters")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="JSON report path")
+    parser.add_argument("--compare", type=Path, help="Previous JSON report to compare against")
+    args = parser.parse_args()
+
+    report = write_report(run(args.iterations, args.cold_start_runs), args.output)
+    print(f"Report for commit {report['commit']} written to {args.output}")
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        print(f"Compared to commit {baseline.get('commit')}:")
+        print("\n".join(compare(baseline["results"], report["results"])))
+
+
+if __name__ == "__main__":
+    main()
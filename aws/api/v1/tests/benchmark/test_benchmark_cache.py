@@ -0,0 +1,86 @@
+import timeit
+from types import SimpleNamespace
+
+import pytest
+
+from utils.cache import BodyCache
+from utils.metrics import Metrics
+from utils.pipeline import Pipeline
+from utils.serializers import JSON_BACKENDS, load_serializer
+
+pytest.importorskip("pytest_benchmark")
+
+EVENT = {"httpMethod": "GET", "resource": "/hello", "queryStringParameters": {"name": "John"}}
+CONTEXT = SimpleNamespace(aws_request_id="c6af9ac6-7b61-11e6-9a41-93e812345678")
+
+
+def build_pipeline(max_entries):
+    pipeline = Pipeline(recorder=Metrics(enabled=False), cache=BodyCache(max_entries))
+
+    @pipeline.route("GET", "/hello", cached=True)
+    def hello(name):
+        return {"message": f"Hello, {name}!"}
+
+    return pipeline
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("max_entries", [0, 1024])
+def test_benchmark_body_cache(benchmark, max_entries):
+    """Warm invocation time for a hot name, without and with the body cache."""
+    pipeline = build_pipeline(max_entries)
+    benchmark.group = "body-cache"
+    benchmark.extra_info["max_entries"] = max_entries
+
+    response = benchmark(pipeline, EVENT, CONTEXT)
+    assert response["statusCode"] == 200
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("backend", JSON_BACKENDS)
+def test_benchmark_produce_and_serialize(benchmark, backend):
+    """The f-string and serialization a cache hit replaces, with every available JSON backend."""
+    json_serializer = load_serializer(backend)
+    if json_serializer.name != backend:
+        pytest.skip(f"{backend} is not installed")
+    route = build_pipeline(0).routes[("GET", "/hello")]
+    kwargs = route.validate(EVENT)
+    benchmark.group = "body-cache-lookup"
+
+    benchmark(lambda: json_serializer.dumps(route.produce(**kwargs)))
+
+
+@pytest.mark.benchmark
+def test_benchmark_body_cache_hit(benchmark):
+    pipeline = build_pipeline(1024)
+    pipeline(EVENT, CONTEXT)
+    route = pipeline.routes[("GET", "/hello")]
+    kwargs = route.validate(EVENT)
+    benchmark.group = "body-cache-lookup"
+
+    assert benchmark(lambda: pipeline.cache.get(pipeline.cache_key(route, kwargs))) is not None
+
+
+@pytest.mark.benchmark
+def test_body_cache_hit_beats_produce_and_serialize():
+    """
+    Looking a hot name up costs less than the f-string and serialization it replaces, timed on
+    their own since logging dominates a warm invocation. The standard library backend is the
+    reference: with orjson both cost about a microsecond, the cache pays off with the others.
+    """
+    pipeline = build_pipeline(1024)
+    assert pipeline(EVENT, CONTEXT) == pipeline(EVENT, CONTEXT)
+    route = pipeline.routes[("GET", "/hello")]
+    kwargs = route.validate(EVENT)
+    json_serializer = load_serializer("json")
+
+    def hit():
+        return pipeline.cache.get(pipeline.cache_key(route, kwargs))
+
+    def miss():
+        return json_serializer.dumps(route.produce(**kwargs))
+
+    assert json_serializer.loads(hit()) == json_serializer.loads(miss())
+    hit_time = min(timeit.repeat(hit, number=5_000, repeat=5))
+    miss_time = min(timeit.repeat(miss, number=5_000, repeat=5))
+    assert hit_time < miss_time
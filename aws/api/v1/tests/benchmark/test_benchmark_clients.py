@@ -0,0 +1,88 @@
+import http
+import threading
+import timeit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utils.clients import ClientRegistry
+
+pytest.importorskip("pytest_benchmark")
+urllib3 = pytest.importorskip("urllib3")
+
+BODY = b'{"message":"Hello, John!"}'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Keep-alive downstream service, answering every request with the same body."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes, Nagle would hold the body for the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(http.HTTPStatus.OK)
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def stub_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield "http://{}:{}/".format(*server.server_address)
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def pooled_call(registry, url):
+    """A warm invocation's call, through the container's pool."""
+    return registry.http().request("GET", url).data
+
+
+def fresh_call(url):
+    """A call through a client created for the invocation, which opens its own connection."""
+    manager = urllib3.PoolManager()
+    try:
+        return manager.request("GET", url).data
+    finally:
+        manager.clear()
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("mode", ["pooled", "fresh"])
+def test_benchmark_downstream_call(benchmark, stub_url, mode):
+    """Time of a downstream call from a warm invocation."""
+    registry = ClientRegistry()
+    benchmark.group = "downstream-call"
+
+    if mode == "pooled":
+        assert benchmark(pooled_call, registry, stub_url) == BODY
+    else:
+        assert benchmark(fresh_call, stub_url) == BODY
+    registry.clear()
+
+
+@pytest.mark.benchmark
+def test_pooled_call_beats_fresh_client(stub_url):
+    """
+    Reusing the container's connection skips the handshake a fresh client pays on every call.
+    Without TLS the local handshake is the cheapest it gets, real endpoints add round trips.
+    """
+    registry = ClientRegistry()
+    pooled, fresh = [], []
+    for _ in range(5):
+        pooled.append(min(timeit.repeat(lambda: pooled_call(registry, stub_url), number=50)))
+        fresh.append(min(timeit.repeat(lambda: fresh_call(stub_url), number=50)))
+
+    (pool,) = registry.stats()["http:default"]
+    registry.clear()
+    assert pool["connectionsOpened"] == 1
+    assert min(pooled) < min(fresh)
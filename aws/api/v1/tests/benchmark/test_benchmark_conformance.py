@@ -0,0 +1,62 @@
+import timeit
+from types import SimpleNamespace
+
+import pytest
+
+from utils.conformance import ResponseChecker
+from utils.metrics import Metrics
+from utils.pipeline import Pipeline
+
+pytest.importorskip("pytest_benchmark")
+
+SAMPLE_RATES = (0.0, 0.01, 1.0)
+EVENT = {"httpMethod": "GET", "resource": "/hello", "queryStringParameters": {"name": "John"}}
+CONTEXT = SimpleNamespace(aws_request_id="c6af9ac6-7b61-11e6-9a41-93e812345678")
+# Overhead allowed on a warm invocation, relative to a pipeline without checks
+MAX_SAMPLED_OVERHEAD = 0.1
+
+
+def build_pipeline(sample_rate):
+    # Metrics lines are left out, they would only add noise to the comparison
+    recorder = Metrics(enabled=False)
+    pipeline = Pipeline(ResponseChecker(sample_rate, recorder=recorder), recorder)
+
+    @pipeline.route("GET", "/hello")
+    def hello(name):
+        return {"message": f"Hello {name}!"}
+
+    return pipeline
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("sample_rate", SAMPLE_RATES)
+def test_benchmark_response_checks(benchmark, sample_rate):
+    """Warm invocation time with no, sampled and exhaustive response checks."""
+    pipeline = build_pipeline(sample_rate)
+    benchmark.group = "response-checks"
+    benchmark.extra_info["sample_rate"] = sample_rate
+
+    response = benchmark(pipeline, EVENT, CONTEXT)
+    assert response["statusCode"] == 200
+    assert pipeline.checker.violations == 0
+
+
+@pytest.mark.benchmark
+def test_sampled_checks_overhead_is_bounded():
+    """
+    Checking 1% of the responses stays within the noise of a warm invocation, the mean
+    time of a single check is reported by the checker itself.
+    """
+    context = CONTEXT
+    pipelines = {sample_rate: build_pipeline(sample_rate) for sample_rate in SAMPLE_RATES}
+    timings = dict.fromkeys(SAMPLE_RATES, float("inf"))
+    # Rounds alternate between the pipelines so they share the same machine noise
+    for _ in range(10):
+        for sample_rate, pipeline in pipelines.items():
+            elapsed = timeit.timeit(lambda: pipeline(EVENT, context), number=500)
+            timings[sample_rate] = min(timings[sample_rate], elapsed)
+
+    for sample_rate in SAMPLE_RATES[1:]:
+        checker = pipelines[sample_rate].checker
+        assert checker.checked and checker.mean_check_us > 0
+    assert timings[0.01] / timings[0.0] < 1 + MAX_SAMPLED_OVERHEAD
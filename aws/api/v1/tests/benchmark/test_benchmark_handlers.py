@@ -0,0 +1,47 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from aws.api.v1.tests.benchmark.bench_handlers import (
+    HANDLER_MODULES,
+    compare,
+    custom_error_classes,
+    run,
+    write_report,
+)
+
+WARM_METRICS = {"iterations", "p50_us", "p90_us", "p99_us", "mean_us", "peak_alloc_bytes"}
+
+
+@pytest.mark.benchmark
+def test_benchmark_handlers(tmp_path):
+    """
+    Run the handler suite and write its JSON report.
+    BENCHMARK_OUTPUT keeps the report for comparison with other commits.
+    """
+    output = Path(os.getenv("BENCHMARK_OUTPUT", tmp_path / "handlers.json"))
+    report = write_report(run(iterations=1_000, cold_start_runs=2), output)
+
+    assert json.loads(output.read_text()) == report
+    results = report["results"]
+    for name in HANDLER_MODULES:
+        for benchmark in ("cold_start", "cold_start_without_warmup"):
+            assert set(results[name][benchmark]) == {"import_ms", "first_call_ms"}
+        for benchmark in ("warm_valid", "warm_missing_name", "warm_invalid_name"):
+            assert set(results[name][benchmark]) == WARM_METRICS
+            assert results[name][benchmark]["p50_us"] <= results[name][benchmark]["p99_us"]
+    assert set(results["errors"]) == {cls.__name__ for cls in custom_error_classes()}
+
+
+@pytest.mark.benchmark
+def test_compare():
+    """Compare reports the relative change of every shared metric."""
+    baseline = {"hello": {"warm_valid": {"p50_us": 10.0, "p99_us": 20.0}}, "removed": {"x": 1}}
+    current = {"hello": {"warm_valid": {"p50_us": 12.0, "p99_us": 15.0}}, "added": {"x": 1}}
+
+    assert compare(baseline, current) == [
+        "hello.warm_valid.p50_us: 10.0 -> 12.0 (+20.0%)",
+        "hello.warm_valid.p99_us: 20.0 -> 15.0 (-25.0%)",
+    ]
@@ -0,0 +1,65 @@
+from pathlib import Path
+
+import pytest
+import toml
+
+from utils.ci.check_import_time import (
+    ImportProfile,
+    ImportRecord,
+    check_budgets,
+    parse_import_time,
+    profile_import,
+)
+
+ROOT_DIR = Path(__file__).resolve().parents[5]
+
+
+@pytest.mark.benchmark
+def test_parse_import_time():
+    """Profile lines are parsed with their nesting depth."""
+    output = "\n".join(
+        [
+            "import time: self [us] | cumulative | imported package",
+            "import time:       100 |        100 |     json.decoder",
+            "import time:        50 |        150 |   json",
+            "import time:        10 |        160 | app",
+            "unrelated line",
+        ]
+    )
+    assert [(r.name, r.depth, r.self_us, r.cumulative_us) for r in parse_import_time(output)] == [
+        ("json.decoder", 2, 100, 100),
+        ("json", 1, 50, 150),
+        ("app", 0, 10, 160),
+    ]
+
+
+@pytest.mark.benchmark
+def test_traceback_is_imported_lazily():
+    """The layer keeps rarely used modules off the cold start path."""
+    profile = profile_import("aws.api.v1.src.lambdas.hello_lambda.app", str(ROOT_DIR))
+    imported = {record.name for record in profile.records}
+
+    assert "utils.pipeline" in imported
+    assert not imported & {"traceback", "logging"}
+
+
+@pytest.mark.benchmark
+def test_only_module_counts_fail_the_budget(monkeypatch):
+    """Import times over their target are reported, module counts over budget fail."""
+    records = [ImportRecord("json", 1, 900, 900), ImportRecord("app", 0, 100, 1_000)]
+    monkeypatch.setattr(
+        "utils.ci.check_import_time.profile_import",
+        lambda module, cwd: ImportProfile(module, 1.0, records),
+    )
+    config = {"runs": 1, "modules": {"app": {"max_ms": 0.5, "max_modules": 2}}}
+    assert check_budgets(config, str(ROOT_DIR), top=0)
+
+    config["modules"]["app"]["max_modules"] = 1
+    assert not check_budgets(config, str(ROOT_DIR), top=0)
+
+
+@pytest.mark.benchmark
+def test_import_budgets():
+    """Lambdas and layer import within the module budgets configured in pyproject.toml."""
+    config = toml.load(ROOT_DIR / "pyproject.toml")["tool"]["import_budget"]
+    assert check_budgets(config, str(ROOT_DIR), top=0)
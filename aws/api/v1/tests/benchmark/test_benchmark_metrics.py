@@ -0,0 +1,80 @@
+import os
+import timeit
+from types import SimpleNamespace
+
+import pytest
+
+from utils.conformance import ResponseChecker
+from utils.metrics import Metrics
+from utils.pipeline import Pipeline
+
+pytest.importorskip("pytest_benchmark")
+
+EVENT = {"httpMethod": "GET", "resource": "/hello", "queryStringParameters": {"name": "John"}}
+CONTEXT = SimpleNamespace(aws_request_id="c6af9ac6-7b61-11e6-9a41-93e812345678")
+# Slowdown the metrics may cause to a warm invocation, compared with the same pipeline without
+# them. The line costs a few microseconds (1.4 to 1.7 times a logged invocation here), the slack
+# absorbs the noise of shared machines
+MAX_METRICS_SLOWDOWN = 2.5
+
+
+@pytest.fixture(scope="module")
+def devnull():
+    with open(os.devnull, "w") as stream:
+        yield stream
+
+
+def build_pipeline(enabled, stream):
+    recorder = Metrics(enabled=enabled, stream=stream)
+    pipeline = Pipeline(ResponseChecker(recorder=recorder), recorder)
+
+    @pipeline.route("GET", "/hello")
+    def hello(name):
+        return {"message": f"Hello {name}!"}
+
+    return pipeline
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("enabled", [False, True])
+def test_benchmark_metrics(benchmark, devnull, enabled):
+    """Warm invocation time with and without the metrics line."""
+    pipeline = build_pipeline(enabled, devnull)
+    benchmark.group = "metrics"
+    benchmark.extra_info["metrics"] = enabled
+
+    response = benchmark(pipeline, EVENT, CONTEXT)
+    assert response["statusCode"] == 200
+
+
+@pytest.mark.benchmark
+def test_benchmark_metrics_flush(benchmark, devnull):
+    """Formatting and writing a metrics line with every phase timed."""
+    metrics = Metrics(stream=devnull)
+
+    def invocation():
+        metrics.start("request-id")
+        started_at = metrics.clock()
+        for phase in ("Validate", "Produce", "Serialize"):
+            started_at = metrics.add_time(phase, started_at)
+        metrics.route = "GET /hello"
+        metrics.flush()
+
+    benchmark.group = "metrics-flush"
+    benchmark(invocation)
+
+
+@pytest.mark.benchmark
+def test_metrics_overhead_is_bounded(devnull):
+    """The metrics only add a fraction of a warm invocation's own time."""
+    context = CONTEXT
+    number = 500
+    pipelines = {enabled: build_pipeline(enabled, devnull) for enabled in (False, True)}
+    timings = dict.fromkeys(pipelines, float("inf"))
+    # Rounds alternate between the pipelines so they share the same machine noise
+    for _ in range(10):
+        for enabled, pipeline in pipelines.items():
+            elapsed = timeit.timeit(lambda: pipeline(EVENT, context), number=number)
+            timings[enabled] = min(timings[enabled], elapsed)
+
+    assert timings[True] < MAX_METRICS_SLOWDOWN * timings[False]
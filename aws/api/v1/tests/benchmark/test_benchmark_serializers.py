@@ -0,0 +1,46 @@
+import importlib.util
+
+import pytest
+
+from utils.serializers import JSON_BACKENDS, load_serializer
+
+pytest.importorskip("pytest_benchmark")
+
+AVAILABLE_BACKENDS = [
+    name for name in JSON_BACKENDS if name == "json" or importlib.util.find_spec(name)
+]
+
+GREETING_BODY = {"message": "Hello, Test!"}
+ERROR_BODY = {"error": "'name' query string parameter is required"}
+LARGE_BODY = {
+    "results": [
+        {
+            "id": i,
+            "message": f"Hello, user {i}!",
+            "score": i / 7,
+            "active": i % 2 == 0,
+            "tags": ["greeting", "hello", str(i)],
+            "meta": {"source": "benchmark", "attempt": i % 5, "parent": {"id": i // 10}},
+        }
+        for i in range(2_000)
+    ]
+}
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("name", AVAILABLE_BACKENDS)
+@pytest.mark.parametrize(
+    "body",
+    [
+        pytest.param(GREETING_BODY, id="greeting"),
+        pytest.param(ERROR_BODY, id="error"),
+        pytest.param(LARGE_BODY, id="large-nested"),
+    ],
+)
+def test_benchmark_serializer(benchmark, name, body):
+    """Compare JSON backends on greeting, error and large nested response bodies."""
+    serializer = load_serializer(name)
+    benchmark.group = f"serialize-{len(serializer.dumps(body))}B"
+    benchmark.extra_info["backend"] = name
+
+    benchmark(serializer.dumps, body)
@@ -0,0 +1,79 @@
+import json
+import tracemalloc
+
+import pytest
+
+from aws.api.v1.src.lambdas.hello_lambda import app as hello_app
+from utils.local_api import LocalApi
+
+pytest.importorskip("pytest_benchmark")
+
+BATCH_SIZES = (100, 1_000, 10_000)
+
+
+@pytest.fixture(scope="module")
+def apis():
+    """The harness invoking with API Gateway REST events, buffered, and function URL events."""
+    rest_api = LocalApi.from_spec()
+    return {"buffered": rest_api, "streamed": LocalApi(rest_api.routes, function_url=True)}
+
+
+@pytest.fixture(autouse=True)
+def quiet_streaming_pipeline(monkeypatch):
+    """Stream the hello lambda's responses, without a metrics line per invocation."""
+    monkeypatch.setattr(hello_app.pipeline, "streaming", True)
+    monkeypatch.setattr(hello_app.pipeline.metrics, "enabled", False)
+
+
+def batch_body(size):
+    return json.dumps([f"name-{i}" for i in range(size)])
+
+
+def respond(api, body):
+    """Invoke the batch route and write the body away chunk by chunk, like the runtime does."""
+    response = api.invoke("POST", "/hello/batch", body=body)
+    chunks = [response["body"]] if isinstance(response["body"], str) else response["body"]
+    return sum(len(chunk) for chunk in chunks)
+
+
+def peak_memory(api, body):
+    """
+    Peak memory allocated while answering a batch, the request body excluded.
+    :return: Peak in bytes, and the length of the response body
+    """
+    respond(api, body)
+    tracemalloc.start()
+    try:
+        length = respond(api, body)
+        return tracemalloc.get_traced_memory()[1], length
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("size", BATCH_SIZES)
+@pytest.mark.parametrize("mode", ["buffered", "streamed"])
+def test_benchmark_batch_response(benchmark, apis, mode, size):
+    """Time to answer a batch through the harness, with the peak memory it takes."""
+    body = batch_body(size)
+    peak, length = peak_memory(apis[mode], body)
+    benchmark.group = f"batch-response-{size}"
+    benchmark.extra_info.update({"mode": mode, "peak_bytes": peak, "body_bytes": length})
+
+    assert benchmark(respond, apis[mode], body) == length
+
+
+@pytest.mark.benchmark
+def test_streamed_peak_memory_against_payload_size(apis):
+    """
+    Streaming only holds a chunk of the response at a time: the buffered body, and the item
+    strings joined into it, grow with the batch, the streamed peak only by the parsed names.
+    """
+    peaks = {}
+    for size in BATCH_SIZES:
+        body = batch_body(size)
+        peaks[size] = {mode: peak_memory(api, body) for mode, api in apis.items()}
+
+    largest = peaks[BATCH_SIZES[-1]]
+    assert largest["streamed"][1] == largest["buffered"][1]
+    assert largest["streamed"][0] < 0.7 * largest["buffered"][0]
@@ -0,0 +1,84 @@
+import timeit
+from pathlib import Path
+
+import pytest
+import yaml
+
+from utils.validators import validate_get_hello
+
+pytest.importorskip("pytest_benchmark")
+jsonschema = pytest.importorskip("jsonschema")
+
+SPEC_PATH = Path(__file__).resolve().parents[2] / "api-spec" / "bundled.yaml"
+EVENTS = {
+    "valid": {"httpMethod": "GET", "queryStringParameters": {"name": "John"}},
+    "missing-name": {"httpMethod": "GET", "queryStringParameters": None},
+    "invalid-name": {"httpMethod": "GET", "queryStringParameters": {"name": "   "}},
+}
+
+
+def runtime_validator():
+    """jsonschema validator of the getHello event, built from the same spec."""
+    with open(SPEC_PATH) as file:
+        spec = yaml.safe_load(file)
+    (parameter,) = [p for p in spec["paths"]["/hello"]["get"]["parameters"] if p["in"] == "query"]
+    schema = {
+        "type": "object",
+        "required": ["queryStringParameters"],
+        "properties": {
+            "queryStringParameters": {
+                "type": "object",
+                "required": [parameter["name"]],
+                "properties": {parameter["name"]: {"$ref": parameter["schema"]["$ref"]}},
+            }
+        },
+        "components": spec["components"],
+    }
+    validator = jsonschema.Draft7Validator(schema)
+
+    def validate(event):
+        error = jsonschema.exceptions.best_match(validator.iter_errors(event))
+        if error is not None:
+            raise error
+        return {"name": event["queryStringParameters"]["name"]}
+
+    return validate
+
+
+def compiled_validator():
+    return validate_get_hello
+
+
+VALIDATORS = {"compiled": compiled_validator, "jsonschema": runtime_validator}
+
+
+def call(validate, event):
+    try:
+        return validate(event)
+    except Exception as e:
+        return e
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("name", VALIDATORS)
+@pytest.mark.parametrize("event_name", EVENTS)
+def test_benchmark_validator(benchmark, name, event_name):
+    """Compare the compiled getHello validator with jsonschema on valid and invalid events."""
+    validate = VALIDATORS[name]()
+    benchmark.group = f"validate-{event_name}"
+    benchmark.extra_info["validator"] = name
+
+    benchmark(call, validate, EVENTS[event_name])
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("event_name", EVENTS)
+def test_compiled_validator_beats_jsonschema(event_name):
+    """Both validators agree, and the compiled one is faster by a wide margin."""
+    event = EVENTS[event_name]
+    compiled, runtime = compiled_validator(), runtime_validator()
+    assert isinstance(call(compiled, event), dict) == isinstance(call(runtime, event), dict)
+
+    compiled_time = min(timeit.repeat(lambda: call(compiled, event), number=2_000, repeat=5))
+    runtime_time = min(timeit.repeat(lambda: call(runtime, event), number=2_000, repeat=5))
+    assert runtime_time / compiled_time > 10
@@ -0,0 +1,48 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from aws.api.v1.tests.benchmark.bench_handlers import HANDLER_MODULES, ROOT_DIR, bench_cold_start
+
+TIMINGS_SCRIPT = """
+import json
+import {module}
+from utils.warmup import warmup
+print(json.dumps(warmup.timings))
+"""
+
+
+def import_timings(module: str, warmup: bool) -> dict:
+    """Warm-up timings of a lambda imported in a fresh interpreter."""
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(ROOT_DIR),
+        "LOG_LEVEL": "WARNING",
+        "WARMUP_ENABLED": str(warmup).lower(),
+    }
+    script = TIMINGS_SCRIPT.format(module=module)
+    output = subprocess.check_output([sys.executable, "-c", script], cwd=ROOT_DIR, env=env)
+    return json.loads(output.splitlines()[-1])
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("name", HANDLER_MODULES)
+def test_routes_warmed_at_import(name):
+    """
+    The routes are warmed when a fresh interpreter imports the lambda, unless disabled. The
+    first request's latency with and without warm-up is reported, it is too close to the noise
+    to be asserted on.
+    """
+    module = HANDLER_MODULES[name]
+    assert list(import_timings(module, warmup=True)) == [f"{module}.warm_routes"]
+    assert import_timings(module, warmup=False) == {}
+
+    before = bench_cold_start(module, runs=9, warmup=False)
+    after = bench_cold_start(module, runs=9, warmup=True)
+    print(
+        f"{name} first request: {before['first_call_ms']['min']:.3f} ms -> "
+        f"{after['first_call_ms']['min']:.3f} ms with warm-up"
+    )
@@ -0,0 +1,25 @@
+import os
+
+import pytest
+
+from utils.local_api import LocalApi
+
+
+@pytest.fixture(scope="session")
+def local_api():
+    """In-process API built from the OpenAPI spec and SAM template."""
+    return LocalApi.from_spec()
+
+
+@pytest.fixture(scope="session")
+def api_endpoint(local_api):
+    """
+    Base URL of the API under test.
+    Uses API_ENDPOINT when set (e.g. `sam local start-api`), the in-process harness otherwise.
+    """
+    endpoint = os.getenv("API_ENDPOINT")
+    if endpoint:
+        yield endpoint.rstrip("/")
+        return
+    with local_api.serve() as url:
+        yield url
@@ -3,22 +3,20 @@ import http
 import pytest
 import requests
 
-from utils.errors import INVALID_NAME_ERROR, REQUIRED_NAME_ERROR
+from utils.errors import INVALID_BODY_ERROR, INVALID_NAME_ERROR, REQUIRED_NAME_ERROR
 
-API_ENDPOINT = "http://localhost:3000/"
 
-
-def make_request(endpoint, params=None):
+def make_request(api_endpoint, endpoint, params=None):
     try:
-        response = requests.get(f"{API_ENDPOINT}/{endpoint}", params=params)
+        response = requests.get(f"{api_endpoint}/{endpoint}", params=params)
     except Exception as e:
         pytest.fail(f"Request to {endpoint} endpoint failed: {e}")
     return response
 
 
 @pytest.mark.integration
-def test_hello_lambda():
-    response = make_request("hello", params={"name": "John"})
+def test_hello_lambda(api_endpoint):
+    response = make_request(api_endpoint, "hello", params={"name": "John"})
     assert response.status_code == http.HTTPStatus.OK
     data = response.json()
     assert data["message"] == "Hello, John!"
@@ -34,8 +32,32 @@ def test_hello_lambda():
         ({"name": " "}, http.HTTPStatus.BAD_REQUEST, INVALID_NAME_ERROR),
     ],
 )
-def test_hello_lambda_errors(params, expected_status_code, expected_error_message):
-    response = make_request("hello", params=params)
+def test_hello_lambda_errors(api_endpoint, params, expected_status_code, expected_error_message):
+    response = make_request(api_endpoint, "hello", params=params)
     assert response.status_code == expected_status_code
     data = response.json()
     assert data["error"] == expected_error_message
+
+
+@pytest.mark.integration
+def test_hello_lambda_batch(api_endpoint):
+    try:
+        response = requests.post(f"{api_endpoint}/hello/batch", json=["John", " ", "Jane"])
+    except Exception as e:
+        pytest.fail(f"Request to hello/batch endpoint failed: {e}")
+    assert response.status_code == http.HTTPStatus.OK
+    assert response.json()["results"] == [
+        {"message": "Hello, John!"},
+        {"error": INVALID_NAME_ERROR},
+        {"message": "Hello, Jane!"},
+    ]
+
+
+@pytest.mark.integration
+def test_hello_lambda_batch_invalid_body(api_endpoint):
+    try:
+        response = requests.post(f"{api_endpoint}/hello/batch", json={"name": "John"})
+    except Exception as e:
+        pytest.fail(f"Request to hello/batch endpoint failed: {e}")
+    assert response.status_code == http.HTTPStatus.BAD_REQUEST
+    assert response.json()["error"] == INVALID_BODY_ERROR
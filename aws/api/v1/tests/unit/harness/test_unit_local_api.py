@@ -0,0 +1,145 @@
+import http
+import json
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from aws.api.v1.src.lambdas.hello_lambda import app as hello_app
+from aws.api.v1.src.lambdas.hello_lambda.app import lambda_handler as hello_handler
+from utils.errors import INVALID_NAME_ERROR
+from utils.local_api import LocalApi, Route, build_event, build_function_url_event, read_body
+
+
+@pytest.fixture(scope="module")
+def local_api():
+    """Harness built from the repository spec and template."""
+    return LocalApi.from_spec()
+
+
+@pytest.mark.unit
+def test_routes_follow_spec_and_template(local_api):
+    """Every spec path is served by the lambda its integration points to."""
+    routes = {(route.method, route.resource): route for route in local_api.routes}
+
+    assert routes[("GET", "/hello")].function_name == "HelloLambda"
+    assert routes[("GET", "/hello")].handler is hello_handler
+    assert routes[("GET", "/goodbye")].function_name == "GoodbyeLambda"
+    assert routes[("GET", "/hello")].timeout == 3
+
+
+@pytest.mark.unit
+def test_build_event():
+    """Requests are turned into API Gateway REST proxy events."""
+    route = Route("GET", "/hello", "HelloLambda", hello_handler, 3)
+    event = build_event(route, "/hello", {"name": ["a", "b"]}, {"Accept": "*/*"})
+
+    assert event["resource"] == "/hello"
+    assert event["httpMethod"] == "GET"
+    assert event["queryStringParameters"] == {"name": "b"}
+    assert event["multiValueQueryStringParameters"] == {"name": ["a", "b"]}
+    assert event["multiValueHeaders"] == {"Accept": ["*/*"]}
+    assert event["requestContext"]["identity"]["sourceIp"] == "127.0.0.1"
+    assert build_event(route, "/hello")["queryStringParameters"] is None
+
+
+@pytest.mark.unit
+def test_build_function_url_event():
+    """Function URL events carry the path, lowercased headers and comma-joined query values."""
+    route = Route("GET", "/hello", "HelloLambda", hello_handler, 3)
+    event = build_function_url_event(route, "/hello", {"name": ["a", "b"]}, {"User-Agent": "test"})
+
+    assert event["version"] == "2.0"
+    assert event["rawPath"] == "/hello"
+    assert event["rawQueryString"] == "name=a&name=b"
+    assert event["queryStringParameters"] == {"name": "a,b"}
+    assert event["headers"] == {"user-agent": "test"}
+    assert event["requestContext"]["http"]["method"] == "GET"
+    assert event["requestContext"]["http"]["userAgent"] == "test"
+    assert "resource" not in event
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "path, query, status, body",
+    [
+        ("/hello", {"name": ["John"]}, http.HTTPStatus.OK, {"message": "Hello, John!"}),
+        ("/goodbye", {"name": ["John"]}, http.HTTPStatus.OK, {"message": "Goodbye, John!"}),
+        (
+            "/hello",
+            None,
+            http.HTTPStatus.BAD_REQUEST,
+            {"error": "'name' query string parameter is required"},
+        ),
+        ("/missing", None, http.HTTPStatus.FORBIDDEN, {"message": "Missing Authentication Token"}),
+    ],
+)
+def test_invoke(local_api, path, query, status, body):
+    """Invoke calls the handler serving the route directly."""
+    response = local_api.invoke("GET", path, query)
+    assert response["statusCode"] == status
+    assert json.loads(response["body"]) == body
+
+
+@pytest.mark.unit
+def test_invoke_path_parameters():
+    """Path templates are matched and their values passed as path parameters."""
+    route = Route("GET", "/users/{id}", "UsersLambda", lambda event, context: event, 3)
+    event = LocalApi([route]).invoke("GET", "/users/42")
+
+    assert event["resource"] == "/users/{id}"
+    assert event["pathParameters"] == {"id": "42"}
+
+
+@pytest.mark.unit
+def test_serve(local_api):
+    """Serve answers concurrent HTTP requests through the handlers."""
+
+    def get(url):
+        with urllib.request.urlopen(url) as response:
+            return response.status, response.headers["Content-Type"], json.loads(response.read())
+
+    with local_api.serve() as url:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(get, [f"{url}/hello?name=John"] * 32))
+
+    assert set(map(json.dumps, results)) == {
+        json.dumps([http.HTTPStatus.OK, "application/json", {"message": "Hello, John!"}])
+    }
+
+
+@pytest.fixture
+def streaming(monkeypatch):
+    """Let the hello lambda stream its responses, as if deployed behind a streaming function URL."""
+    monkeypatch.setattr(hello_app.pipeline, "streaming", True)
+
+
+@pytest.mark.unit
+def test_invoke_function_url(local_api, streaming):
+    """Function URL invocations get streamed batch bodies and buffered single-name ones."""
+    function_url_api = LocalApi(local_api.routes, function_url=True)
+
+    response = function_url_api.invoke("POST", "/hello/batch", body='["John", ""]')
+    assert not isinstance(response["body"], str)
+    assert json.loads(read_body(response)) == {
+        "results": [{"message": "Hello, John!"}, {"error": INVALID_NAME_ERROR}]
+    }
+    response = function_url_api.invoke("GET", "/hello", {"name": ["John"]})
+    assert json.loads(read_body(response)) == {"message": "Hello, John!"}
+
+
+@pytest.mark.unit
+def test_serve_streamed(local_api, streaming):
+    """Streamed bodies are served with chunked transfer encoding."""
+    names = [f"name-{i}" for i in range(1000)]
+
+    with LocalApi(local_api.routes, function_url=True).serve() as url:
+        request = urllib.request.Request(
+            f"{url}/hello/batch", data=json.dumps(names).encode(), method="POST"
+        )
+        with urllib.request.urlopen(request) as response:
+            assert response.headers["Transfer-Encoding"] == "chunked"
+            assert response.headers["Content-Length"] is None
+            body = json.loads(response.read())
+
+    assert body == {"results": [{"message": f"Hello, {name}!"} for name in names]}
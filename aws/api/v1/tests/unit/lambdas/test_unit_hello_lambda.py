@@ -1,28 +1,20 @@
 import http
-import os
-import traceback
+import json
 from unittest.mock import MagicMock, patch
 
 import pytest
 
 from aws.api.v1.src.lambdas.hello_lambda.app import (
-    generate_response,
+    CACHE_CONTROL,
     greet_user,
-    handle_exception,
     lambda_handler,
-    logger,
-    validate_input,
+    pipeline,
+    warm_routes,
 )
-from utils.errors import InvalidQueryStringParameterError, MissingRequiredQueryStringParameterError
+from utils.errors import INVALID_BODY_ERROR, INVALID_NAME_ERROR, REQUIRED_NAME_ERROR
+from utils.warmup import WARMER_RESPONSE, warmup
 
-app_module = "aws.api.v1.src.lambdas.hello_lambda.app"
-
-
-@pytest.fixture
-def mock_env():
-    """Mock environment setup."""
-    with patch.dict(os.environ, {"DOCS_DOMAIN_NAME": "example.com"}):
-        yield
+pipeline_module = "utils.pipeline"
 
 
 @pytest.fixture
@@ -31,40 +23,6 @@ def mock_context():
     return MagicMock()
 
 
-@pytest.mark.unit
-@pytest.mark.usefixtures("mock_env")
-@pytest.mark.parametrize(
-    "event, expected",
-    [
-        ({"queryStringParameters": {"name": "Test"}}, "Test"),
-        (
-            {"queryStringParameters": {}},
-            MissingRequiredQueryStringParameterError("'name' query string parameter is required"),
-        ),
-        (
-            {"queryStringParameters": {"name": ""}},
-            InvalidQueryStringParameterError("Invalid name provided"),
-        ),
-        (
-            {"queryStringParameters": {"name": None}},
-            InvalidQueryStringParameterError("Invalid name provided"),
-        ),
-        (
-            {"queryStringParameters": {"name": "  "}},
-            InvalidQueryStringParameterError("Invalid name provided"),
-        ),
-    ],
-)
-def test_validate_input(event, expected):
-    """Validate input function tests."""
-    if isinstance(expected, str):
-        assert validate_input(event) == expected
-    else:
-        with pytest.raises(expected.__class__) as e:
-            validate_input(event)
-        assert str(e.value) == str(expected)
-
-
 @pytest.mark.unit
 def test_greet_user():
     """Greet user returns expected message when given valid name."""
@@ -72,96 +30,109 @@ def test_greet_user():
 
 
 @pytest.mark.unit
-@pytest.mark.usefixtures("mock_env")
-def test_generate_response():
-    """Generate response returns expected response when given valid body."""
-    response = generate_response({"message": "Hello, Test!"})
-    assert response["statusCode"] == http.HTTPStatus.OK
-    assert response["headers"]["Content-Type"] == "application/json"
-    assert response["headers"]["Access-Control-Allow-Origin"] == "https://example.com"
-    assert response["headers"]["Access-Control-Allow-Methods"] == "OPTIONS,GET,POST,PUT,DELETE"
-    assert response["body"] == '{"message": "Hello, Test!"}'
+def test_greet_user_is_routed():
+    """Greet user is registered for GET /hello and serves direct invocations."""
+    assert pipeline.routes[("GET", "/hello")].produce is greet_user
+    assert pipeline.default_route.produce is greet_user
+    assert pipeline.routes[("POST", "/hello/batch")].produce.produce is greet_user
 
 
 @pytest.mark.unit
-@pytest.mark.usefixtures("mock_env", "mock_context")
-@pytest.mark.parametrize("event", [({"queryStringParameters": {"name": "Test"}})])
-@patch(f"{app_module}.validate_input", return_value="Test")
-@patch(f"{app_module}.greet_user", return_value={"message": "Hello, Test!"})
-@patch(f"{app_module}.generate_response", return_value="response")
-def test_lambda_handler_valid_response(
-    mock_validate_input, mock_greet_user, mock_generate_response, event, mock_context
-):
+@pytest.mark.parametrize(
+    "event",
+    [
+        {"queryStringParameters": {"name": "Test"}},
+        {"httpMethod": "GET", "resource": "/hello", "queryStringParameters": {"name": "Test"}},
+    ],
+)
+def test_lambda_handler_valid_response(event, mock_context):
     """Lambda handler returns expected response when given valid event."""
     response = lambda_handler(event, mock_context)
-    assert response == "response"
-    mock_validate_input.assert_called_once()
-    mock_greet_user.assert_called_once()
-    mock_generate_response.assert_called_once()
+    assert response["statusCode"] == http.HTTPStatus.OK
+    assert json.loads(response["body"]) == {"message": "Hello, Test!"}
 
 
 @pytest.mark.unit
-@pytest.mark.usefixtures("mock_env", "mock_context")
-@pytest.mark.parametrize(
-    "event, side_effect",
-    [
-        (
-            {"queryStringParameters": {}},
-            MissingRequiredQueryStringParameterError("'name' query string parameter is required"),
-        ),
-        (
-            {"queryStringParameters": {"name": ""}},
-            InvalidQueryStringParameterError("Invalid name provided"),
-        ),
-        (
-            {"queryStringParameters": {"name": None}},
-            InvalidQueryStringParameterError("Invalid name provided"),
-        ),
-        (
-            {"queryStringParameters": {"name": "  "}},
-            InvalidQueryStringParameterError("Invalid name provided"),
-        ),
-    ],
-)
-def test_lambda_handler_error_response(event, side_effect, mock_context):
-    """Lambda handler returns error response when given invalid event."""
+def test_lambda_handler_conditional_request(mock_context):
+    """Greetings carry an ETag, sending it back answers 304 Not Modified."""
+    event = {"httpMethod": "GET", "resource": "/hello", "queryStringParameters": {"name": "Test"}}
+    response = lambda_handler(event, mock_context)
+    assert response["headers"]["Cache-Control"] == CACHE_CONTROL
+
+    event["headers"] = {"If-None-Match": response["headers"]["ETag"]}
+    response = lambda_handler(event, mock_context)
+    assert response["statusCode"] == http.HTTPStatus.NOT_MODIFIED
+    assert response["body"] == ""
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("event", [({"queryStringParameters": {"name": "Test"}})])
+def test_lambda_handler_uses_pipeline(event, mock_context):
+    """Lambda handler delegates serialization and response building to the pipeline."""
+    expected_response = {
+        "statusCode": http.HTTPStatus.OK,
+        "headers": {},
+        "body": '{"message":"Hello, Test!"}',
+    }
     with patch(
-        f"{app_module}.validate_input", side_effect=side_effect
-    ) as mock_validate_input, patch(
-        f"{app_module}.handle_exception", return_value="error_response"
-    ) as mock_handle_exception:
+        f"{pipeline_module}.generate_response", return_value=expected_response
+    ) as mock_generate:
         response = lambda_handler(event, mock_context)
 
-        assert response == "error_response"
-        mock_validate_input.assert_called_once()
-        mock_handle_exception.assert_called_once()
+    assert response is expected_response
+    mock_generate.assert_called_once_with({"message": "Hello, Test!"})
 
 
 @pytest.mark.unit
-@pytest.mark.usefixtures("mock_env")
 @pytest.mark.parametrize(
-    "exception, status",
+    "event, expected_message",
     [
-        (
-            InvalidQueryStringParameterError("Invalid name provided"),
-            http.HTTPStatus.BAD_REQUEST,
-        ),
-        (
-            MissingRequiredQueryStringParameterError("'name' query string parameter is required"),
-            http.HTTPStatus.BAD_REQUEST,
-        ),
-        (
-            Exception("An error occurred processing your request."),
-            http.HTTPStatus.INTERNAL_SERVER_ERROR,
-        ),
+        ({"queryStringParameters": {}}, REQUIRED_NAME_ERROR),
+        ({"queryStringParameters": None}, REQUIRED_NAME_ERROR),
+        ({"queryStringParameters": {"name": ""}}, INVALID_NAME_ERROR),
+        ({"queryStringParameters": {"name": None}}, INVALID_NAME_ERROR),
+        ({"queryStringParameters": {"name": "  "}}, INVALID_NAME_ERROR),
     ],
 )
-def test_handle_exception(mock_env, exception, status):
-    """Handle exception correctly logs and returns response for given exception."""
+def test_lambda_handler_error_response(event, expected_message, mock_context):
+    """Lambda handler returns error response when given invalid event."""
+    response = lambda_handler(event, mock_context)
+
+    assert response["statusCode"] == http.HTTPStatus.BAD_REQUEST
+    assert json.loads(response["body"]) == {"error": expected_message}
+
+
+@pytest.mark.unit
+def test_lambda_handler_batch(mock_context):
+    """Lambda handler greets every valid name of a batch and reports invalid ones."""
+    event = {"httpMethod": "POST", "resource": "/hello/batch", "body": '["Test", " ", "Zoë"]'}
+    response = lambda_handler(event, mock_context)
+
+    assert response["statusCode"] == http.HTTPStatus.OK
+    assert json.loads(response["body"]) == {
+        "results": [
+            {"message": "Hello, Test!"},
+            {"error": INVALID_NAME_ERROR},
+            {"message": "Hello, Zoë!"},
+        ]
+    }
 
-    expected_response = generate_response({"error": str(exception)}, status)
 
-    with patch.object(logger, "error") as mock_log:
-        response = handle_exception(exception)
-        mock_log.assert_called_with({"error": str(exception), "trace": traceback.format_exc()})
-        assert response == expected_response
+@pytest.mark.unit
+@pytest.mark.parametrize("body", [None, "Test", '{"name": "Test"}'])
+def test_lambda_handler_batch_invalid_body(body, mock_context):
+    """Lambda handler rejects batch bodies that are not a JSON array of names."""
+    event = {"httpMethod": "POST", "resource": "/hello/batch", "body": body}
+    response = lambda_handler(event, mock_context)
+
+    assert response["statusCode"] == http.HTTPStatus.BAD_REQUEST
+    assert json.loads(response["body"]) == {"error": INVALID_BODY_ERROR}
+
+
+@pytest.mark.unit
+def test_routes_warmed_at_import(mock_context):
+    """The routes run once during the init phase, warmer events reach none of them."""
+    assert f"{warm_routes.__module__}.warm_routes" in warmup.timings
+    with patch(f"{pipeline_module}.generate_response") as mock_generate:
+        assert lambda_handler({"warmer": True}, mock_context) == WARMER_RESPONSE
+    mock_generate.assert_not_called()
@@ -0,0 +1,245 @@
+import asyncio
+import http
+import json
+import socket
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from utils.aio import AsyncRunner
+from utils.errors import (
+    DOWNSTREAM_TIMEOUT_ERROR,
+    DOWNSTREAM_UNAVAILABLE_ERROR,
+    ForbiddenError,
+    GatewayTimeoutError,
+    ServiceUnavailableError,
+)
+from utils.pipeline import Pipeline
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers `{"path": ...}` after the number of seconds given by the `delay` parameter."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        time.sleep(float(parse_qs(url.query).get("delay", ["0"])[0]))
+        payload = json.dumps({"path": url.path}).encode()
+        self.send_response(http.HTTPStatus.OK)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def stub_server():
+    """Local downstream service, as host and port."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture
+def closed_port():
+    """A local port nothing listens on."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def runner():
+    runner = AsyncRunner(margin_ms=100)
+    yield runner
+    runner.loop.close()
+
+
+async def get_json(address, path):
+    """Minimal asyncio HTTP client for the stub server."""
+    reader, writer = await asyncio.open_connection(*address)
+    try:
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: stub\r\nConnection: close\r\n\r\n".encode())
+        response = await reader.read()
+        return json.loads(response.split(b"\r\n\r\n", 1)[1])
+    finally:
+        writer.close()
+
+
+def context(remaining_ms):
+    return SimpleNamespace(get_remaining_time_in_millis=lambda: remaining_ms)
+
+
+@pytest.mark.unit
+def test_runner_reuses_event_loop(runner):
+    """Warm invocations run on the loop created by the first one."""
+
+    async def current_loop():
+        return asyncio.get_running_loop()
+
+    loop = runner.run(current_loop())
+    assert runner.run(current_loop()) is loop is runner.loop
+    loop.close()
+    assert runner.run(current_loop()) is not loop
+
+
+@pytest.mark.unit
+def test_runner_deadline_from_context():
+    """The deadline keeps the margin of the invocation's remaining time."""
+    runner = AsyncRunner(margin_ms=200, clock=lambda: 10.0)
+    runner.start(context(3000))
+    assert runner.remaining() == pytest.approx(2.8)
+    assert runner.timeout() == pytest.approx(2.8)
+    assert runner.timeout(1.0) == 1.0
+
+    runner.start(object())
+    assert runner.remaining() is None
+    assert runner.timeout(1.0) == 1.0
+
+
+@pytest.mark.unit
+def test_fan_out_runs_calls_concurrently(runner, stub_server):
+    """Downstream calls wait on each other's latency only once."""
+    runner.start(context(3000))
+
+    started = time.monotonic()
+    results = runner.run(
+        runner.fan_out(*(get_json(stub_server, f"/{i}?delay=0.2") for i in range(5)))
+    )
+
+    assert results == [{"path": f"/{i}"} for i in range(5)]
+    assert time.monotonic() - started < 0.8
+
+
+@pytest.mark.unit
+def test_call_timeout_raises_gateway_timeout(runner, stub_server):
+    """A call slower than its timeout is answered with a 504 error."""
+    runner.start(context(3000))
+    with pytest.raises(GatewayTimeoutError) as e:
+        runner.run(runner.call(get_json(stub_server, "/slow?delay=0.5"), timeout=0.05))
+    assert str(e.value) == DOWNSTREAM_TIMEOUT_ERROR
+
+
+@pytest.mark.unit
+def test_call_bounded_by_invocation_deadline(runner, stub_server):
+    """Calls without a timeout of their own stop at the invocation's deadline."""
+    runner.start(context(300))
+
+    started = time.monotonic()
+    with pytest.raises(GatewayTimeoutError):
+        runner.run(runner.call(get_json(stub_server, "/slow?delay=1")))
+    assert time.monotonic() - started < 0.5
+
+
+@pytest.mark.unit
+def test_call_after_deadline_raises_gateway_timeout(runner, stub_server):
+    """Once the deadline has passed, calls fail right away."""
+    runner.start(context(50))
+    with pytest.raises(GatewayTimeoutError):
+        runner.run(get_json(stub_server, "/"))
+
+
+@pytest.mark.unit
+def test_unreachable_service_raises_service_unavailable(runner, closed_port):
+    """A refused connection is answered with a 503 error."""
+    runner.start(context(3000))
+    with pytest.raises(ServiceUnavailableError) as e:
+        runner.run(runner.call(get_json(("127.0.0.1", closed_port), "/")))
+    assert str(e.value) == DOWNSTREAM_UNAVAILABLE_ERROR
+
+
+@pytest.mark.unit
+def test_layer_errors_pass_through(runner):
+    async def forbidden():
+        raise ForbiddenError("Forbidden name")
+
+    with pytest.raises(ForbiddenError):
+        runner.run(runner.call(forbidden()))
+
+
+@pytest.mark.unit
+def test_fan_out_cancels_calls_after_a_failure(runner, stub_server, closed_port):
+    """The first failure is raised without waiting for the other calls."""
+    runner.start(context(3000))
+    cancelled = []
+
+    async def slow():
+        try:
+            return await get_json(stub_server, "/slow?delay=1")
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    started = time.monotonic()
+    with pytest.raises(ServiceUnavailableError):
+        runner.run(runner.fan_out(slow(), get_json(("127.0.0.1", closed_port), "/")))
+    assert time.monotonic() - started < 0.5
+    assert cancelled == [True]
+
+
+@pytest.mark.unit
+def test_call_blocking(runner, stub_server, closed_port):
+    """Blocking clients run in the thread pool and get the same deadlines and errors."""
+    runner.start(context(3000))
+    url = "http://{}:{}".format(*stub_server)
+
+    def get(url):
+        with urllib.request.urlopen(url, timeout=2) as response:
+            return json.loads(response.read())
+
+    results = runner.run(
+        runner.fan_out(
+            runner.call_blocking(get, f"{url}/a?delay=0.2"),
+            runner.call_blocking(get, f"{url}/b?delay=0.2"),
+        )
+    )
+    assert results == [{"path": "/a"}, {"path": "/b"}]
+    with pytest.raises(GatewayTimeoutError):
+        runner.run(runner.call_blocking(get, f"{url}/slow?delay=0.5", timeout=0.05))
+    with pytest.raises(ServiceUnavailableError):
+        runner.run(runner.call_blocking(get, f"http://127.0.0.1:{closed_port}/"))
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "delay, status, body",
+    [
+        (0, http.HTTPStatus.OK, {"message": "Hello, John!", "paths": ["/a", "/b"]}),
+        (1, http.HTTPStatus.GATEWAY_TIMEOUT, {"error": DOWNSTREAM_TIMEOUT_ERROR}),
+        (None, http.HTTPStatus.SERVICE_UNAVAILABLE, {"error": DOWNSTREAM_UNAVAILABLE_ERROR}),
+    ],
+    ids=["ok", "timeout", "unavailable"],
+)
+def test_pipeline_with_async_producer(runner, stub_server, closed_port, delay, status, body):
+    """Async producers answer through the pipeline, downstream failures as 504 and 503."""
+    pipeline = Pipeline()
+    address = stub_server if delay is not None else ("127.0.0.1", closed_port)
+
+    @pipeline.route("GET", "/hello")
+    @runner.producer
+    async def greet(name):
+        results = await runner.fan_out(
+            get_json(address, f"/a?delay={delay}"), get_json(address, f"/b?delay={delay}")
+        )
+        return {"message": f"Hello, {name}!", "paths": [result["path"] for result in results]}
+
+    handler = runner.handler(pipeline)
+    event = {"httpMethod": "GET", "resource": "/hello", "queryStringParameters": {"name": "John"}}
+    response = handler(event, SimpleNamespace(aws_request_id="id", **vars(context(400))))
+
+    assert response["statusCode"] == status
+    assert json.loads(response["body"]) == body
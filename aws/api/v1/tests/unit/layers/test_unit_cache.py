@@ -0,0 +1,152 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from utils.cache import BodyCache
+from utils.metrics import Metrics
+from utils.pipeline import CACHE_HIT_METRIC, CACHE_MISS_METRIC, Pipeline
+
+BODY = '{"message":"Hello, John!"}'
+
+
+@pytest.mark.unit
+def test_hits_and_misses_are_counted():
+    cache = BodyCache(max_entries=10)
+    assert cache.get("john") is None
+    cache.put("john", BODY)
+    assert cache.get("john") == BODY
+    assert cache.get("john") == BODY
+    assert cache.stats() == {
+        "hits": 2,
+        "misses": 1,
+        "evictions": 0,
+        "hitRate": 2 / 3,
+        "entries": 1,
+        "bytes": sys.getsizeof(BODY),
+    }
+
+
+@pytest.mark.unit
+def test_least_recently_used_entry_is_evicted():
+    cache = BodyCache(max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.get("a")
+    cache.put("c", "3")
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("1", "3")
+    assert cache.evictions == 1
+
+
+@pytest.mark.unit
+def test_byte_cap_is_enforced():
+    """Entries are evicted until the stored bodies fit, oversized bodies are not stored."""
+    size = sys.getsizeof("x" * 100)
+    cache = BodyCache(max_entries=100, max_bytes=2 * size)
+    for key in "abc":
+        cache.put(key, key * 100)
+    assert len(cache) == 2
+    assert cache.size_bytes <= cache.max_bytes
+    assert cache.get("a") is None
+
+    cache.put("large", "x" * 1000)
+    assert cache.get("large") is None
+    assert len(cache) == 2
+
+
+@pytest.mark.unit
+def test_replacing_an_entry_keeps_the_size_right():
+    cache = BodyCache(max_entries=10)
+    cache.put("a", "1" * 10)
+    cache.put("a", "2")
+    assert cache.size_bytes == sys.getsizeof("2")
+    cache.clear()
+    assert (len(cache), cache.size_bytes) == (0, 0)
+
+
+@pytest.mark.unit
+def test_disabled_cache_stores_nothing():
+    cache = BodyCache()
+    cache.put("a", BODY)
+    assert not cache.enabled
+    assert cache.get("a") is None
+
+
+@pytest.mark.unit
+def test_from_env(monkeypatch):
+    monkeypatch.setenv("RESPONSE_CACHE_MAX_ENTRIES", "5")
+    monkeypatch.setenv("RESPONSE_CACHE_MAX_BYTES", "2048")
+    cache = BodyCache.from_env()
+    assert (cache.max_entries, cache.max_bytes, cache.enabled) == (5, 2048, True)
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def pipeline(calls):
+    """Pipeline with a cached GET /hello route and an uncached GET /goodbye route."""
+    pipeline = Pipeline(recorder=Metrics(enabled=False), cache=BodyCache(max_entries=10))
+
+    @pipeline.route("GET", "/hello", cached=True)
+    def hello(name):
+        calls.append(name)
+        return {"message": f"Hello, {name}!"}
+
+    @pipeline.route("GET", "/goodbye")
+    def goodbye(name):
+        calls.append(name)
+        return {"message": f"Goodbye, {name}!"}
+
+    return pipeline
+
+
+def event(resource, name=None):
+    query = {"name": name} if name is not None else None
+    return {"httpMethod": "GET", "resource": resource, "queryStringParameters": query}
+
+
+CONTEXT = SimpleNamespace(aws_request_id="request-id")
+
+
+@pytest.mark.unit
+def test_pipeline_serves_repeated_names_from_cache(pipeline, calls):
+    """The producer and the serializer only run on the first request for a name."""
+    first = pipeline(event("/hello", "John"), CONTEXT)
+    second = pipeline(event("/hello", "John"), CONTEXT)
+    pipeline(event("/hello", "Jane"), CONTEXT)
+
+    assert first == second
+    assert calls == ["John", "Jane"]
+    assert pipeline.cache.stats()["hits"] == 1
+
+
+@pytest.mark.unit
+def test_pipeline_cache_is_opt_in(pipeline, calls):
+    for _ in range(2):
+        pipeline(event("/goodbye", "John"), CONTEXT)
+    assert calls == ["John", "John"]
+    assert len(pipeline.cache) == 0
+
+
+@pytest.mark.unit
+def test_pipeline_does_not_cache_errors(pipeline, calls):
+    for _ in range(2):
+        response = pipeline(event("/hello"), CONTEXT)
+        assert response["statusCode"] == 400
+    assert len(pipeline.cache) == 0
+
+
+@pytest.mark.unit
+def test_pipeline_counts_cache_lookups(pipeline):
+    stream = []
+    pipeline.metrics = Metrics(stream=SimpleNamespace(write=stream.append, flush=lambda: None))
+    pipeline(event("/hello", "John"), CONTEXT)
+    pipeline(event("/hello", "John"), CONTEXT)
+
+    assert CACHE_MISS_METRIC in stream[0] and CACHE_HIT_METRIC not in stream[0]
+    assert CACHE_HIT_METRIC in stream[1] and CACHE_MISS_METRIC not in stream[1]
@@ -0,0 +1,132 @@
+import http
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utils.clients import ClientRegistry, keepalive_socket_options
+
+pytest.importorskip("boto3")
+
+LIST_BUCKETS = b"<ListAllMyBucketsResult><Buckets></Buckets></ListAllMyBucketsResult>"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Keep-alive server answering every request with an empty S3 bucket list."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes, Nagle would hold the body for the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(http.HTTPStatus.OK)
+        self.send_header("Content-Type", "application/xml")
+        self.send_header("Content-Length", str(len(LIST_BUCKETS)))
+        self.end_headers()
+        self.wfile.write(LIST_BUCKETS)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def stub_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield "http://{}:{}".format(*server.server_address)
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "eu-west-1")
+    registry = ClientRegistry(max_pool_connections=2)
+    yield registry
+    registry.clear()
+
+
+@pytest.mark.unit
+def test_client_created_once(registry):
+    """Clients are kept by service, region and endpoint."""
+    s3 = registry.client("s3")
+
+    assert registry.client("s3") is s3
+    assert registry.client("s3", "us-east-1") is not s3
+    assert registry.client("dynamodb") is not s3
+
+
+@pytest.mark.unit
+def test_client_config(registry):
+    config = registry.client("s3").meta.config
+
+    assert config.max_pool_connections == 2
+    assert config.connect_timeout == 1.0
+    assert config.read_timeout == 2.0
+    assert config.retries == {"total_max_attempts": 2, "mode": "standard"}
+    assert config.tcp_keepalive is True
+
+
+@pytest.mark.unit
+def test_client_reuses_connections(registry, stub_url):
+    """Calls after the first one go through the connection it opened."""
+    s3 = registry.client("s3", endpoint_url=stub_url)
+    for _ in range(3):
+        assert s3.list_buckets()["Buckets"] == []
+
+    (pool,) = registry.stats()[f"s3:{stub_url}"]
+    assert pool["connectionsOpened"] == 1
+    assert pool["requests"] == 3
+    assert pool["inUse"] == 0
+    assert pool["idle"] == 1
+
+
+@pytest.mark.unit
+def test_http_pool(registry, stub_url):
+    """HTTP pool managers keep connections alive, with TCP keepalive probes."""
+    manager = registry.http()
+    assert registry.http() is manager
+    assert registry.http("other") is not manager
+    assert (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1) in keepalive_socket_options()
+    options = keepalive_socket_options()
+    socket_options = manager.connection_pool_kw["socket_options"]
+    keepalive_start = len(socket_options) - len(options)
+    assert socket_options[keepalive_start:] == options
+
+    for _ in range(3):
+        assert manager.request("GET", f"{stub_url}/").data == LIST_BUCKETS
+    (pool,) = registry.stats()["http:default"]
+    assert (pool["connectionsOpened"], pool["requests"], pool["inUse"]) == (1, 3, 0)
+
+
+@pytest.mark.unit
+def test_http_pool_saturation(registry, stub_url):
+    """Responses not released yet hold their connection, a full pool is saturated."""
+    manager = registry.http()
+    responses = [manager.request("GET", f"{stub_url}/", preload_content=False) for _ in range(2)]
+
+    (pool,) = registry.stats()["http:default"]
+    assert (pool["maxsize"], pool["inUse"], pool["saturation"]) == (2, 2, 1.0)
+
+    for response in responses:
+        response.read()
+        response.release_conn()
+    (pool,) = registry.stats()["http:default"]
+    assert (pool["inUse"], pool["idle"], pool["saturation"]) == (0, 2, 0.0)
+
+
+@pytest.mark.unit
+def test_clear(registry, stub_url):
+    """Clearing the registry closes its connections and forgets its clients."""
+    s3 = registry.client("s3")
+    registry.http().request("GET", f"{stub_url}/")
+
+    registry.clear()
+    assert registry.stats() == {}
+    assert registry.client("s3") is not s3
@@ -0,0 +1,134 @@
+import http
+import io
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from utils.conformance import CHECK_PHASE, RESPONSE_VIOLATION_LOG, VIOLATION_METRIC, ResponseChecker
+from utils.logging import StructuredLogger
+from utils.metrics import Metrics
+from utils.pipeline import Pipeline
+from utils.validators import RESPONSES, validate_get_hello
+
+HELLO = ("GET", "/hello")
+
+
+def response(body, status_code=http.HTTPStatus.OK):
+    return {"statusCode": status_code, "headers": {}, "body": json.dumps(body)}
+
+
+@pytest.fixture
+def stream():
+    """Route the container-wide logger to an in-memory stream."""
+    stream = io.StringIO()
+    with patch("utils.conformance.logger", StructuredLogger(stream=stream)) as logger:
+        yield stream, logger
+
+
+def read_records(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+@pytest.mark.unit
+def test_checkers_cover_the_spec_responses():
+    """Responses of the hello, goodbye and error schemas have compiled checkers."""
+    assert RESPONSES[("GET", "/hello", 200)].__name__ == "check_hello_response"
+    assert RESPONSES[("GET", "/goodbye", 200)].__name__ == "check_goodbye_response"
+    assert RESPONSES[("GET", "/hello", 400)].__name__ == "check_error"
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("sample_rate, expected", [(0.0, 0), (0.25, 25), (0.5, 50), (1.0, 100)])
+def test_sampling_is_evenly_spread(sample_rate, expected):
+    """Exactly `sample_rate` of the responses are checked."""
+    checker = ResponseChecker(sample_rate)
+    for _ in range(100):
+        checker.check(HELLO, response({"message": "Hello John!"}))
+    assert checker.checked == expected
+    assert checker.violations == 0
+
+
+@pytest.mark.unit
+def test_disabled_checker_does_not_parse():
+    """Unsampled responses are not parsed at all."""
+    json_serializer = MagicMock()
+    checker = ResponseChecker(0.0, json_serializer=json_serializer)
+    assert checker.check(HELLO, response({})) is None
+    json_serializer.loads.assert_not_called()
+
+
+@pytest.mark.unit
+def test_routes_without_schema_are_not_checked():
+    checker = ResponseChecker(1.0)
+    assert checker.check(("GET", "/unknown"), response({})) is None
+    assert checker.check(HELLO, response({}, http.HTTPStatus.CREATED)) is None
+    assert checker.checked == 0
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "key, body, status_code, violation",
+    [
+        (HELLO, {"greeting": "Hi"}, http.HTTPStatus.OK, "$.message: required"),
+        (("GET", "/goodbye"), {"message": 1}, http.HTTPStatus.OK, "$.message: expected string"),
+        (HELLO, {"message": "Bad"}, http.HTTPStatus.BAD_REQUEST, "$.error: required"),
+    ],
+)
+def test_violation_is_logged_and_counted(stream, key, body, status_code, violation):
+    """Violations are logged and counted in the metrics of the invocation."""
+    output, logger = stream
+    recorder = Metrics(stream=io.StringIO())
+    recorder.start()
+    checker = ResponseChecker(1.0, recorder=recorder)
+    assert checker.check(key, response(body, status_code)) == violation
+    logger.flush()
+
+    [record] = read_records(output)
+    assert record["message"] == RESPONSE_VIOLATION_LOG
+    assert record["route"] == f"{key[0]} {key[1]}"
+    assert record["violation"] == violation
+    assert checker.violations == 1
+
+    line = json.loads(recorder.format())
+    assert line[VIOLATION_METRIC] == 1
+    assert line[f"{CHECK_PHASE}Time"] >= 0
+
+
+@pytest.mark.unit
+def test_unparsable_body_is_a_violation(stream):
+    checker = ResponseChecker(1.0, recorder=Metrics(enabled=False))
+    violation = checker.check(HELLO, {"statusCode": 200, "headers": {}, "body": "{"})
+    assert violation.startswith("$: ")
+    assert checker.violations == 1
+
+
+@pytest.mark.unit
+def test_check_time_is_measured():
+    clock = MagicMock(side_effect=[1_000, 4_000])
+    checker = ResponseChecker(1.0, clock=clock, recorder=Metrics(enabled=False))
+    checker.check(HELLO, response({"message": "Hello John!"}))
+    assert checker.check_ns == 3_000
+    assert checker.mean_check_us == 3.0
+
+
+@pytest.mark.unit
+def test_pipeline_checks_sampled_responses(stream):
+    """The pipeline checks both successful and error responses, by the route they took."""
+    recorder = Metrics(enabled=False)
+    checker = ResponseChecker(1.0, recorder=recorder)
+    pipeline = Pipeline(checker, recorder)
+
+    @pipeline.route("GET", "/hello", validator=validate_get_hello)
+    def hello(name):
+        return {"greeting": name}
+
+    pipeline({"queryStringParameters": {"name": "John"}}, MagicMock())
+    pipeline({"httpMethod": "GET", "resource": "/hello"}, MagicMock())
+
+    assert checker.checked == 2
+    assert checker.violations == 1
+    output, logger = stream
+    logger.flush()
+    [record] = [r for r in read_records(output) if r["message"] == RESPONSE_VIOLATION_LOG]
+    assert record["violation"] == "$.message: required"
@@ -0,0 +1,234 @@
+import io
+import json
+import logging
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from utils.errors import BadRequestError, InternalServerError
+from utils.logging import REDACTED, StructuredLogger, TraceLimiter, summarize_event, truncate
+
+
+@pytest.fixture
+def stream():
+    """Creates an in-memory output stream."""
+    return io.StringIO()
+
+
+def read_records(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("abcd", "abcd"),
+        ("x" * 10, "xxxx...[6 more chars]"),
+        (12345678, 12345678),
+    ],
+)
+def test_truncate(value, expected):
+    """Truncate shortens long strings only."""
+    assert truncate(value, 4) == expected
+
+
+@pytest.mark.unit
+def test_summarize_event():
+    """Event summary keeps routing fields, redacts credentials and truncates large values."""
+    event = {
+        "httpMethod": "GET",
+        "resource": "/hello",
+        "path": "/hello",
+        "queryStringParameters": {"name": "n" * 20},
+        "headers": {"Authorization": "secret", "Accept": "application/json"},
+        "body": "b" * 20,
+        "requestContext": {"identity": {"sourceIp": "127.0.0.1"}, "accountId": "123"},
+        "stageVariables": {"large": "ignored"},
+    }
+    assert summarize_event(event, max_length=8) == {
+        "httpMethod": "GET",
+        "resource": "/hello",
+        "path": "/hello",
+        "queryStringParameters": {"name": "nnnnnnnn...[12 more chars]"},
+        "headers": {"Authorization": REDACTED, "Accept": "applicat...[8 more chars]"},
+        "body": "bbbbbbbb...[12 more chars]",
+        "sourceIp": "127.0.0.1",
+    }
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "request_context",
+    [None, {}, {"identity": None}, {"identity": {"sourceIp": None}}],
+    ids=["null-context", "no-identity", "null-identity", "null-ip"],
+)
+def test_summarize_event_without_source_ip(request_context):
+    """Events of test invocations and proxies may carry no identity at all."""
+    event = {"httpMethod": "GET", "requestContext": request_context}
+    assert summarize_event(event) == {"httpMethod": "GET"}
+
+
+@pytest.mark.unit
+def test_disabled_level_skips_formatting(stream):
+    """Records below the enabled level are neither buffered nor formatted."""
+    formatter = MagicMock()
+    logger = StructuredLogger(stream=stream, field_formatters={"event": formatter})
+
+    logger.debug("debug", event={"body": "large"})
+    logger.flush()
+
+    formatter.assert_not_called()
+    assert stream.getvalue() == ""
+
+
+@pytest.mark.unit
+def test_records_are_formatted_on_flush(stream):
+    """Enabled records are only formatted when flushed."""
+    formatter = MagicMock(return_value={"summary": True})
+    logger = StructuredLogger(stream=stream, field_formatters={"event": formatter})
+    logger.bind("request-1")
+
+    logger.info("started", event={"body": "large"})
+    formatter.assert_not_called()
+    logger.flush()
+
+    formatter.assert_called_once_with({"body": "large"})
+    [record] = read_records(stream)
+    assert record["level"] == "INFO"
+    assert record["message"] == "started"
+    assert record["requestId"] == "request-1"
+    assert record["event"] == {"summary": True}
+
+
+@pytest.mark.unit
+def test_records_are_written_in_batches(stream):
+    """Records are written once the batch is full and the remainder on flush."""
+    logger = StructuredLogger(batch_size=2, stream=stream)
+
+    logger.info("first")
+    assert stream.getvalue() == ""
+    logger.info("second")
+    assert [r["message"] for r in read_records(stream)] == ["first", "second"]
+
+    logger.warning("third")
+    logger.flush()
+    assert [r["message"] for r in read_records(stream)] == ["first", "second", "third"]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("request_id", ["request-1", "request-2", "request-3"])
+@pytest.mark.parametrize("rate, expected", [(0.0, False), (1.0, True)])
+def test_debug_sampling(request_id, rate, expected):
+    """Debug records are enabled for sampled requests only."""
+    logger = StructuredLogger(debug_sample_rate=rate)
+    logger.bind(request_id)
+    assert logger.is_enabled_for(logging.DEBUG) is expected
+    assert logger.is_enabled_for(logging.INFO)
+
+
+@pytest.mark.unit
+def test_debug_sampling_is_stable_per_request():
+    """The sampling decision only depends on the request id."""
+    logger = StructuredLogger(debug_sample_rate=0.5)
+    decisions = {}
+    for request_id in [f"request-{i}" for i in range(200)] * 2:
+        logger.bind(request_id)
+        decisions.setdefault(request_id, set()).add(logger.is_enabled_for(logging.DEBUG))
+
+    assert all(len(decision) == 1 for decision in decisions.values())
+    assert 0 < sum(decision == {True} for decision in decisions.values()) < 200
+
+
+@pytest.mark.unit
+def test_from_env():
+    """Logger configuration is read from the environment."""
+    env = {"LOG_LEVEL": "warning", "LOG_BATCH_SIZE": "5", "LOG_DEBUG_SAMPLE_RATE": "0.1"}
+    with patch.dict(os.environ, env):
+        logger = StructuredLogger.from_env()
+    assert logger.level == logging.WARNING
+    assert logger.batch_size == 5
+    assert logger.debug_sample_rate == 0.1
+
+
+def raise_error(error):
+    try:
+        raise error
+    except Exception as e:
+        return e
+
+
+@pytest.mark.unit
+def test_exception_with_traceback(stream):
+    """Exception records include the traceback when requested."""
+    logger = StructuredLogger(stream=stream)
+
+    logger.exception("failed", raise_error(InternalServerError("boom")))
+    logger.flush()
+
+    [record] = read_records(stream)
+    assert record["level"] == "ERROR"
+    assert record["error"] == "boom"
+    assert record["errorType"] == "InternalServerError"
+    assert "Traceback (most recent call last)" in record["trace"]
+
+
+@pytest.mark.unit
+def test_exception_without_traceback(stream):
+    """Client errors produce a single-line record without formatting the traceback."""
+    logger = StructuredLogger(stream=stream)
+    error = raise_error(BadRequestError("bad"))
+
+    with patch("traceback.format_exception") as mock_format:
+        logger.exception("failed", error, error.log_level, error.log_traceback)
+    logger.flush()
+
+    mock_format.assert_not_called()
+    [line] = stream.getvalue().splitlines()
+    record = json.loads(line)
+    assert record["level"] == "INFO"
+    assert "trace" not in record
+
+
+@pytest.mark.unit
+def test_exception_below_level_is_skipped(stream):
+    """Exception records below the enabled level are dropped."""
+    logger = StructuredLogger(level=logging.WARNING, stream=stream)
+
+    logger.exception("failed", raise_error(BadRequestError("bad")), logging.INFO, False)
+    logger.flush()
+
+    assert stream.getvalue() == ""
+
+
+@pytest.mark.unit
+def test_trace_limiter_caps_identical_traces():
+    """Identical traces are capped per window and suppressed ones reported in the next window."""
+    now = [0.0]
+    limiter = TraceLimiter(limit=2, window=10, clock=lambda: now[0])
+
+    def same_error():
+        return raise_error(InternalServerError("boom"))
+
+    assert [limiter.allow(same_error()) for _ in range(4)] == [
+        (True, 0),
+        (True, 0),
+        (False, 0),
+        (False, 0),
+    ]
+    assert limiter.allow(raise_error(InternalServerError("other"))) == (True, 0)
+
+    now[0] = 10.0
+    assert limiter.allow(same_error()) == (True, 2)
+
+
+@pytest.mark.unit
+def test_trace_limiter_bounds_tracked_keys():
+    """Only the most recent distinct exceptions are tracked."""
+    limiter = TraceLimiter(limit=1, max_keys=2)
+    for message in ["a", "b", "c"]:
+        limiter.allow(raise_error(InternalServerError(message)))
+
+    assert len(limiter._windows) == 2
+    assert limiter.allow(raise_error(InternalServerError("a"))) == (True, 0)
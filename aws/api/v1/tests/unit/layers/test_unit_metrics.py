@@ -0,0 +1,149 @@
+import io
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from utils.errors import MissingRequiredQueryStringParameterError, NotFoundError
+from utils.metrics import (
+    COLD_START_METRIC,
+    INVOCATION_TIME_METRIC,
+    PRODUCE_PHASE,
+    SERIALIZE_PHASE,
+    VALIDATE_PHASE,
+    Metrics,
+)
+from utils.pipeline import Pipeline
+from utils.validators import validate_get_hello
+
+
+@pytest.fixture
+def stream():
+    """Creates an in-memory output stream."""
+    return io.StringIO()
+
+
+def read_lines(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def clock(*values):
+    """Clock returning the given nanosecond values, in order."""
+    return MagicMock(side_effect=values)
+
+
+@pytest.mark.unit
+def test_metrics_are_written_once_per_flush(stream):
+    """Timings and counts are aggregated and written as one EMF line."""
+    metrics = Metrics(stream=stream, clock=clock(0, 1_000_000, 3_000_000, 10_000_000))
+    metrics.start("request-1")
+    metrics.add_time(VALIDATE_PHASE, 0)
+    metrics.add_time(VALIDATE_PHASE, 2_000_000)
+    metrics.add_elapsed(VALIDATE_PHASE, 1_000_000)
+    metrics.count("Things", 2)
+    metrics.count("Things")
+    metrics.count_error(NotFoundError)
+    assert stream.getvalue() == ""
+
+    metrics.route = "GET /hello"
+    metrics.flush()
+    [line] = read_lines(stream)
+    assert line["route"] == "GET /hello"
+    assert line["requestId"] == "request-1"
+    assert line[COLD_START_METRIC] == 1
+    assert line[INVOCATION_TIME_METRIC] == 10.0
+    assert line[f"{VALIDATE_PHASE}Time"] == 3.0
+    assert line["Things"] == 3
+    assert line["Errors.NotFoundError"] == 1
+
+    [directive] = line["_aws"]["CloudWatchMetrics"]
+    assert directive["Dimensions"] == [["route"]]
+    names = {metric["Name"] for metric in directive["Metrics"]}
+    assert names == set(line) - {"_aws", "route", "requestId"}
+
+
+@pytest.mark.unit
+def test_only_the_first_invocation_is_a_cold_start(stream):
+    metrics = Metrics(stream=stream)
+    for request_id in ("first", "second"):
+        metrics.start(request_id)
+        metrics.flush()
+
+    first, second = read_lines(stream)
+    assert (first[COLD_START_METRIC], second[COLD_START_METRIC]) == (1, 0)
+    assert "Errors.NotFoundError" not in second
+
+
+@pytest.mark.unit
+def test_disabled_metrics_write_nothing(stream):
+    metrics = Metrics(enabled=False, stream=stream)
+    metrics.start()
+    metrics.count("Things")
+    metrics.flush()
+    assert stream.getvalue() == ""
+    assert not metrics.cold_start
+
+
+@pytest.mark.unit
+def test_from_env(monkeypatch):
+    monkeypatch.setenv("METRICS_NAMESPACE", "Custom")
+    monkeypatch.setenv("METRICS_ENABLED", "false")
+    metrics = Metrics.from_env()
+    assert (metrics.namespace, metrics.enabled) == ("Custom", False)
+
+
+@pytest.fixture
+def pipeline(stream):
+    pipeline = Pipeline(recorder=Metrics(stream=stream))
+
+    @pipeline.route("GET", "/hello", validator=validate_get_hello)
+    def hello(name):
+        return {"message": name}
+
+    return pipeline
+
+
+@pytest.mark.unit
+def test_pipeline_times_phases(pipeline, stream):
+    """A successful invocation times every phase and counts no error."""
+    event = {"httpMethod": "GET", "resource": "/hello", "queryStringParameters": {"name": "a"}}
+    pipeline(event, None)
+
+    [line] = read_lines(stream)
+    assert line["route"] == "GET /hello"
+    for phase in (VALIDATE_PHASE, PRODUCE_PHASE, SERIALIZE_PHASE):
+        assert line[f"{phase}Time"] >= 0
+    assert not [name for name in line if name.startswith("Errors.")]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "event, route, error_class",
+    [
+        (
+            {"httpMethod": "GET", "resource": "/hello"},
+            "GET /hello",
+            MissingRequiredQueryStringParameterError,
+        ),
+        ({"httpMethod": "GET", "resource": "/unknown"}, "unrouted", NotFoundError),
+    ],
+)
+def test_pipeline_counts_errors_by_class(pipeline, stream, event, route, error_class):
+    """Errors are counted by class, unknown paths do not become a dimension value."""
+    pipeline(event, None)
+
+    [line] = read_lines(stream)
+    assert line["route"] == route
+    assert line[f"Errors.{error_class.__name__}"] == 1
+    assert line["ExceptionTime"] >= 0
+
+
+@pytest.mark.unit
+def test_pipeline_counts_unexpected_errors_as_internal(pipeline, stream):
+    pipeline.default_route = pipeline.default_route._replace(
+        produce=MagicMock(side_effect=RuntimeError("boom"))
+    )
+    pipeline({"queryStringParameters": {"name": "a"}}, None)
+
+    [line] = read_lines(stream)
+    assert line["Errors.InternalServerError"] == 1
@@ -0,0 +1,398 @@
+import http
+import io
+import json
+import logging
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from utils.errors import (
+    INVALID_BODY_ERROR,
+    INVALID_NAME_ERROR,
+    ROUTE_NOT_FOUND_ERROR,
+    ForbiddenError,
+    InternalServerError,
+    InvalidQueryStringParameterError,
+    InvalidRequestBodyError,
+    MissingRequiredQueryStringParameterError,
+    ServiceUnavailableError,
+)
+from utils.logging import EXCEPTION_LOG
+from utils.metrics import Metrics
+from utils.pipeline import (
+    STREAM_ERROR_METRIC,
+    Pipeline,
+    generate_batch_response,
+    generate_response,
+    handle_exception,
+    logger,
+    validate_batch,
+)
+from utils.responses import ErrorResponseCache, ResponseBuilder, compute_etag
+from utils.validators import validate_get_hello
+
+
+@pytest.fixture
+def mock_response_builder():
+    """Replace the container-wide response builders with ones for a known docs domain."""
+    builder = ResponseBuilder("example.com")
+    with patch("utils.pipeline.response_builder", builder), patch(
+        "utils.pipeline.error_responses", ErrorResponseCache(builder)
+    ):
+        yield
+
+
+@pytest.fixture
+def mock_context():
+    """Creates a mock context object."""
+    return MagicMock()
+
+
+@pytest.fixture
+def pipeline():
+    """Creates a pipeline with a GET /echo route and a POST /echo route."""
+    pipeline = Pipeline()
+
+    @pipeline.route("GET", "/echo", validator=validate_get_hello)
+    def echo(name):
+        return {"message": name}
+
+    @pipeline.route("post", "/echo", validator=lambda event: {"name": event["body"]})
+    def echo_body(name):
+        return {"body": name}
+
+    return pipeline
+
+
+@pytest.mark.unit
+def test_validate_batch():
+    """Validate batch parses the names and checks them all with the single-name rules."""
+    event = {"body": json.dumps(["Test", "", " ", None, 3, "Zoë"])}
+    assert validate_batch(event) == {
+        "names": ["Test", "", " ", None, 3, "Zoë"],
+        "valid": [True, False, False, False, False, True],
+    }
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("body", [None, "", "not json", "{}", '"Test"', '{"names": ["Test"]}'])
+def test_validate_batch_invalid_body(body):
+    """Validate batch rejects bodies that are not a JSON array."""
+    with pytest.raises(InvalidRequestBodyError) as e:
+        validate_batch({"body": body})
+    assert str(e.value) == INVALID_BODY_ERROR
+
+
+@pytest.mark.unit
+def test_validate_batch_size_limit():
+    """Validate batch rejects batches over the configured size."""
+    with patch("utils.pipeline.MAX_BATCH_SIZE", 2):
+        assert validate_batch({"body": '["a", "b"]'})["names"] == ["a", "b"]
+        with pytest.raises(InvalidRequestBodyError) as e:
+            validate_batch({"body": '["a", "b", "c"]'})
+    assert str(e.value) == "A batch can not contain more than 2 names"
+
+
+@pytest.mark.unit
+@pytest.mark.usefixtures("mock_response_builder")
+def test_generate_response():
+    """Generate response returns expected response when given valid body."""
+    response = generate_response({"message": "Hello, Test!"})
+    assert response["statusCode"] == http.HTTPStatus.OK
+    assert response["headers"]["Content-Type"] == "application/json"
+    assert response["headers"]["Access-Control-Allow-Origin"] == "https://example.com"
+    assert response["headers"]["Access-Control-Allow-Methods"] == "OPTIONS,GET,POST,PUT,DELETE"
+    assert json.loads(response["body"]) == {"message": "Hello, Test!"}
+
+
+@pytest.mark.unit
+@pytest.mark.usefixtures("mock_response_builder")
+def test_generate_response_serializing_error():
+    """Generate response falls back to a 500 when the body can not be serialized."""
+    response = generate_response({"message": object()})
+    assert response["statusCode"] == http.HTTPStatus.INTERNAL_SERVER_ERROR
+    assert json.loads(response["body"]) == {
+        "error": "An unexpected error occurred while processing the response."
+    }
+
+
+@pytest.mark.unit
+@pytest.mark.usefixtures("mock_response_builder")
+def test_generate_batch_response():
+    """Generate batch response encodes the items, as they are produced, under `results`."""
+    items = (item for item in [{"message": "Hello, Test!"}, {"error": INVALID_NAME_ERROR}])
+    response = generate_batch_response(items)
+    assert response["statusCode"] == http.HTTPStatus.OK
+    assert response["headers"]["Access-Control-Allow-Origin"] == "https://example.com"
+    assert json.loads(response["body"]) == {
+        "results": [{"message": "Hello, Test!"}, {"error": INVALID_NAME_ERROR}]
+    }
+
+
+@pytest.mark.unit
+@pytest.mark.usefixtures("mock_response_builder")
+def test_generate_batch_response_serializing_error():
+    """Generate batch response falls back to a 500 when an item can not be serialized."""
+    response = generate_batch_response([{"message": "a"}, {"message": object()}])
+    assert response["statusCode"] == http.HTTPStatus.INTERNAL_SERVER_ERROR
+    assert json.loads(response["body"]) == {
+        "error": "An unexpected error occurred while processing the response."
+    }
+
+
+@pytest.mark.unit
+@pytest.mark.usefixtures("mock_response_builder")
+@pytest.mark.parametrize(
+    "exception, status, log_args",
+    [
+        (
+            InvalidQueryStringParameterError("Invalid name provided"),
+            http.HTTPStatus.BAD_REQUEST,
+            (logging.INFO, False),
+        ),
+        (
+            MissingRequiredQueryStringParameterError("'name' query string parameter is required"),
+            http.HTTPStatus.BAD_REQUEST,
+            (logging.INFO, False),
+        ),
+        (
+            ServiceUnavailableError("Service unavailable"),
+            http.HTTPStatus.SERVICE_UNAVAILABLE,
+            (logging.ERROR, True),
+        ),
+        (
+            Exception("An error occurred processing your request."),
+            http.HTTPStatus.INTERNAL_SERVER_ERROR,
+            (),
+        ),
+    ],
+)
+def test_handle_exception(exception, status, log_args):
+    """Handle exception logs following the error's policy and returns response for it."""
+
+    expected_response = generate_response({"error": str(exception)}, status)
+
+    with patch.object(logger, "exception") as mock_log:
+        response = handle_exception(exception)
+        mock_log.assert_called_once_with(EXCEPTION_LOG, exception, *log_args)
+        assert response == expected_response
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "event, expected_body",
+    [
+        (
+            {"httpMethod": "GET", "resource": "/echo", "queryStringParameters": {"name": "a"}},
+            {"message": "a"},
+        ),
+        ({"httpMethod": "POST", "resource": "/echo", "body": "b"}, {"body": "b"}),
+        ({"queryStringParameters": {"name": "c"}}, {"message": "c"}),
+    ],
+)
+def test_pipeline_routes_event(pipeline, event, expected_body, mock_context):
+    """Pipeline dispatches events to the producer registered for their method and path."""
+    response = pipeline(event, mock_context)
+    assert response["statusCode"] == http.HTTPStatus.OK
+    assert json.loads(response["body"]) == expected_body
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "event",
+    [
+        {"httpMethod": "DELETE", "resource": "/echo"},
+        {"httpMethod": "GET", "resource": "/missing"},
+    ],
+)
+def test_pipeline_unknown_route(pipeline, event, mock_context):
+    """Pipeline answers 404 for routes that were not registered."""
+    response = pipeline(event, mock_context)
+    assert response["statusCode"] == http.HTTPStatus.NOT_FOUND
+    assert json.loads(response["body"]) == {"error": ROUTE_NOT_FOUND_ERROR}
+
+
+@pytest.mark.unit
+def test_pipeline_handles_producer_exception(pipeline, mock_context):
+    """Pipeline turns unexpected producer errors into a generic 500 response."""
+    event = {"queryStringParameters": {"name": "Test"}}
+    pipeline.default_route = pipeline.default_route._replace(
+        produce=MagicMock(side_effect=RuntimeError("boom"))
+    )
+
+    response = pipeline(event, mock_context)
+    assert response["statusCode"] == http.HTTPStatus.INTERNAL_SERVER_ERROR
+    assert json.loads(response["body"]) == {"error": "An error occurred processing your request."}
+
+
+@pytest.mark.unit
+def test_pipeline_batch_route(pipeline, mock_context):
+    """Batch routes apply the single-name producer per item and report errors per item."""
+
+    @pipeline.batch_route("POST", "/echo/batch")
+    def echo(name):
+        if name == "forbidden":
+            raise ForbiddenError("Forbidden name")
+        return {"message": name}
+
+    event = {
+        "httpMethod": "POST",
+        "resource": "/echo/batch",
+        "body": json.dumps(["a", " ", "forbidden", "b"]),
+    }
+    response = pipeline(event, mock_context)
+
+    assert response["statusCode"] == http.HTTPStatus.OK
+    assert json.loads(response["body"]) == {
+        "results": [
+            {"message": "a"},
+            {"error": INVALID_NAME_ERROR},
+            {"error": "Forbidden name"},
+            {"message": "b"},
+        ]
+    }
+    assert pipeline.default_route is pipeline.routes[("GET", "/echo")]
+
+
+@pytest.mark.unit
+def test_pipeline_batch_route_invalid_body(pipeline, mock_context):
+    """Batch routes answer 400 when the body is not an array of names."""
+    pipeline.batch_route("POST", "/echo/batch")(lambda name: {"message": name})
+
+    response = pipeline({"httpMethod": "POST", "resource": "/echo/batch"}, mock_context)
+    assert response["statusCode"] == http.HTTPStatus.BAD_REQUEST
+    assert json.loads(response["body"]) == {"error": INVALID_BODY_ERROR}
+
+
+def function_url_event(method, path, body=None):
+    return {
+        "version": "2.0",
+        "rawPath": path,
+        "requestContext": {"http": {"method": method, "path": path}},
+        "body": body,
+    }
+
+
+@pytest.mark.unit
+def test_pipeline_routes_function_url_event(pipeline, mock_context):
+    """Function URL events are routed by method and path."""
+    event = {**function_url_event("GET", "/echo"), "queryStringParameters": {"name": "Test"}}
+    response = pipeline(event, mock_context)
+    assert json.loads(response["body"]) == {"message": "Test"}
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "streaming, function_url, streamed",
+    [(True, True, True), (True, False, False), (False, True, False)],
+    ids=["function-url", "rest", "disabled"],
+)
+def test_pipeline_streams_batch_route(mock_context, streaming, function_url, streamed):
+    """Batch bodies are streamed to function URLs when enabled, buffered otherwise."""
+    pipeline = Pipeline(streaming=streaming)
+    produced = []
+
+    @pipeline.batch_route("POST", "/echo/batch")
+    def echo(name):
+        produced.append(name)
+        return {"message": name}
+
+    body = json.dumps(["a", " ", "b"])
+    if function_url:
+        event = function_url_event("POST", "/echo/batch", body)
+    else:
+        event = {"httpMethod": "POST", "resource": "/echo/batch", "body": body}
+    with patch.object(pipeline.checker, "check") as check:
+        response = pipeline(event, mock_context)
+
+    assert response["statusCode"] == http.HTTPStatus.OK
+    assert isinstance(response["body"], str) is not streamed
+    # Streamed items are only produced as the chunks are written
+    assert produced == ([] if streamed else ["a", "b"])
+    assert check.called is not streamed
+    assert json.loads("".join(response["body"])) == {
+        "results": [{"message": "a"}, {"error": INVALID_NAME_ERROR}, {"message": "b"}]
+    }
+    assert produced == ["a", "b"]
+
+
+@pytest.mark.unit
+def test_pipeline_reports_streaming_errors(mock_context):
+    """
+    An error raised while the runtime writes a streamed body is logged and counted on a metrics
+    line of its own, then cuts the stream.
+    """
+    stream = io.StringIO()
+    pipeline = Pipeline(recorder=Metrics(stream=stream), streaming=True)
+    error = TypeError("not serializable")
+
+    @pipeline.batch_route("POST", "/echo/batch")
+    def echo(name):
+        if name == "b":
+            raise error
+        return {"message": name}
+
+    event = function_url_event("POST", "/echo/batch", json.dumps(["a", "b"]))
+    response = pipeline(event, mock_context)
+    [invocation] = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert response["statusCode"] == http.HTTPStatus.OK
+    assert STREAM_ERROR_METRIC not in invocation
+
+    with patch.object(logger, "exception") as mock_log, pytest.raises(TypeError):
+        "".join(response["body"])
+
+    mock_log.assert_called_once_with(EXCEPTION_LOG, error)
+    [_, stream_error] = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert stream_error["route"] == "POST /echo/batch"
+    assert stream_error[STREAM_ERROR_METRIC] == 1
+    assert stream_error[f"Errors.{InternalServerError.__name__}"] == 1
+
+
+@pytest.mark.unit
+def test_pipeline_route_uses_spec_validator():
+    """Routes declared in the API spec default to their compiled validator."""
+    pipeline = Pipeline()
+    pipeline.route("get", "/hello")(lambda name: {"message": name})
+    assert pipeline.routes[("GET", "/hello")].validate is validate_get_hello
+
+
+@pytest.mark.unit
+def test_pipeline_route_requires_validator():
+    """Routes missing from the API spec need an explicit validator."""
+    with pytest.raises(ValueError):
+        Pipeline().route("GET", "/missing")
+
+
+@pytest.mark.unit
+def test_pipeline_adds_caching_headers(mock_context):
+    """Routes with a Cache-Control policy answer with an ETag of the body."""
+    pipeline = Pipeline()
+    pipeline.route("GET", "/hello", cache_control="public, max-age=60")(
+        lambda name: {"message": name}
+    )
+    event = {"httpMethod": "GET", "resource": "/hello", "queryStringParameters": {"name": "a"}}
+
+    response = pipeline(event, mock_context)
+    assert response["statusCode"] == http.HTTPStatus.OK
+    assert response["headers"]["Cache-Control"] == "public, max-age=60"
+    assert response["headers"]["ETag"] == compute_etag(response["body"])
+
+    event["headers"] = {"if-none-match": response["headers"]["ETag"]}
+    not_modified = pipeline(event, mock_context)
+    assert not_modified["statusCode"] == http.HTTPStatus.NOT_MODIFIED
+    assert not_modified["body"] == ""
+    assert not_modified["headers"]["ETag"] == response["headers"]["ETag"]
+    assert not_modified["headers"]["Cache-Control"] == "public, max-age=60"
+
+    event["headers"] = {"If-None-Match": '"stale"'}
+    assert pipeline(event, mock_context) == response
+
+
+@pytest.mark.unit
+def test_pipeline_caching_headers_are_opt_in(pipeline, mock_context):
+    """Routes without a policy and error responses get no caching headers."""
+    ok = pipeline({"queryStringParameters": {"name": "a"}}, mock_context)
+    error = pipeline({"queryStringParameters": None}, mock_context)
+    for response in (ok, error):
+        assert "ETag" not in response["headers"]
+        assert "Cache-Control" not in response["headers"]
@@ -0,0 +1,203 @@
+import http
+import io
+import json
+import math
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from utils.errors import TOO_MANY_REQUESTS_ERROR
+from utils.logging import STARTED_PROCESSING_LOG
+from utils.metrics import Metrics
+from utils.pipeline import Pipeline, logger
+from utils.ratelimit import (
+    BACKEND_ERROR_METRIC,
+    RETRY_AFTER_HEADER,
+    TAKE_SCRIPT,
+    MemoryBucketBackend,
+    RateLimiter,
+    RedisBucketBackend,
+    client_key,
+    take_token,
+)
+
+
+class Clock:
+    """Clock moved forward by the tests."""
+
+    def __init__(self, now=1_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRedis:
+    """
+    Local stand-in for a Redis store, running `TAKE_SCRIPT` as the server would: hashes with
+    string values, integer script results and millisecond expiries.
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.hashes = {}
+        self.expires_at = {}
+        self.calls = 0
+
+    def _hash(self, key):
+        if key in self.expires_at and self.clock() * 1000 >= self.expires_at[key]:
+            del self.hashes[key], self.expires_at[key]
+        return self.hashes.get(key, {})
+
+    def eval(self, script, numkeys, *keys_and_args):
+        assert script == TAKE_SCRIPT and numkeys == 1
+        self.calls += 1
+        key, *args = keys_and_args
+        rate, burst, now = (float(str(arg)) for arg in args)
+        bucket = self._hash(key)
+        tokens = float(bucket.get("tokens", burst))
+        updated_at = float(bucket.get("updatedAt", now))
+        tokens = min(burst, tokens + max(now - updated_at, 0) * rate / 1000)
+        wait = 0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = math.ceil((1 - tokens) * 1000 / rate)
+        self.hashes[key] = {"tokens": repr(tokens), "updatedAt": repr(now)}
+        self.expires_at[key] = now + math.ceil(burst * 1000 / rate)
+        return wait
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def rest_event(source_ip="203.0.113.1", api_key_id=None):
+    identity = {"sourceIp": source_ip, "apiKeyId": api_key_id}
+    return {
+        "httpMethod": "GET",
+        "resource": "/hello",
+        "queryStringParameters": {"name": "John"},
+        "requestContext": {"identity": identity},
+    }
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "event, key",
+    [
+        (rest_event(), "ip:203.0.113.1"),
+        (rest_event(api_key_id="k4b2"), "apiKey:k4b2"),
+        ({"requestContext": {"http": {"sourceIp": "198.51.100.7"}}}, "ip:198.51.100.7"),
+        ({"requestContext": {"identity": {"sourceIp": None}}}, None),
+        ({}, None),
+    ],
+    ids=["source-ip", "api-key", "function-url", "no-ip", "direct"],
+)
+def test_client_key(event, key):
+    assert client_key(event) == key
+
+
+@pytest.mark.unit
+def test_take_token():
+    assert take_token(2.0, 0.0, 1.0, 2.0, 0.0) == (1.0, 0.0)
+    assert take_token(0.0, 0.0, 2.0, 2.0, 0.25) == (0.5, 0.25)
+    assert take_token(0.0, 0.0, 2.0, 2.0, 10.0) == (1.0, 0.0)
+
+
+@pytest.mark.unit
+def test_memory_backend_token_bucket(clock):
+    """A client gets its burst at once, then the rate, independently of the other clients."""
+    limiter = RateLimiter(rate=2, burst=3, clock=clock)
+
+    assert [limiter.check(rest_event()) for _ in range(4)] == [None, None, None, 0.5]
+    assert limiter.check(rest_event("203.0.113.2")) is None
+    clock.now += 0.5
+    assert limiter.check(rest_event()) is None
+    assert limiter.check(rest_event()) == pytest.approx(0.5)
+    assert limiter.check({}) is None
+
+
+@pytest.mark.unit
+def test_memory_backend_forgets_least_recent_clients(clock):
+    backend = MemoryBucketBackend(max_keys=2)
+    limiter = RateLimiter(rate=1, burst=1, backend=backend, clock=clock)
+    for source_ip in ("203.0.113.1", "203.0.113.2", "203.0.113.1", "203.0.113.3"):
+        limiter.check(rest_event(source_ip))
+
+    assert len(backend) == 2
+    assert limiter.check(rest_event("203.0.113.2")) is None
+    assert limiter.check(rest_event("203.0.113.3")) == 1.0
+
+
+@pytest.mark.unit
+def test_redis_backend_shares_buckets(clock):
+    """Containers sharing a store share the buckets, in one round trip per request."""
+    store = FakeRedis(clock)
+    containers = [
+        RateLimiter(rate=1, burst=2, backend=RedisBucketBackend(store), clock=clock)
+        for _ in range(2)
+    ]
+
+    assert containers[0].check(rest_event()) is None
+    assert containers[1].check(rest_event()) is None
+    assert containers[0].check(rest_event()) == 1.0
+    assert store.calls == 3
+    assert set(store.hashes) == {"ratelimit:ip:203.0.113.1"}
+
+    clock.now += 0.5
+    assert containers[1].check(rest_event()) == 0.5
+    clock.now += 2
+    assert store._hash("ratelimit:ip:203.0.113.1") == {}
+    assert containers[1].check(rest_event()) is None
+
+
+@pytest.mark.unit
+def test_backend_errors_fail_open(clock):
+    """An unreachable store lets requests through, and is counted."""
+    recorder = MagicMock(spec=Metrics)
+    store = MagicMock()
+    store.eval.side_effect = ConnectionError("Timeout connecting to server")
+    limiter = RateLimiter(rate=1, backend=RedisBucketBackend(store), recorder=recorder)
+
+    assert limiter.check(rest_event()) is None
+    recorder.count.assert_called_once_with(BACKEND_ERROR_METRIC)
+
+
+@pytest.mark.unit
+def test_disabled_by_default():
+    assert not RateLimiter().enabled
+    assert RateLimiter(rate=0.5).burst == 1.0
+
+
+@pytest.mark.unit
+def test_pipeline_answers_throttled_requests_with_429(clock):
+    """Requests over the limit are answered before the event is validated or logged."""
+    stream = io.StringIO()
+    recorder = Metrics(stream=stream)
+    limiter = RateLimiter(rate=0.5, burst=1, clock=clock, recorder=recorder)
+    pipeline = Pipeline(recorder=recorder, limiter=limiter)
+    validate = MagicMock(return_value={"name": "John"})
+
+    @pipeline.route("GET", "/hello", validator=validate)
+    def greet(name):
+        return {"message": f"Hello, {name}!"}
+
+    context = SimpleNamespace(aws_request_id="c6af9ac6-7b61-11e6-9a41-93e812345678")
+    assert pipeline(rest_event(), context)["statusCode"] == http.HTTPStatus.OK
+
+    with patch.object(logger, "info") as mock_info:
+        response = pipeline(rest_event(), context)
+    assert response["statusCode"] == http.HTTPStatus.TOO_MANY_REQUESTS
+    assert json.loads(response["body"]) == {"error": TOO_MANY_REQUESTS_ERROR}
+    assert response["headers"][RETRY_AFTER_HEADER] == "2"
+    assert validate.call_count == 1
+    assert STARTED_PROCESSING_LOG not in [call.args[0] for call in mock_info.call_args_list]
+    line = json.loads(stream.getvalue().splitlines()[-1])
+    assert line["Errors.TooManyRequestsError"] == 1
+    assert line["route"] == "GET /hello"
+
+    clock.now += 2
+    assert pipeline(rest_event(), context)["statusCode"] == http.HTTPStatus.OK
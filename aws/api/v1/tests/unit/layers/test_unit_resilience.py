@@ -0,0 +1,340 @@
+import asyncio
+import http
+import io
+import json
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from utils.errors import (
+    DOWNSTREAM_UNAVAILABLE_ERROR,
+    ForbiddenError,
+    GatewayTimeoutError,
+    LoadSheddingError,
+    ServiceUnavailableError,
+)
+from utils.metrics import Metrics
+from utils.pipeline import Pipeline
+from utils.resilience import CLOSED, HALF_OPEN, OPEN, AdaptiveLimiter, CircuitBreaker, MemoryBackend
+
+
+class Clock:
+    """Clock moved forward by the tests."""
+
+    def __init__(self, now=1_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def unavailable():
+    raise ServiceUnavailableError("down")
+
+
+def ok():
+    return "ok"
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def recorder():
+    return MagicMock(spec=Metrics)
+
+
+def counted(recorder):
+    return [call.args[0] for call in recorder.count.call_args_list]
+
+
+def breaker(clock, recorder, **kwargs):
+    kwargs = {"failure_threshold": 3, "recovery_seconds": 30, **kwargs}
+    return CircuitBreaker("greetings", clock=clock, recorder=recorder, **kwargs)
+
+
+@pytest.mark.unit
+def test_memory_backend_expires_values(clock):
+    backend = MemoryBackend(clock)
+    backend.set("a", {"value": 1}, ttl=10)
+    backend.set("b", {"value": 2})
+    assert backend.get("a") == {"value": 1}
+
+    clock.now += 10
+    assert backend.get("a") is None
+    assert backend.get("b") == {"value": 2}
+    assert backend.get("missing") is None
+
+
+@pytest.mark.unit
+def test_circuit_opens_after_consecutive_failures(clock, recorder):
+    """Failures in a row open the circuit, which then rejects calls without making them."""
+    circuit = breaker(clock, recorder)
+    for _ in range(2):
+        with pytest.raises(ServiceUnavailableError):
+            circuit.call(unavailable)
+    assert circuit.call(ok) == "ok"
+    assert circuit.failures == 0
+
+    for _ in range(3):
+        with pytest.raises(ServiceUnavailableError):
+            circuit.call(unavailable)
+    assert circuit.state == OPEN
+
+    function = MagicMock()
+    with pytest.raises(LoadSheddingError) as e:
+        circuit.call(function)
+    assert str(e.value) == DOWNSTREAM_UNAVAILABLE_ERROR
+    function.assert_not_called()
+    assert counted(recorder) == ["Circuit.greetings.Open", "Circuit.greetings.Rejected"]
+
+
+@pytest.mark.unit
+def test_circuit_half_open_trial(clock, recorder):
+    """After the recovery time one trial call goes through, and decides the state."""
+    circuit = breaker(clock, recorder)
+    for _ in range(3):
+        with pytest.raises(ServiceUnavailableError):
+            circuit.call(unavailable)
+
+    clock.now += 30
+    with pytest.raises(GatewayTimeoutError):
+        circuit.call(MagicMock(side_effect=GatewayTimeoutError("slow")))
+    assert circuit.state == OPEN
+    with pytest.raises(LoadSheddingError):
+        circuit.call(ok)
+
+    clock.now += 30
+    circuit.before()
+    assert circuit.state == HALF_OPEN
+    with pytest.raises(LoadSheddingError):
+        circuit.call(ok)
+    circuit.record_success()
+    assert circuit.state == CLOSED
+    assert counted(recorder) == [
+        "Circuit.greetings.Open",
+        "Circuit.greetings.HalfOpen",
+        "Circuit.greetings.Open",
+        "Circuit.greetings.Rejected",
+        "Circuit.greetings.HalfOpen",
+        "Circuit.greetings.Rejected",
+        "Circuit.greetings.Closed",
+    ]
+
+
+@pytest.mark.unit
+def test_circuit_other_errors_are_answers(clock, recorder):
+    """Errors other than unavailability mean the dependency answered."""
+    circuit = breaker(clock, recorder)
+    for _ in range(5):
+        with pytest.raises(ForbiddenError):
+            circuit.call(MagicMock(side_effect=ForbiddenError("Forbidden name")))
+    assert circuit.state == CLOSED
+
+
+@pytest.mark.unit
+def test_nested_shedding_is_not_a_failure(clock, recorder):
+    """Rejections of an inner breaker neither open the outer one nor shrink a limiter."""
+    inner = breaker(clock, recorder, failure_threshold=1)
+    with pytest.raises(ServiceUnavailableError):
+        inner.call(unavailable)
+    outer = CircuitBreaker("api", failure_threshold=1, clock=clock, recorder=recorder)
+    limiter = AdaptiveLimiter("api", initial_limit=4, clock=clock, recorder=recorder)
+
+    for _ in range(3):
+        with pytest.raises(LoadSheddingError):
+            outer.call(inner.call, ok)
+        with pytest.raises(LoadSheddingError):
+            limiter.call(inner.call, ok)
+    assert outer.state == CLOSED
+    assert limiter.limit == 4
+    assert limiter.in_flight == 0
+    assert "Limiter.api.Decreased" not in counted(recorder)
+
+
+@pytest.mark.unit
+def test_circuit_shared_through_backend(clock, recorder):
+    """An opening is adopted by the other containers at their next sync."""
+    backend = MemoryBackend(clock)
+    circuit = breaker(clock, recorder, backend=backend, sync_seconds=1)
+    other = breaker(clock, recorder, backend=backend, sync_seconds=1)
+    assert other.call(ok) == "ok"
+
+    for _ in range(3):
+        with pytest.raises(ServiceUnavailableError):
+            circuit.call(unavailable)
+    assert other.call(ok) == "ok"
+
+    clock.now += 1
+    with pytest.raises(LoadSheddingError):
+        other.call(ok)
+    assert other.opened_at == circuit.opened_at
+
+    clock.now += 29
+    assert other.call(ok) == "ok"
+    assert other.state == CLOSED
+
+
+@pytest.mark.unit
+def test_circuit_call_async(clock, recorder):
+    """Rejected coroutines are closed, cancelled trials give their slot back."""
+    circuit = breaker(clock, recorder, failure_threshold=1)
+
+    async def down():
+        raise ConnectionRefusedError()
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    async def scenario():
+        with pytest.raises(ConnectionRefusedError):
+            await circuit.call_async(down())
+        coroutine = hang()
+        with pytest.raises(LoadSheddingError):
+            await circuit.call_async(coroutine)
+        assert coroutine.cr_frame is None
+
+        clock.now += 30
+        task = asyncio.ensure_future(circuit.call_async(hang()))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert circuit.state == HALF_OPEN
+        circuit.before()
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.unit
+def test_limiter_sheds_calls_over_the_limit(clock, recorder):
+    limiter = AdaptiveLimiter("greetings", initial_limit=2, clock=clock, recorder=recorder)
+    limiter.acquire()
+    limiter.acquire()
+    with pytest.raises(LoadSheddingError):
+        limiter.acquire()
+    assert counted(recorder) == ["Limiter.greetings.Rejected"]
+
+    limiter.release()
+    limiter.acquire()
+    assert limiter.in_flight == 2
+
+
+@pytest.mark.unit
+def test_limiter_aimd(clock, recorder):
+    """Successes raise the limit by about one per round, failures and slow calls halve it."""
+    limiter = AdaptiveLimiter(
+        "greetings",
+        initial_limit=4,
+        min_limit=1,
+        max_limit=6,
+        latency_threshold=0.5,
+        clock=clock,
+        recorder=recorder,
+    )
+    for _ in range(4):
+        limiter.call(ok)
+    assert limiter.limit == pytest.approx(4.9, abs=0.05)
+
+    with pytest.raises(ServiceUnavailableError):
+        limiter.call(unavailable)
+    assert limiter.limit == pytest.approx(2.45, abs=0.05)
+    limiter.acquire()
+    limiter.release(latency=1.0)
+    assert limiter.limit == pytest.approx(1.22, abs=0.05)
+    limiter.acquire()
+    limiter.release(ForbiddenError("Forbidden name"))
+    assert limiter.limit == pytest.approx(1.22, abs=0.05)
+    for _ in range(3):
+        limiter.acquire()
+        limiter.release(GatewayTimeoutError("slow"))
+    assert limiter.limit == 1
+
+    for _ in range(100):
+        limiter.call(ok)
+    assert limiter.limit == 6
+    assert counted(recorder).count("Limiter.greetings.Decreased") == 5
+
+
+@pytest.mark.unit
+def test_limiter_adopts_shared_decreases_once(clock, recorder):
+    backend = MemoryBackend(clock)
+    limiter, other = (
+        AdaptiveLimiter(
+            "greetings", initial_limit=8, backend=backend, clock=clock, recorder=recorder
+        )
+        for _ in range(2)
+    )
+
+    limiter.acquire()
+    limiter.release(ServiceUnavailableError("down"))
+    other.acquire()
+    assert other.limit == 4
+    other.release()
+
+    for _ in range(8):
+        clock.now += 1
+        other.call(ok)
+    assert other.limit > 5
+
+
+@pytest.mark.unit
+def test_limiter_bounds_concurrent_calls(recorder):
+    """Threads sharing a limiter never have more calls in flight than the limit."""
+    limiter = AdaptiveLimiter("greetings", initial_limit=3, max_limit=3, recorder=recorder)
+    in_flight, peak = [0], [0]
+    lock = threading.Lock()
+
+    def call():
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.05)
+        with lock:
+            in_flight[0] -= 1
+
+    def worker():
+        try:
+            limiter.call(call)
+        except LoadSheddingError:
+            pass
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak[0] <= 3
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.unit
+def test_pipeline_answers_open_circuit_with_503(clock):
+    """Shed calls are answered 503 right away and counted as their own error."""
+    stream = io.StringIO()
+    recorder = Metrics(stream=stream)
+    circuit = breaker(clock, recorder, failure_threshold=1)
+    pipeline = Pipeline(recorder=recorder)
+    dependency = MagicMock(side_effect=ConnectionResetError())
+
+    @pipeline.route("GET", "/hello")
+    def greet(name):
+        return {"message": circuit.call(dependency)}
+
+    event = {"httpMethod": "GET", "resource": "/hello", "queryStringParameters": {"name": "John"}}
+    context = SimpleNamespace(aws_request_id="c6af9ac6-7b61-11e6-9a41-93e812345678")
+    assert pipeline(event, context)["statusCode"] == http.HTTPStatus.INTERNAL_SERVER_ERROR
+
+    response = pipeline(event, context)
+    assert response["statusCode"] == http.HTTPStatus.SERVICE_UNAVAILABLE
+    assert json.loads(response["body"]) == {"error": DOWNSTREAM_UNAVAILABLE_ERROR}
+    assert dependency.call_count == 1
+    line = json.loads(stream.getvalue().splitlines()[-1])
+    assert line["Errors.LoadSheddingError"] == 1
+    assert line["Circuit.greetings.Rejected"] == 1
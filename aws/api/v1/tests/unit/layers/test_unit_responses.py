@@ -0,0 +1,154 @@
+import http
+import json
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from utils.errors import (
+    INVALID_NAME_ERROR,
+    PREDEFINED_ERRORS,
+    ForbiddenError,
+    InvalidQueryStringParameterError,
+)
+from utils.responses import (
+    ErrorResponseCache,
+    ResponseBuilder,
+    compute_etag,
+    etag_matches,
+    request_header,
+)
+from utils.serializers import load_serializer
+
+
+@pytest.fixture
+def builder():
+    """Creates a response builder for a known docs domain."""
+    return ResponseBuilder("example.com")
+
+
+@pytest.mark.unit
+def test_from_env_resolves_docs_domain_once():
+    """Builder reads the docs domain when created, not when building responses."""
+    with patch.dict(os.environ, {"DOCS_DOMAIN_NAME": "example.com"}):
+        builder = ResponseBuilder.from_env()
+    with patch.dict(os.environ, {"DOCS_DOMAIN_NAME": "other.com"}):
+        response = builder.build("{}")
+    assert response["headers"]["Access-Control-Allow-Origin"] == "https://example.com"
+
+
+@pytest.mark.unit
+def test_build(builder):
+    """Build wraps the serialized body with the status code and the header template."""
+    response = builder.build('{"message": "Hello, Test!"}', http.HTTPStatus.BAD_REQUEST)
+    assert response == {
+        "statusCode": http.HTTPStatus.BAD_REQUEST,
+        "headers": {
+            "Content-Type": "application/json",
+            "Access-Control-Allow-Headers": "Content-Type,If-None-Match",
+            "Access-Control-Allow-Origin": "https://example.com",
+            "Access-Control-Allow-Methods": "OPTIONS,GET,POST,PUT,DELETE",
+            "Access-Control-Expose-Headers": "ETag",
+        },
+        "body": '{"message": "Hello, Test!"}',
+    }
+
+
+@pytest.mark.unit
+def test_build_merges_headers_without_touching_template(builder):
+    """Extra headers are merged into a copy, leaving the frozen template unchanged."""
+    response = builder.build("{}", headers={"Cache-Control": "no-store"})
+    response["headers"]["Content-Type"] = "text/plain"
+
+    assert response["headers"]["Cache-Control"] == "no-store"
+    assert "Cache-Control" not in builder.headers
+    assert builder.headers["Content-Type"] == "application/json"
+    with pytest.raises(TypeError):
+        builder.headers["Content-Type"] = "text/plain"
+
+
+@pytest.mark.unit
+def test_error_response_cache_preloads_predefined_errors(builder):
+    """Predefined errors are serialized when the cache is created."""
+    json_serializer = MagicMock(wraps=load_serializer("json"))
+    cache = ErrorResponseCache(builder, json_serializer)
+    assert json_serializer.dumps.call_count == len(PREDEFINED_ERRORS)
+
+    response = cache.get(InvalidQueryStringParameterError, INVALID_NAME_ERROR)
+
+    assert json_serializer.dumps.call_count == len(PREDEFINED_ERRORS)
+    assert response == builder.build(
+        json.dumps({"error": INVALID_NAME_ERROR}), http.HTTPStatus.BAD_REQUEST
+    )
+
+
+@pytest.mark.unit
+def test_error_response_cache_memoizes_new_messages(builder):
+    """Other errors are serialized once, up to the cache size."""
+    json_serializer = MagicMock(wraps=load_serializer("json"))
+    cache = ErrorResponseCache(builder, json_serializer, predefined=(), max_size=1)
+
+    for _ in range(2):
+        response = cache.get(ForbiddenError, "first")
+        assert response["statusCode"] == http.HTTPStatus.FORBIDDEN
+        assert response["body"] == '{"error": "first"}'
+    assert json_serializer.dumps.call_count == 1
+
+    for _ in range(2):
+        cache.get(ForbiddenError, "second")
+    assert json_serializer.dumps.call_count == 3
+
+
+@pytest.mark.unit
+def test_error_response_cache_returns_copies(builder):
+    """Callers can change a cached response without affecting the next ones."""
+    cache = ErrorResponseCache(builder)
+
+    response = cache.get(InvalidQueryStringParameterError, INVALID_NAME_ERROR)
+    response["statusCode"] = http.HTTPStatus.OK
+    response["headers"]["ETag"] = '"changed"'
+
+    response = cache.get(InvalidQueryStringParameterError, INVALID_NAME_ERROR)
+    assert response["statusCode"] == http.HTTPStatus.BAD_REQUEST
+    assert "ETag" not in response["headers"]
+
+
+@pytest.mark.unit
+def test_compute_etag():
+    """ETags are quoted, stable for a body and differ between bodies."""
+    etag = compute_etag('{"message":"Hello, John!"}')
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == compute_etag('{"message":"Hello, John!"}')
+    assert etag != compute_etag('{"message":"Hello, Jane!"}')
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "if_none_match, expected",
+    [
+        (None, False),
+        ("", False),
+        ('"1a-0123abcd"', True),
+        ('W/"1a-0123abcd"', True),
+        ('"other", "1a-0123abcd"', True),
+        ("*", True),
+        ('"other"', False),
+        ("1a-0123abcd", False),
+    ],
+)
+def test_etag_matches(if_none_match, expected):
+    assert etag_matches(if_none_match, '"1a-0123abcd"') is expected
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "headers, expected",
+    [
+        ({"If-None-Match": '"a"'}, '"a"'),
+        ({"if-none-match": '"a"'}, '"a"'),
+        ({"Accept": "*/*"}, None),
+        (None, None),
+    ],
+)
+def test_request_header_ignores_case(headers, expected):
+    assert request_header({"headers": headers}, "If-None-Match") == expected
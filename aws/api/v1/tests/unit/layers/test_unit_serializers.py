@@ -0,0 +1,58 @@
+import importlib.util
+import json
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from utils.serializers import DEFAULT_JSON_BACKEND, JSON_BACKENDS, load_serializer
+
+AVAILABLE_BACKENDS = [
+    name for name in JSON_BACKENDS if name == "json" or importlib.util.find_spec(name)
+]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("preferred", [None, "unknown"])
+def test_load_serializer_defaults_to_json(preferred):
+    """Without a known preference the standard library is used, it is the cheapest import."""
+    assert DEFAULT_JSON_BACKEND == "json"
+    assert load_serializer(preferred).name == "json"
+
+
+@pytest.mark.unit
+def test_load_serializer_falls_back_when_unavailable():
+    """A preferred backend that is not shipped falls back to the standard library."""
+    with patch.dict(sys.modules, {"orjson": None}):
+        assert load_serializer("orjson").name == "json"
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("name", AVAILABLE_BACKENDS)
+def test_serializer_round_trip(name):
+    """Every available backend emits JSON that decodes back to the original body."""
+    serializer = load_serializer(name)
+    body = {"message": "Hello, Zoë!", "items": [1, 2.5, None, True], "nested": {"a": "b"}}
+
+    assert serializer.name == name
+    assert isinstance(serializer.dumps(body), str)
+    assert json.loads(serializer.dumps(body)) == body
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("name", AVAILABLE_BACKENDS)
+def test_serializer_errors(name):
+    """Every available backend reports unserializable bodies through its declared errors."""
+    serializer = load_serializer(name)
+    with pytest.raises(serializer.errors):
+        serializer.dumps({"message": object()})
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("name", AVAILABLE_BACKENDS)
+def test_serializer_loads(name):
+    """Every available backend parses JSON and raises a ValueError for malformed documents."""
+    serializer = load_serializer(name)
+    assert serializer.loads('["Test", null, 3]') == ["Test", None, 3]
+    with pytest.raises(ValueError):
+        serializer.loads("not json")
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from utils.pipeline import BATCH_RESPONSE_PREFIX, BATCH_RESPONSE_SUFFIX
+from utils.serializers import JSON_BACKENDS, load_serializer
+from utils.streaming import INLINE_ITEMS, accepts_stream, iter_json
+
+BODIES = [
+    {},
+    [],
+    "text",
+    None,
+    {"message": "Hello, Zoë!"},
+    {"results": [{"message": str(i)} for i in range(INLINE_ITEMS * 3 + 1)]},
+    {str(i): [i, {"nested": [True, None, 1.5]}] for i in range(INLINE_ITEMS * 2)},
+    list(range(INLINE_ITEMS + 1)),
+    ("a", "b"),
+]
+
+
+@pytest.fixture(params=JSON_BACKENDS)
+def json_serializer(request):
+    """Every JSON backend available here."""
+    json_serializer = load_serializer(request.param)
+    if json_serializer.name != request.param:
+        pytest.skip(f"{request.param} is not installed")
+    return json_serializer
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("body", BODIES)
+@pytest.mark.parametrize("chunk_size", [1, 100, 64 * 1024])
+def test_iter_json(json_serializer, body, chunk_size):
+    """The chunks form the same document as a single serialization."""
+    chunks = list(iter_json(body, json_serializer, chunk_size))
+
+    assert json.loads("".join(chunks)) == json.loads(json_serializer.dumps(body))
+    assert all(len(chunk) >= chunk_size for chunk in chunks[:-1])
+
+
+@pytest.mark.unit
+def test_iter_json_matches_buffered_batch(json_serializer):
+    """A streamed batch body is the same string as the buffered one, with every backend."""
+    items = [{"message": f"Hello, {i}!"} if i % 3 else {"error": "x"} for i in range(100)]
+    buffered = BATCH_RESPONSE_PREFIX + ",".join(map(json_serializer.dumps, items))
+    buffered += BATCH_RESPONSE_SUFFIX
+
+    assert "".join(iter_json({"results": iter(items)}, json_serializer, 1)) == buffered
+
+
+@pytest.mark.unit
+def test_iter_json_consumes_iterators_lazily(json_serializer):
+    """Iterators are encoded as arrays and consumed as the chunks are produced."""
+    consumed = []
+
+    def items():
+        for i in range(INLINE_ITEMS * 4):
+            consumed.append(i)
+            yield {"item": i, "tags": (tag for tag in ("a", "b"))}
+
+    chunks = iter_json({"results": items(), "count": 1}, json_serializer, chunk_size=1)
+    first = next(chunks)
+    assert len(consumed) <= INLINE_ITEMS
+
+    body = json.loads(first + "".join(chunks))
+    assert len(consumed) == INLINE_ITEMS * 4
+    assert body["count"] == 1
+    assert body["results"][-1] == {"item": INLINE_ITEMS * 4 - 1, "tags": ["a", "b"]}
+
+
+@pytest.mark.unit
+def test_iter_json_serializing_error(json_serializer):
+    """A value the backend can not serialize raises its error once its chunk is produced."""
+    chunks = iter_json([[1] * 10, [object()]], json_serializer, chunk_size=1)
+    with pytest.raises(json_serializer.errors):
+        list(chunks)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "event, expected",
+    [
+        ({"version": "2.0", "requestContext": {"http": {"method": "GET"}}}, True),
+        ({"httpMethod": "GET", "resource": "/hello", "requestContext": {}}, False),
+        ({"version": "2.0", "requestContext": None}, False),
+        ({}, False),
+    ],
+    ids=["function-url", "rest", "no-context", "direct"],
+)
+def test_accepts_stream(event, expected):
+    assert accepts_stream(event) is expected
@@ -0,0 +1,72 @@
+import pytest
+
+from utils.errors import InvalidQueryStringParameterError, MissingRequiredQueryStringParameterError
+from utils.validators import (
+    ROUTES,
+    VALIDATORS,
+    is_valid_name,
+    validate_get_goodbye,
+    validate_get_hello,
+)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "event, expected",
+    [
+        ({"queryStringParameters": {"name": "Test"}}, {"name": "Test"}),
+        (
+            {"queryStringParameters": {}},
+            MissingRequiredQueryStringParameterError("'name' query string parameter is required"),
+        ),
+        (
+            {"queryStringParameters": None},
+            MissingRequiredQueryStringParameterError("'name' query string parameter is required"),
+        ),
+        (
+            {"queryStringParameters": {"name1": "Test"}},
+            MissingRequiredQueryStringParameterError("'name' query string parameter is required"),
+        ),
+        (
+            {"queryStringParameters": {"name": ""}},
+            InvalidQueryStringParameterError("Invalid name provided"),
+        ),
+        (
+            {"queryStringParameters": {"name": None}},
+            InvalidQueryStringParameterError("Invalid name provided"),
+        ),
+        (
+            {"queryStringParameters": {"name": "  "}},
+            InvalidQueryStringParameterError("Invalid name provided"),
+        ),
+    ],
+)
+@pytest.mark.parametrize("validator", [validate_get_hello, validate_get_goodbye])
+def test_validate_name_query_parameter(validator, event, expected):
+    """Compiled validators check the required `name` query string parameter."""
+    if isinstance(expected, dict):
+        assert validator(event) == expected
+    else:
+        with pytest.raises(expected.__class__) as e:
+            validator(event)
+        assert str(e.value) == str(expected)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "value, expected",
+    [("Test", True), ("  Zoë ", True), ("", False), (" \t", False), (None, False), (3, False)],
+)
+def test_is_valid_name(value, expected):
+    """Values are checked against the spec's `name` schema."""
+    assert is_valid_name(value) is expected
+
+
+@pytest.mark.unit
+def test_validators_are_indexed():
+    """Validators are available by operationId and by route."""
+    assert VALIDATORS == {"getHello": validate_get_hello, "getGoodbye": validate_get_goodbye}
+    assert ROUTES == {
+        ("GET", "/hello"): validate_get_hello,
+        ("GET", "/goodbye"): validate_get_goodbye,
+    }
@@ -0,0 +1,133 @@
+import http
+import io
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from utils.cache import BodyCache
+from utils.logging import WARNING
+from utils.metrics import Metrics
+from utils.pipeline import Pipeline
+from utils.validators import validate_get_hello
+from utils.warmup import (
+    WARMER_RESPONSE,
+    WARMUP_FAILED_LOG,
+    WARMUP_LOG,
+    Warmup,
+    is_warmer_event,
+    logger,
+)
+
+SCHEDULED_EVENT = {
+    "version": "0",
+    "id": "53dc4d37-cffa-4f76-80c9-8b7d4a4d2eaa",
+    "detail-type": "Scheduled Event",
+    "source": "aws.events",
+    "resources": ["arn:aws:events:eu-west-1:123456789012:rule/warmer"],
+    "detail": {},
+}
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "event, expected",
+    [
+        ({"warmer": True}, True),
+        (SCHEDULED_EVENT, True),
+        ({"warmer": "true"}, False),
+        ({**SCHEDULED_EVENT, "source": "aws.s3"}, False),
+        ({"httpMethod": "GET", "resource": "/hello"}, False),
+        ("warmer", False),
+    ],
+    ids=["payload", "scheduled", "payload-string", "other-source", "rest", "not-a-dict"],
+)
+def test_is_warmer_event(event, expected):
+    assert is_warmer_event(event) is expected
+
+
+@pytest.mark.unit
+def test_warmup_runs_callbacks_once():
+    """Callbacks run in registration order, and only those registered since the last run."""
+    registry = Warmup()
+    calls = []
+
+    @registry.register
+    def first():
+        calls.append("first")
+
+    @registry.register
+    def second():
+        calls.append("second")
+
+    with patch.object(logger, "info") as mock_info:
+        timings = registry.run()
+        registry.run()
+    assert calls == ["first", "second"]
+    assert list(timings) == [f"{__name__}.{f.__qualname__}" for f in (first, second)]
+    mock_info.assert_called_once_with(WARMUP_LOG, timings=timings)
+
+    registry.register(lambda: calls.append("third"))
+    assert len(registry.run()) == 3
+    assert calls == ["first", "second", "third"]
+
+
+@pytest.mark.unit
+def test_warmup_skips_failing_callbacks():
+    """A failing callback is logged as a warning, the next ones still run."""
+    registry = Warmup()
+    error = ConnectionError("Could not connect to the endpoint URL")
+    callback = MagicMock(__qualname__="connect", side_effect=error)
+    registry.register(callback)
+    after = registry.register(MagicMock(__qualname__="after"))
+
+    with patch.object(logger, "exception") as mock_exception:
+        registry.run()
+    mock_exception.assert_called_once_with(WARMUP_FAILED_LOG, error, WARNING)
+    after.assert_called_once_with()
+
+
+@pytest.mark.unit
+def test_warmup_disabled():
+    registry = Warmup(enabled=False)
+    callback = registry.register(MagicMock())
+
+    assert registry.run() == {}
+    callback.assert_not_called()
+
+
+@pytest.mark.unit
+def test_pipeline_answers_warmer_events_without_routing():
+    """Warmer events reach no route, and write neither logs nor metrics."""
+    recorder = MagicMock(spec=Metrics)
+    pipeline = Pipeline(recorder=recorder)
+    produce = MagicMock()
+    pipeline.route("GET", "/hello")(produce)
+
+    with patch.object(logger, "flush") as mock_flush:
+        assert pipeline(SCHEDULED_EVENT, MagicMock()) == WARMER_RESPONSE
+    produce.assert_not_called()
+    recorder.start.assert_not_called()
+    mock_flush.assert_not_called()
+
+
+@pytest.mark.unit
+def test_pipeline_warm():
+    """Warming a route runs it without writing metrics, caching or checking the response."""
+    stream = io.StringIO()
+    recorder = Metrics(stream=stream)
+    checker = MagicMock()
+    cache = BodyCache(max_entries=10)
+    pipeline = Pipeline(checker=checker, recorder=recorder, cache=cache)
+    produce = MagicMock(return_value={"message": "Hello, World!"})
+    pipeline.route(
+        "GET", "/hello", validator=validate_get_hello, cached=True, cache_control="max-age=60"
+    )(produce)
+
+    event = {"httpMethod": "GET", "resource": "/hello", "queryStringParameters": {"name": "World"}}
+    response = pipeline.warm(event)
+    assert response["statusCode"] == http.HTTPStatus.OK
+    produce.assert_called_once_with(name="World")
+    assert stream.getvalue() == ""
+    assert recorder.cold_start
+    checker.check.assert_not_called()
+    assert len(cache) == 0
@@ -0,0 +1,163 @@
+import argparse
+import gzip
+import hashlib
+import logging
+import os
+import re
+import shutil
+import sys
+from typing import Dict
+
+import brotli
+
+HASH_LENGTH = 10
+SPEC_NAME = "bundled.yaml"
+INDEX_NAME = "index.html"
+INITIALIZER_NAME = "swagger-initializer.js"
+# Extensions worth compressing, the CloudFront viewer request function uses the same list
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".json", ".map", ".svg", ".txt", ".yaml")
+SPEC_URL_PATTERN = re.compile(r"""(\burl\s*:\s*)(["'])[^"']*\2""")
+# Relative `src` and `href` references of the index page
+ASSET_REFERENCE_PATTERN = re.compile(r"""\b(src|href)=(["'])(?:\./)?([\w.\-]+)\2""")
+
+
+def configure_logging():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+
+def hashed_name(file_path: str) -> str:
+    """
+    Name a file after its content, e.g. `swagger-ui.css` -> `swagger-ui.0123456789.css`.
+    :param file_path: File to name
+    :return: New base name
+    """
+    with open(file_path, "rb") as data:
+        digest = hashlib.sha256(data.read()).hexdigest()[:HASH_LENGTH]
+    stem, extension = os.path.splitext(os.path.basename(file_path))
+    return f"{stem}.{digest}{extension}"
+
+
+def rename_to_hashed(file_path: str) -> str:
+    """Rename a file to its content hashed name and return that name."""
+    name = hashed_name(file_path)
+    os.replace(file_path, os.path.join(os.path.dirname(file_path), name))
+    return name
+
+
+def add_hashed_spec(spec_path: str, output_dir: str) -> str:
+    """
+    Copy the spec into the output, under its content hashed name and its plain name.
+    The plain name stays available for existing links to the spec.
+    :param spec_path: Bundled OpenAPI spec
+    :param output_dir: Docs directory
+    :return: Hashed name of the spec
+    """
+    plain_path = os.path.join(output_dir, SPEC_NAME)
+    shutil.copyfile(spec_path, plain_path)
+    name = hashed_name(plain_path)
+    shutil.copyfile(spec_path, os.path.join(output_dir, name))
+    return name
+
+
+def point_initializer_to_spec(output_dir: str, spec_name: str):
+    """Replace the spec URL of the Swagger UI initializer, the petstore example by default."""
+    initializer_path = os.path.join(output_dir, INITIALIZER_NAME)
+    with open(initializer_path) as file:
+        script = file.read()
+    script, count = SPEC_URL_PATTERN.subn(rf'\g<1>"{spec_name}"', script, count=1)
+    if not count:
+        raise ValueError(f"No spec URL found in {initializer_path}")
+    with open(initializer_path, "w") as file:
+        file.write(script)
+
+
+def hash_index_assets(output_dir: str) -> Dict[str, str]:
+    """
+    Rename the assets loaded by the index page to content hashed names and update the page.
+    The index page keeps its name, it is the only file browsers have to revalidate.
+    :param output_dir: Docs directory
+    :return: Hashed name by original name
+    """
+    index_path = os.path.join(output_dir, INDEX_NAME)
+    with open(index_path) as file:
+        page = file.read()
+
+    renamed: Dict[str, str] = {}
+    for _, _, name in ASSET_REFERENCE_PATTERN.findall(page):
+        path = os.path.join(output_dir, name)
+        if name not in renamed and os.path.isfile(path):
+            renamed[name] = rename_to_hashed(path)
+
+    def replace(match: re.Match) -> str:
+        attribute, quote, name = match.groups()
+        return f"{attribute}={quote}./{renamed.get(name, name)}{quote}"
+
+    with open(index_path, "w") as file:
+        file.write(ASSET_REFERENCE_PATTERN.sub(replace, page))
+    return renamed
+
+
+def compress_assets(output_dir: str) -> int:
+    """
+    Write gzip (`.gz`) and brotli (`.br`) variants next to every compressible file.
+    Compression is deterministic, so unchanged files keep their ETags between builds.
+    :param output_dir: Docs directory
+    :return: Number of files compressed
+    """
+    count = 0
+    for root, _, filenames in os.walk(output_dir):
+        for filename in filenames:
+            if not filename.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            path = os.path.join(root, filename)
+            with open(path, "rb") as file:
+                data = file.read()
+            with open(f"{path}.gz", "wb") as file:
+                file.write(gzip.compress(data, compresslevel=9, mtime=0))
+            with open(f"{path}.br", "wb") as file:
+                file.write(brotli.compress(data, quality=11))
+            count += 1
+    return count
+
+
+def build_docs(dist_path: str, spec_path: str, output_dir: str) -> Dict[str, str]:
+    """
+    Build the docs site: Swagger UI pointing at the spec, with content hashed assets and
+    precompressed variants of the text files.
+    :param dist_path: Swagger UI `dist` directory
+    :param spec_path: Bundled OpenAPI spec
+    :param output_dir: Directory to build into, replaced if it exists
+    :return: Hashed name by original name, spec included
+    """
+    shutil.rmtree(output_dir, ignore_errors=True)
+    shutil.copytree(dist_path, output_dir)
+
+    spec_name = add_hashed_spec(spec_path, output_dir)
+    point_initializer_to_spec(output_dir, spec_name)
+    renamed = {SPEC_NAME: spec_name, **hash_index_assets(output_dir)}
+    count = compress_assets(output_dir)
+
+    for name, new_name in renamed.items():
+        logging.info(f"Renamed '{name}' to '{new_name}'")
+    logging.info(f"Built docs into '{output_dir}', {count} files compressed")
+    return renamed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build the docs site from Swagger UI and the bundled API spec."
+    )
+    parser.add_argument("dist_path", help="Swagger UI dist directory")
+    parser.add_argument("spec_path", help="Bundled OpenAPI spec")
+    parser.add_argument("output_dir", help="Directory to build into, replaced if it exists")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.dist_path):
+        sys.exit(f"Directory not found: {args.dist_path}")
+
+    build_docs(args.dist_path, args.spec_path, args.output_dir)
+
+
+if __name__ == "__main__":
+    configure_logging()
+    main()
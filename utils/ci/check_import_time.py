@@ -0,0 +1,126 @@
+import argparse
+import logging
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, NamedTuple
+
+import toml
+
+IMPORT_TIME_PREFIX = "import time:"
+
+
+class ImportRecord(NamedTuple):
+    """A line of a `-X importtime` profile."""
+
+    name: str
+    depth: int
+    self_us: int
+    cumulative_us: int
+
+
+class ImportProfile(NamedTuple):
+    """Modules imported, directly or not, by importing a target module."""
+
+    module: str
+    cumulative_ms: float
+    records: List[ImportRecord]
+
+
+def parse_import_time(output: str) -> List[ImportRecord]:
+    """Parse the stderr of `python -X importtime`."""
+    records = []
+    for line in output.splitlines():
+        if not line.startswith(IMPORT_TIME_PREFIX):
+            continue
+        self_us, cumulative_us, name = line.removeprefix(IMPORT_TIME_PREFIX).split("|")
+        if not self_us.strip().isdigit():
+            # Header line
+            continue
+        # The name is indented by two spaces per nesting level, after a single separator space
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        records.append(ImportRecord(name.strip(), depth, int(self_us), int(cumulative_us)))
+    return records
+
+
+def profile_import(module: str, cwd: str) -> ImportProfile:
+    """Import a module in a fresh interpreter and keep the part of the profile it caused."""
+    python_path = os.pathsep.join(filter(None, [cwd, os.getenv("PYTHONPATH")]))
+    env = {**os.environ, "PYTHONPATH": python_path}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    records = parse_import_time(result.stderr)
+
+    # Children are listed before their parent, the subtree of the target is the run of nested
+    # records right before its own top level record
+    for index in range(len(records) - 1, -1, -1):
+        if records[index].name == module and records[index].depth == 0:
+            break
+    else:
+        raise RuntimeError(f"Module '{module}' not found in the import time profile.")
+    start = index
+    while start > 0 and records[start - 1].depth > 0:
+        start -= 1
+    end = index + 1
+    return ImportProfile(module, records[index].cumulative_us / 1000, records[start:end])
+
+
+def check_budgets(config: Dict, cwd: str, top: int) -> bool:
+    """
+    Profile every configured module and compare it with its budget. Only the number of modules
+    imported is enforced, import times over their target are logged as warnings.
+    :param config: `tool.import_budget` section
+    :param cwd: Directory the modules are imported from
+    :param top: Number of slowest modules reported per target
+    :return: True if every module count budget is met
+    """
+    runs = config.get("runs", 5)
+    success = True
+    for module, budget in config.get("modules", {}).items():
+        profiles = [profile_import(module, cwd) for _ in range(runs)]
+        median_ms = statistics.median(profile.cumulative_ms for profile in profiles)
+        module_count = max(len(profile.records) for profile in profiles)
+
+        logging.info(f"{module}: {median_ms:.1f}ms (median of {runs}), {module_count} modules")
+        slowest = sorted(profiles[-1].records, key=lambda record: -record.self_us)[:top]
+        for record in slowest:
+            logging.info(f"    {record.self_us / 1000:6.2f}ms self  {record.name}")
+
+        # Wall-clock time varies too much on shared runners to fail a build, it is reported
+        if "max_ms" in budget and median_ms > budget["max_ms"]:
+            logging.warning(f"{module}: {median_ms:.1f}ms exceeds the {budget['max_ms']}ms target")
+        if "max_modules" in budget and module_count > budget["max_modules"]:
+            logging.error(
+                f"{module}: {module_count} modules exceed the "
+                f"{budget['max_modules']} modules budget"
+            )
+            success = False
+    return success
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    parser = argparse.ArgumentParser(
+        description="Check the import time of the lambdas and layer against their budgets."
+    )
+    parser.add_argument(
+        "--config", default="pyproject.toml", help="File with a [tool.import_budget] section"
+    )
+    parser.add_argument("--top", type=int, default=5, help="Slowest modules reported per target")
+    args = parser.parse_args()
+
+    config = toml.load(args.config).get("tool", {}).get("import_budget", {})
+    cwd = os.path.dirname(os.path.abspath(args.config))
+    if not check_budgets(config, cwd, args.top):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
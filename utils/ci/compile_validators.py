@@ -0,0 +1,431 @@
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import yaml
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SPEC_PATH = os.path.join(ROOT_DIR, "aws", "api", "v1", "api-spec", "bundled.yaml")
+OUTPUT_PATH = os.path.join(
+    ROOT_DIR, "aws", "api", "v1", "src", "layers", "utils_layer", "utils", "validators.py"
+)
+# The layer module, and its mirror imported from the repository root by the tests
+OUTPUT_PATHS = (OUTPUT_PATH, os.path.join(ROOT_DIR, "utils", "validators", "__init__.py"))
+HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch")
+COMPONENT_PREFIX = "#/components/schemas/"
+JSON_CONTENT_TYPE = "application/json"
+# Parameter locations accepted in the spec, only query parameters are validated
+PARAMETER_LOCATIONS = ("query", "header")
+# isinstance checks of the JSON types, booleans are ints in Python
+TYPE_CONDITIONS = {
+    "object": "isinstance({var}, dict)",
+    "array": "isinstance({var}, list)",
+    "string": "isinstance({var}, str)",
+    "integer": "isinstance({var}, int) and not isinstance({var}, bool)",
+    "number": "isinstance({var}, (int, float)) and not isinstance({var}, bool)",
+    "boolean": "isinstance({var}, bool)",
+}
+INDENT = "    "
+MAX_LINE_LENGTH = 100
+
+HEADER = '''"""
+Request validators and response checkers compiled from the OpenAPI spec.
+
+Generated by utils/ci/compile_validators.py from aws/api/v1/api-spec/bundled.yaml, do not edit.
+Every parameter is checked in a single pass with plain Python expressions, no schema is
+interpreted at request time. Response checkers return the first violation of a body, as a
+`$.path: problem` string, or None.
+"""
+import re
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from utils.errors import (
+    INVALID_QUERY_PARAMETER_ERROR,
+    REQUIRED_QUERY_PARAMETER_ERROR,
+    InvalidQueryStringParameterError,
+    MissingRequiredQueryStringParameterError,
+)
+'''
+
+
+def configure_logging():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+
+def snake_case(name: str) -> str:
+    """Convert an operation or schema name, e.g. `getHello` -> `get_hello`."""
+    name = re.sub(r"[^0-9a-zA-Z]+", "_", name)
+    return re.sub(r"(?<=[a-z0-9])(?=[A-Z])", "_", name).strip("_").lower()
+
+
+def literal(value) -> str:
+    """Python literal of a JSON value, strings in double quotes."""
+    if isinstance(value, str):
+        return json.dumps(value)
+    if isinstance(value, (list, tuple)):
+        items = [literal(item) for item in value]
+        return f"({', '.join(items)}{',' if len(items) == 1 else ''})"
+    return repr(value)
+
+
+def pattern_literal(pattern: str) -> str:
+    """Raw string literal of a regular expression, when it can be written as one."""
+    if '"' in pattern or pattern.endswith("\\") or "\n" in pattern:
+        return literal(pattern)
+    return f'r"{pattern}"'
+
+
+def join_conditions(keyword: str, conditions: List[str], indent: str) -> List[str]:
+    """
+    Lines of `<keyword> (<conditions joined by and>)`, split one condition per line when long.
+    :param keyword: Statement opening, e.g. `if not` or `return bool`
+    :param conditions: Boolean expressions
+    :param indent: Indentation of the statement
+    :return: Source lines
+    """
+    suffix = ":" if keyword.startswith("if") else ""
+    if suffix and len(conditions) == 1:
+        line = f"{indent}{keyword}{conditions[0]}{suffix}"
+    else:
+        line = f"{indent}{keyword}({' and '.join(conditions)}){suffix}"
+    if len(line) <= MAX_LINE_LENGTH:
+        return [line]
+    lines = [f"{indent}{keyword}(", f"{indent}{INDENT}{conditions[0]}"]
+    lines += [f"{indent}{INDENT}and {condition}" for condition in conditions[1:]]
+    return lines + [f"{indent}){suffix}"]
+
+
+def resolve(spec: Dict, schema: Dict) -> Tuple[Optional[str], Dict]:
+    """
+    Follow a local component reference.
+    :param spec: Bundled OpenAPI spec
+    :param schema: Schema, or `$ref` to a component schema
+    :return: Component name, if the schema is a reference, and the resolved schema
+    """
+    ref = schema.get("$ref")
+    if not ref:
+        return None, schema
+    if not ref.startswith(COMPONENT_PREFIX):
+        raise ValueError(f"Only local component references are supported, got '{ref}'")
+    name = ref.removeprefix(COMPONENT_PREFIX)
+    return name, spec["components"]["schemas"][name]
+
+
+class ValidatorCompiler:
+    """Turn the parameter schemas of a bundled OpenAPI spec into Python source."""
+
+    def __init__(self, spec: Dict):
+        self.spec = spec
+        self.patterns: Dict[str, str] = {}
+        self.messages: Dict[str, Tuple[str, str]] = {}
+
+    def pattern_constant(self, pattern: str) -> str:
+        """Name of the module constant holding a compiled pattern."""
+        if pattern not in self.patterns:
+            self.patterns[pattern] = f"_PATTERN_{len(self.patterns)}"
+        return self.patterns[pattern]
+
+    def message_constants(self, parameter: str) -> Tuple[str, str]:
+        """Names of the module constants holding a parameter's error messages."""
+        if parameter not in self.messages:
+            prefix = f"_{snake_case(parameter).upper()}"
+            self.messages[parameter] = (f"{prefix}_REQUIRED", f"{prefix}_INVALID")
+        return self.messages[parameter]
+
+    def conditions(self, var: str, schema: Dict) -> List[str]:
+        """
+        Boolean expressions all true when a value matches a schema.
+        :param var: Variable holding the value, already converted to the schema type
+        :param schema: Resolved schema
+        :return: Expressions, cheapest first
+        """
+        schema_type = schema.get("type", "string")
+        conditions = []
+        if schema_type == "string":
+            conditions.append(f"isinstance({var}, str)")
+            if "minLength" in schema:
+                conditions.append(f"len({var}) >= {int(schema['minLength'])}")
+            if "maxLength" in schema:
+                conditions.append(f"len({var}) <= {int(schema['maxLength'])}")
+        elif schema_type not in ("integer", "number", "boolean"):
+            raise ValueError(f"Unsupported parameter type '{schema_type}'")
+        if "minimum" in schema:
+            conditions.append(f"{var} >= {schema['minimum']!r}")
+        if "maximum" in schema:
+            conditions.append(f"{var} <= {schema['maximum']!r}")
+        if "enum" in schema:
+            conditions.append(f"{var} in {literal(schema['enum'])}")
+        if "pattern" in schema:
+            conditions.append(f"{self.pattern_constant(schema['pattern'])}.search({var})")
+        return conditions
+
+    def schema_function(self, name: str, schema: Dict) -> List[str]:
+        """Source of the `is_valid_<name>` function of a component schema."""
+        return [
+            "",
+            "",
+            f"def is_valid_{snake_case(name)}(value: Any) -> bool:",
+            f'{INDENT}"""Check a value against the `{name}` schema."""',
+            *join_conditions("return bool", self.conditions("value", schema), INDENT),
+        ]
+
+    def parameter_lines(self, parameter: Dict) -> List[str]:
+        """Source validating one query parameter and storing it in the keyword arguments."""
+        name = parameter["name"]
+        if not name.isidentifier():
+            raise ValueError(f"Parameter '{name}' is not a valid Python identifier")
+        _, schema = resolve(self.spec, parameter.get("schema", {}))
+        required, invalid = self.message_constants(name)
+        schema_type = schema.get("type", "string")
+        var = snake_case(name)
+
+        lines = [f'if "{name}" in query:', f'{INDENT}{var} = query["{name}"]']
+        if schema_type == "integer" or schema_type == "number":
+            converter = "int" if schema_type == "integer" else "float"
+            lines += [
+                f"{INDENT}try:",
+                f"{INDENT * 2}{var} = {converter}({var})",
+                f"{INDENT}except (TypeError, ValueError):",
+                f"{INDENT * 2}raise InvalidQueryStringParameterError({invalid}) from None",
+            ]
+        elif schema_type == "boolean":
+            lines += [
+                f'{INDENT}if {var} not in ("true", "false"):',
+                f"{INDENT * 2}raise InvalidQueryStringParameterError({invalid})",
+                f'{INDENT}{var} = {var} == "true"',
+            ]
+        conditions = self.conditions(var, schema)
+        if conditions and schema_type != "boolean":
+            lines += join_conditions("if not ", conditions, INDENT)
+            lines.append(f"{INDENT * 2}raise InvalidQueryStringParameterError({invalid})")
+        lines.append(f'{INDENT}kwargs["{name}"] = {var}')
+
+        if parameter.get("required"):
+            lines.append("else:")
+            lines.append(f"{INDENT}raise MissingRequiredQueryStringParameterError({required})")
+        elif "default" in schema:
+            lines += ["else:", f'{INDENT}kwargs["{name}"] = {literal(schema["default"])}']
+        return lines
+
+    def operation_function(self, method: str, path: str, operation: Dict) -> Tuple[str, List[str]]:
+        """Name and source of the validator of an operation."""
+        function_name = f"validate_{snake_case(operation['operationId'])}"
+        parameters = [p for p in operation.get("parameters", []) if p.get("in") == "query"]
+        # Headers (e.g. If-None-Match) are handled by the pipeline, producers never see them
+        unsupported = [
+            p["name"]
+            for p in operation.get("parameters", [])
+            if p.get("in") not in PARAMETER_LOCATIONS
+        ]
+        if unsupported:
+            raise ValueError(f"Only query parameters are supported, got {unsupported}")
+
+        body = ["kwargs: Dict[str, Any] = {}"]
+        if parameters:
+            body.insert(0, 'query = event.get("queryStringParameters") or {}')
+        for parameter in parameters:
+            body += self.parameter_lines(parameter)
+        body.append("return kwargs")
+
+        lines = [
+            "",
+            "",
+            f"def {function_name}(event: Dict) -> Dict[str, Any]:",
+            f'{INDENT}"""',
+            f"{INDENT}Validate the request of the {operation['operationId']} operation "
+            f"({method.upper()} {path}).",
+            f"{INDENT}:param event: Lambda event data",
+            f"{INDENT}:return: Keyword arguments for the body producer",
+            f'{INDENT}"""',
+        ]
+        lines += [f"{INDENT}{line}" for line in body]
+        return function_name, lines
+
+    def body_checks(self, var: str, path: str, schema: Dict, depth: int = 0) -> List[str]:
+        """
+        Statements returning the first violation of a schema by a response body value.
+        :param var: Variable holding the value
+        :param path: JSON path of the value, for the violation message
+        :param schema: Schema, or `$ref` to a component schema
+        :param depth: Nesting level, used to name loop and property variables
+        :return: Source lines, at the indentation of the caller
+        """
+        name, schema = resolve(self.spec, schema)
+        if name is not None:
+            return [
+                f"violation = check_{snake_case(name)}({var})",
+                "if violation is not None:",
+                f"{INDENT}return {literal(path)} + violation[1:]",
+            ]
+        if "oneOf" in schema:
+            refs = [resolve(self.spec, option)[0] for option in schema["oneOf"]]
+            names = [name for name in refs if name is not None]
+            if len(names) != len(refs):
+                raise ValueError("Only component references are supported in oneOf")
+            checks = [f"check_{snake_case(name)}({var}) is not None" for name in names]
+            return [
+                f"if {' and '.join(checks)}:",
+                f"{INDENT}return {literal(f'{path}: matches none of {names}')}",
+            ]
+
+        schema_type = schema.get("type")
+        if schema_type not in TYPE_CONDITIONS:
+            return []
+        if schema_type == "string":
+            conditions = self.conditions(var, schema)
+        else:
+            condition = TYPE_CONDITIONS[schema_type].format(var=var)
+            conditions = [f"({condition})" if " and " in condition else condition]
+        problem = f"expected {schema_type}" if len(conditions) == 1 else f"invalid {schema_type}"
+        lines = join_conditions("if not ", conditions, "")
+        lines.append(f"{INDENT}return {literal(f'{path}: {problem}')}")
+
+        if schema_type == "object":
+            required = schema.get("required", [])
+            for key in required:
+                lines += [
+                    f"if {literal(key)} not in {var}:",
+                    f"{INDENT}return {literal(f'{path}.{key}: required')}",
+                ]
+            for key, property_schema in schema.get("properties", {}).items():
+                value = f"value_{depth}"
+                checks = self.body_checks(value, f"{path}.{key}", property_schema, depth + 1)
+                if not checks:
+                    continue
+                # Required properties are known to be present at this point
+                assignment = f"{value} = {var}[{literal(key)}]"
+                if key in required:
+                    lines += [assignment] + checks
+                else:
+                    lines += [f"if {literal(key)} in {var}:", f"{INDENT}{assignment}"]
+                    lines += [f"{INDENT}{line}" for line in checks]
+        elif schema_type == "array" and "items" in schema:
+            item = f"item_{depth}"
+            checks = self.body_checks(item, f"{path}[]", schema["items"], depth + 1)
+            if checks:
+                lines.append(f"for {item} in {var}:")
+                lines += [f"{INDENT}{line}" for line in checks]
+        return lines
+
+    def check_function(self, function_name: str, description: str, schema: Dict) -> List[str]:
+        """Source of a response checker."""
+        lines = [
+            "",
+            "",
+            f"def {function_name}(body: Any) -> Optional[str]:",
+            f'{INDENT}"""Find the first violation of {description}."""',
+        ]
+        lines += [f"{INDENT}{line}" for line in self.body_checks("body", "$", schema)]
+        return lines + [f"{INDENT}return None"]
+
+    def compile(self) -> str:
+        """Generate the validators module."""
+        functions: List[str] = []
+        for name, schema in self.spec.get("components", {}).get("schemas", {}).items():
+            if schema.get("type") == "string":
+                functions += self.schema_function(name, schema)
+            functions += self.check_function(
+                f"check_{snake_case(name)}", f"the `{name}` schema", schema
+            )
+
+        validators, routes, responses = [], [], []
+        for path, path_item in self.spec.get("paths", {}).items():
+            for method in HTTP_METHODS:
+                operation = path_item.get(method)
+                if not operation:
+                    continue
+                route = f'"{method.upper()}", "{path}"'
+                for status, response in operation.get("responses", {}).items():
+                    schema = response.get("content", {}).get(JSON_CONTENT_TYPE, {}).get("schema")
+                    if not schema or not str(status).isdigit():
+                        continue
+                    name, _ = resolve(self.spec, schema)
+                    if name is None:
+                        name = f"{operation['operationId']}_{status}_response"
+                        description = f"the {operation['operationId']} {status} response schema"
+                        functions += self.check_function(
+                            f"check_{snake_case(name)}", description, schema
+                        )
+                    responses.append(f"{INDENT}({route}, {status}): check_{snake_case(name)},")
+
+                if not operation.get("parameters"):
+                    continue
+                function_name, lines = self.operation_function(method, path, operation)
+                functions += lines
+                validators.append(f'{INDENT}"{operation["operationId"]}": {function_name},')
+                routes.append(f"{INDENT}({route}): {function_name},")
+
+        constants = [
+            f"{constant} = re.compile({pattern_literal(pattern)})"
+            for pattern, constant in self.patterns.items()
+        ]
+        for name, (required, invalid) in self.messages.items():
+            constants += [
+                f'{required} = REQUIRED_QUERY_PARAMETER_ERROR.format("{name}")',
+                f'{invalid} = INVALID_QUERY_PARAMETER_ERROR.format("{name}")',
+            ]
+
+        lines = [HEADER, *constants]
+        lines += functions
+        lines += ["", "", "# Validators by operationId", "VALIDATORS: Dict[str, Callable] = {"]
+        lines += validators + ["}"]
+        lines += ["# Validators by method and API Gateway resource path"]
+        lines += ["ROUTES: Dict[Tuple[str, str], Callable] = {"] + routes + ["}"]
+        lines += ["# Response checkers by method, API Gateway resource path and status code"]
+        lines += ["RESPONSES: Dict[Tuple[str, str, int], Callable] = {"] + responses + ["}"]
+        return "\n".join(lines) + "\n"
+
+
+def compile_validators(spec_path: str = SPEC_PATH) -> str:
+    """
+    Compile the request validators of a bundled OpenAPI spec.
+    :param spec_path: Bundled OpenAPI spec
+    :return: Source of the validators module
+    """
+    with open(spec_path) as file:
+        spec = yaml.safe_load(file)
+    return ValidatorCompiler(spec).compile()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compile the OpenAPI spec into request validators for the lambdas."
+    )
+    parser.add_argument("--spec", default=SPEC_PATH, help="Bundled OpenAPI spec")
+    parser.add_argument(
+        "--output",
+        action="append",
+        help="Validators module to write, repeatable (default: the layer module and its mirror)",
+    )
+    parser.add_argument(
+        "--check", action="store_true", help="Fail if a module is not up to date with the spec"
+    )
+    args = parser.parse_args()
+
+    source = compile_validators(args.spec)
+    outputs = args.output or OUTPUT_PATHS
+    if args.check:
+        outdated = []
+        for output in outputs:
+            with open(output) as file:
+                if file.read() != source:
+                    outdated.append(output)
+        if outdated:
+            logging.error(f"{outdated} out of date, run utils/ci/compile_validators.py")
+            sys.exit(1)
+        logging.info(f"{list(outputs)} up to date")
+        return
+
+    for output in outputs:
+        with open(output, "w") as file:
+            file.write(source)
+        logging.info(f"Wrote validators to {output}")
+
+
+if __name__ == "__main__":
+    configure_logging()
+    main()
@@ -2,11 +2,14 @@ import argparse
 import json
 import logging
 import os
-import subprocess
-from typing import Optional
+import time
+from typing import Dict, List, Optional, Tuple
 
+import boto3
 import toml
 
+DEFAULT_CACHE_TTL_SECONDS = 300
+
 
 class Configuration:
     """Handle configuration related operations."""
@@ -27,77 +30,131 @@ class Configuration:
             logging.error(f"Failed to load configuration file: {self.config_file_path}")
             raise RuntimeError("Could not load the configuration file.") from e
 
+    @property
+    def deploy_parameters(self) -> Dict:
+        """Retrieve the deploy parameters from the configuration."""
+        return self.data.get("default", {}).get("deploy", {}).get("parameters", {})
+
     @property
     def stack_name(self) -> Optional[str]:
         """Retrieve stack name from the configuration."""
-        stack_name = (
-            self.data.get("default", {}).get("deploy", {}).get("parameters", {}).get("stack_name")
-        )
+        stack_name = self.deploy_parameters.get("stack_name")
         if not stack_name:
             raise ValueError("Stack name not found in the configuration.")
         return stack_name
 
+    @property
+    def region(self) -> Optional[str]:
+        """Retrieve the stack region from the configuration, if set."""
+        return self.deploy_parameters.get("region")
+
+
+class OutputCache:
+    """Stack outputs stored on disk, one JSON file per stack, valid for a limited time."""
+
+    def __init__(self, directory: str, ttl: float = DEFAULT_CACHE_TTL_SECONDS):
+        self.directory = directory
+        self.ttl = ttl
+
+    def path(self, stack_name: str) -> str:
+        return os.path.join(self.directory, f"{stack_name}.json")
+
+    def get(self, stack_name: str) -> Optional[Dict[str, str]]:
+        """Return the cached outputs of a stack, unless missing, unreadable or expired."""
+        try:
+            with open(self.path(stack_name)) as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get("fetched_at", 0) > self.ttl:
+            return None
+        return entry.get("outputs")
+
+    def set(self, stack_name: str, outputs: Dict[str, str]):
+        """Store the outputs of a stack."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path(stack_name), "w") as file:
+            json.dump({"fetched_at": time.time(), "outputs": outputs}, file)
+
 
 class AWSStack:
     """Handle AWS Stack operations."""
 
-    def __init__(self, stack_name: str):
+    def __init__(
+        self,
+        stack_name: str,
+        cloudformation=None,
+        cache: Optional[OutputCache] = None,
+        region: Optional[str] = None,
+    ):
         if not stack_name:
             raise ValueError("Stack name must not be empty.")
         self.stack_name = stack_name
+        self.cloudformation = cloudformation or boto3.client("cloudformation", region_name=region)
+        self.cache = cache
+        self._outputs: Optional[Dict[str, str]] = None
 
     def fetch_output(self) -> list:
-        """Fetch the stack output by invoking the AWS CLI."""
+        """Fetch the stack output with a single DescribeStacks call."""
         try:
-            output = subprocess.check_output(
-                [
-                    "aws",
-                    "cloudformation",
-                    "describe-stacks",
-                    "--stack-name",
-                    self.stack_name,
-                    "--query",
-                    "Stacks[0].Outputs",
-                    "--output",
-                    "json",
-                ],
-                stderr=subprocess.STDOUT,
-            )
-            return json.loads(output)
+            response = self.cloudformation.describe_stacks(StackName=self.stack_name)
+            return response["Stacks"][0].get("Outputs", [])
         except Exception as e:
             logging.error("Failed to fetch stack outputs.")
             raise RuntimeError("Could not fetch the stack outputs.") from e
 
+    @property
+    def outputs(self) -> Dict[str, str]:
+        """Stack output values by key, fetched once and shared with the cache."""
+        if self._outputs is None:
+            outputs = self.cache.get(self.stack_name) if self.cache else None
+            if outputs is None:
+                outputs = {item["OutputKey"]: item["OutputValue"] for item in self.fetch_output()}
+                if self.cache:
+                    self.cache.set(self.stack_name, outputs)
+            self._outputs = outputs
+        return self._outputs
+
     def find_output_value(self, output_key: str) -> Optional[str]:
         """Find the value of the given output key in the stack output."""
-        output = self.fetch_output()
-        return next(
-            (item["OutputValue"] for item in output if item["OutputKey"] == output_key),
-            None,
+        return self.outputs.get(output_key)
+
+
+def parse_pair(value: str) -> Tuple[str, str]:
+    """Split an `output_key=var_name` argument."""
+    output_key, separator, var_name = value.partition("=")
+    if not separator or not output_key or not var_name:
+        raise argparse.ArgumentTypeError(
+            f"Expected 'output_key=var_name', got '{value}'. Both names are required."
         )
+    return output_key, var_name
 
 
-def parse_arguments():
+def parse_arguments(argv: Optional[List[str]] = None):
     """Parse and validate command line arguments."""
     parser = argparse.ArgumentParser(
-        description="Extract a specific variable from AWS Stack Information."
+        description="Extract variables from AWS Stack Information, with a single stack lookup."
     )
     parser.add_argument(
-        "output_key",
-        help="The output key to extract from the stack information.",
+        "pairs",
+        nargs="+",
+        type=parse_pair,
+        metavar="output_key=var_name",
+        help="Output key to extract from the stack information, and the variable name to be "
+        "saved in GitHub",
     )
     parser.add_argument(
-        "var_name",
-        help="The variable name to be saved in GitHub",
+        "--cache-dir",
+        default=os.getenv("STACK_OUTPUT_CACHE_DIR"),
+        help="Directory caching the stack outputs between runs (default: no cache)",
     )
-    args = parser.parse_args()
-
-    if not args.output_key or not isinstance(args.output_key, str):
-        raise argparse.ArgumentTypeError("Output key is required and must be a string.")
-    if not args.var_name or not isinstance(args.var_name, str):
-        raise argparse.ArgumentTypeError("Variable name is required and must be a string.")
-
-    return args
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=DEFAULT_CACHE_TTL_SECONDS,
+        help="Seconds the cached outputs stay valid",
+    )
+    return parser.parse_args(argv)
 
 
 def main():
@@ -106,14 +163,19 @@ def main():
 
     try:
         config = Configuration(os.getenv("CONFIG_FILE_PATH"))
-        stack = AWSStack(config.stack_name)
-        output_value = stack.find_output_value(args.output_key)
-
-        if output_value is None:
-            logging.warning(f"Output key '{args.output_key}' not found in the stack " "outputs.")
-        else:
-            with open(os.getenv("GITHUB_ENV"), "a") as file:
-                file.write(f"{args.var_name}={output_value}\n")
+        cache = OutputCache(args.cache_dir, args.cache_ttl) if args.cache_dir else None
+        stack = AWSStack(config.stack_name, cache=cache, region=config.region)
+
+        lines = []
+        for output_key, var_name in args.pairs:
+            output_value = stack.find_output_value(output_key)
+            if output_value is None:
+                logging.warning(f"Output key '{output_key}' not found in the stack outputs.")
+            else:
+                lines.append(f"{var_name}={output_value}\n")
+
+        with open(os.getenv("GITHUB_ENV"), "a") as file:
+            file.writelines(lines)
     except Exception as e:
         logging.error(f"An error occurred: {e}")
         exit(1)
@@ -0,0 +1,198 @@
+import argparse
+import logging
+import os
+import sys
+from typing import Dict, List, NamedTuple, Optional
+
+import yaml
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SPEC_PATH = os.path.join(ROOT_DIR, "aws", "api", "v1", "api-spec", "bundled.yaml")
+TEMPLATE_PATH = os.path.join(ROOT_DIR, "aws", "api", "v1", "template.yaml")
+HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch")
+CACHE_EXTENSION = "x-cache"
+CLUSTER_SIZE_EXTENSION = "x-cache-cluster-size"
+INTEGRATION_EXTENSION = "x-amazon-apigateway-integration"
+# Cache cluster sizes in GB accepted by API Gateway
+CLUSTER_SIZES = ("0.5", "1.6", "6.1", "13.5", "28.4", "58.2", "118", "237")
+MAX_TTL_SECONDS = 3600
+PARAMETER_PREFIXES = {"query": "method.request.querystring.", "header": "method.request.header."}
+# Headers the lambdas answer differently for, a cached method declaring one must key on it
+# (a 304 cached without it would answer unconditional requests)
+VARYING_HEADERS = ("If-None-Match",)
+# Template condition enabling the stage cache, a cache cluster is billed by the hour
+CACHE_CONDITION = "StageCacheEnabled"
+
+BEGIN_MARKER = "# BEGIN cache settings, generated by utils/ci/generate_cache_settings.py"
+END_MARKER = "# END cache settings"
+
+
+class MethodCache(NamedTuple):
+    """Stage cache settings of one method."""
+
+    path: str
+    method: str
+    ttl: int
+    key_parameters: List[str]
+
+
+class CacheSettings(NamedTuple):
+    """Stage cache settings declared in the spec."""
+
+    cluster_size: Optional[str]
+    methods: List[MethodCache]
+
+
+def configure_logging():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+
+def resource_path(path: str) -> str:
+    """Escape an API path for MethodSettings, e.g. `/hello/batch` -> `/~1hello~1batch`."""
+    return "/" + path.replace("~", "~0").replace("/", "~1")
+
+
+def read_cache_settings(spec: Dict) -> CacheSettings:
+    """
+    Collect the stage cache settings of a bundled OpenAPI spec.
+
+    Methods opt in with an `x-cache` object holding `ttlInSeconds`, next to the
+    `cacheKeyParameters` of their API Gateway integration. Every key parameter must be a declared
+    request parameter, otherwise API Gateway would share one entry between different requests,
+    and declared `VARYING_HEADERS` must be keys.
+    :param spec: Bundled OpenAPI spec
+    :return: Cache settings
+    """
+    methods = []
+    for path, path_item in spec.get("paths", {}).items():
+        for method in HTTP_METHODS:
+            operation = path_item.get(method)
+            if not operation or CACHE_EXTENSION not in operation:
+                continue
+            name = f"{method.upper()} {path}"
+            ttl = operation[CACHE_EXTENSION].get("ttlInSeconds")
+            if not isinstance(ttl, int) or not 0 < ttl <= MAX_TTL_SECONDS:
+                raise ValueError(f"{name}: ttlInSeconds must be between 1 and {MAX_TTL_SECONDS}")
+
+            declared = {
+                PARAMETER_PREFIXES[parameter["in"]] + parameter["name"]
+                for parameter in operation.get("parameters", [])
+                if parameter.get("in") in PARAMETER_PREFIXES
+            }
+            keys = operation.get(INTEGRATION_EXTENSION, {}).get("cacheKeyParameters", [])
+            undeclared = [key for key in keys if key not in declared]
+            if undeclared:
+                raise ValueError(f"{name}: cache key parameters {undeclared} are not declared")
+            if declared and not keys:
+                raise ValueError(f"{name}: a cached method with parameters needs cache keys")
+            unkeyed = [
+                header
+                for header in VARYING_HEADERS
+                if PARAMETER_PREFIXES["header"] + header in declared
+                and PARAMETER_PREFIXES["header"] + header not in keys
+            ]
+            if unkeyed:
+                raise ValueError(f"{name}: headers {unkeyed} must be cache key parameters")
+            methods.append(MethodCache(path, method.upper(), ttl, keys))
+
+    cluster_size = spec.get(CLUSTER_SIZE_EXTENSION)
+    if cluster_size is not None:
+        cluster_size = str(cluster_size)
+        if cluster_size not in CLUSTER_SIZES:
+            raise ValueError(f"Cache cluster size must be one of {CLUSTER_SIZES}")
+    if methods and cluster_size is None:
+        raise ValueError(f"Cached methods need an {CLUSTER_SIZE_EXTENSION}")
+    return CacheSettings(cluster_size, methods)
+
+
+def render(settings: CacheSettings, indent: str) -> List[str]:
+    """
+    Render the cache properties of an `AWS::Serverless::Api` resource, enabled by the
+    `CACHE_CONDITION` of the template.
+    :param settings: Cache settings
+    :param indent: Indentation of the resource properties
+    :return: YAML lines, markers included
+    """
+    lines = [f"{indent}{BEGIN_MARKER}"]
+    if settings.methods:
+        enabled = f"!If [{CACHE_CONDITION}, true, false]"
+        lines += [
+            f"{indent}CacheClusterEnabled: {enabled}",
+            f'{indent}CacheClusterSize: !If [{CACHE_CONDITION}, "{settings.cluster_size}", '
+            "!Ref AWS::NoValue]",
+            f"{indent}MethodSettings:",
+        ]
+        for method in settings.methods:
+            lines += [
+                f"{indent}  - ResourcePath: {resource_path(method.path)}",
+                f"{indent}    HttpMethod: {method.method}",
+                f"{indent}    CachingEnabled: {enabled}",
+                f"{indent}    CacheTtlInSeconds: {method.ttl}",
+            ]
+    else:
+        lines.append(f"{indent}CacheClusterEnabled: false")
+    return lines + [f"{indent}{END_MARKER}"]
+
+
+def update_template(template: str, settings: CacheSettings) -> str:
+    """
+    Replace the generated block of a SAM template.
+    :param template: Template source, with the begin and end markers
+    :param settings: Cache settings
+    :return: Updated template source
+    """
+    lines = template.splitlines()
+    begin = next((i for i, line in enumerate(lines) if line.strip() == BEGIN_MARKER), None)
+    end = next((i for i, line in enumerate(lines) if line.strip() == END_MARKER), None)
+    if begin is None or end is None or end < begin:
+        raise ValueError("The template has no generated cache settings block")
+    width = len(lines[begin]) - len(lines[begin].lstrip())
+    after = end + 1
+    lines[begin:after] = render(settings, lines[begin][:width])
+    return "\n".join(lines) + "\n"
+
+
+def generate_cache_settings(spec_path: str = SPEC_PATH, template_path: str = TEMPLATE_PATH) -> str:
+    """
+    Generate the template with the cache settings of the spec.
+    :param spec_path: Bundled OpenAPI spec
+    :param template_path: SAM template
+    :return: Updated template source
+    """
+    with open(spec_path) as file:
+        spec = yaml.safe_load(file)
+    with open(template_path) as file:
+        template = file.read()
+    return update_template(template, read_cache_settings(spec))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Copy the stage cache settings of the OpenAPI spec into the SAM template."
+    )
+    parser.add_argument("--spec", default=SPEC_PATH, help="Bundled OpenAPI spec")
+    parser.add_argument("--template", default=TEMPLATE_PATH, help="SAM template to update")
+    parser.add_argument(
+        "--check", action="store_true", help="Fail if the template is not up to date with the spec"
+    )
+    args = parser.parse_args()
+
+    template = generate_cache_settings(args.spec, args.template)
+    if args.check:
+        with open(args.template) as file:
+            if file.read() != template:
+                logging.error(
+                    f"{args.template} is out of date, run utils/ci/generate_cache_settings.py"
+                )
+                sys.exit(1)
+        logging.info(f"{args.template} is up to date")
+        return
+
+    with open(args.template, "w") as file:
+        file.write(template)
+    logging.info(f"Wrote cache settings to {args.template}")
+
+
+if __name__ == "__main__":
+    configure_logging()
+    main()
@@ -0,0 +1,127 @@
+import gzip
+import os
+import re
+
+import pytest
+
+brotli = pytest.importorskip("brotli")
+
+from utils.ci.build_docs import build_docs, hashed_name  # noqa: E402
+
+INDEX_PAGE = """<!DOCTYPE html>
+<html>
+  <head>
+    <link rel="stylesheet" type="text/css" href="./swagger-ui.css" />
+    <link rel="stylesheet" type="text/css" href="index.css" />
+    <link rel="icon" type="image/png" href="./favicon-32x32.png" sizes="32x32" />
+    <a href="https://swagger.io">Swagger</a>
+  </head>
+  <body>
+    <div id="swagger-ui"></div>
+    <script src="./swagger-ui-bundle.js" charset="UTF-8"> </script>
+    <script src="./swagger-initializer.js" charset="UTF-8"> </script>
+  </body>
+</html>
+"""
+INITIALIZER = """window.onload = function() {
+  window.ui = SwaggerUIBundle({
+    url: "https://petstore.swagger.io/v2/swagger.json",
+    dom_id: '#swagger-ui',
+  });
+};
+"""
+
+
+@pytest.fixture
+def dist(tmp_path):
+    """A Swagger UI like dist directory."""
+    dist = tmp_path / "dist"
+    dist.mkdir()
+    (dist / "index.html").write_text(INDEX_PAGE)
+    (dist / "swagger-ui.css").write_text("body { margin: 0; }")
+    (dist / "index.css").write_text("html { box-sizing: border-box; }")
+    (dist / "favicon-32x32.png").write_bytes(b"\x89PNG")
+    (dist / "swagger-ui-bundle.js").write_text("var SwaggerUIBundle = function() {};")
+    (dist / "swagger-initializer.js").write_text(INITIALIZER)
+    (dist / "oauth2-redirect.html").write_text("<html></html>")
+    return dist
+
+
+@pytest.fixture
+def spec(tmp_path):
+    path = tmp_path / "bundled.yaml"
+    path.write_text("openapi: 3.0.1\n")
+    return path
+
+
+@pytest.mark.unit
+def test_hashed_name(tmp_path):
+    """Hashed names keep the stem and extension, and only depend on the content."""
+    path = tmp_path / "swagger-ui.css"
+    path.write_text("body {}")
+    name = hashed_name(str(path))
+
+    assert re.fullmatch(r"swagger-ui\.[0-9a-f]{10}\.css", name)
+    path.write_text("body { margin: 0; }")
+    assert hashed_name(str(path)) != name
+
+
+@pytest.mark.unit
+def test_build_docs(dist, spec, tmp_path):
+    """Assets loaded by the index page are renamed, and the page and initializer updated."""
+    output = tmp_path / "build"
+    renamed = build_docs(str(dist), str(spec), str(output))
+
+    assert set(renamed) == {
+        "bundled.yaml",
+        "swagger-ui.css",
+        "index.css",
+        "favicon-32x32.png",
+        "swagger-ui-bundle.js",
+        "swagger-initializer.js",
+    }
+    page = (output / "index.html").read_text()
+    for name in ("swagger-ui.css", "index.css", "swagger-ui-bundle.js", "swagger-initializer.js"):
+        assert f'"./{renamed[name]}"' in page
+        assert not (output / name).exists()
+    assert 'href="https://swagger.io"' in page
+
+    initializer = (output / renamed["swagger-initializer.js"]).read_text()
+    assert f'url: "{renamed["bundled.yaml"]}"' in initializer
+    assert (output / renamed["bundled.yaml"]).read_text() == spec.read_text()
+    # Kept under their plain names for existing links
+    assert (output / "bundled.yaml").exists()
+    assert (output / "oauth2-redirect.html").exists()
+
+
+@pytest.mark.unit
+def test_build_docs_compresses_text_files(dist, spec, tmp_path):
+    """Text files get gzip and brotli variants, binary ones do not."""
+    output = tmp_path / "build"
+    renamed = build_docs(str(dist), str(spec), str(output))
+
+    css = output / renamed["swagger-ui.css"]
+    assert gzip.decompress((output / f"{css.name}.gz").read_bytes()) == css.read_bytes()
+    assert brotli.decompress((output / f"{css.name}.br").read_bytes()) == css.read_bytes()
+    assert (output / "index.html.br").exists()
+    assert not (output / f"{renamed['favicon-32x32.png']}.gz").exists()
+
+
+@pytest.mark.unit
+def test_build_docs_is_deterministic(dist, spec, tmp_path):
+    """Rebuilding unchanged sources gives identical files, so that uploads can skip them."""
+    first = build_docs(str(dist), str(spec), str(tmp_path / "first"))
+    second = build_docs(str(dist), str(spec), str(tmp_path / "second"))
+
+    assert first == second
+    for name in sorted(os.listdir(tmp_path / "first")):
+        first_bytes = (tmp_path / "first" / name).read_bytes()
+        assert first_bytes == (tmp_path / "second" / name).read_bytes()
+
+
+@pytest.mark.unit
+def test_build_docs_requires_spec_url(dist, spec, tmp_path):
+    """The build fails when the initializer has no spec URL to replace."""
+    (dist / "swagger-initializer.js").write_text("window.onload = function() {};")
+    with pytest.raises(ValueError):
+        build_docs(str(dist), str(spec), str(tmp_path / "build"))
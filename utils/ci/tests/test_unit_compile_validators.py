@@ -0,0 +1,274 @@
+import pytest
+
+pytest.importorskip("yaml")
+
+from utils.ci.compile_validators import (  # noqa: E402
+    OUTPUT_PATHS,
+    ValidatorCompiler,
+    compile_validators,
+    snake_case,
+)
+from utils.errors import (  # noqa: E402
+    InvalidQueryStringParameterError,
+    MissingRequiredQueryStringParameterError,
+)
+
+SPEC = {
+    "paths": {
+        "/items": {
+            "get": {
+                "operationId": "listItems",
+                "parameters": [
+                    {"name": "limit", "in": "query", "schema": {"type": "integer", "minimum": 1}},
+                    {
+                        "name": "order",
+                        "in": "query",
+                        "schema": {"$ref": "#/components/schemas/order"},
+                    },
+                    {"name": "deleted", "in": "query", "schema": {"type": "boolean"}},
+                    {
+                        "name": "query",
+                        "in": "query",
+                        "required": True,
+                        "schema": {"type": "string", "maxLength": 5},
+                    },
+                ],
+            },
+            "post": {"operationId": "createItem"},
+        }
+    },
+    "components": {
+        "schemas": {
+            "order": {"type": "string", "enum": ["asc", "desc"], "default": "asc"},
+            "item": {"type": "object"},
+        }
+    },
+}
+
+
+@pytest.fixture(scope="module")
+def validators():
+    """Namespace of the module compiled from the test spec."""
+    namespace = {}
+    exec(ValidatorCompiler(SPEC).compile(), namespace)
+    return namespace
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "name, expected",
+    [("getHello", "get_hello"), ("listItems", "list_items"), ("order-by", "order_by")],
+)
+def test_snake_case(name, expected):
+    assert snake_case(name) == expected
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("path", OUTPUT_PATHS, ids=["layer", "mirror"])
+def test_compiled_module_is_up_to_date(path):
+    """The validators shipped with the layer, and the mirror the tests import, match the spec."""
+    with open(path) as file:
+        assert file.read() == compile_validators()
+
+
+@pytest.mark.unit
+def test_compile_indexes_operations_with_parameters(validators):
+    """Operations without parameters and non-string schemas get no function."""
+    assert set(validators["VALIDATORS"]) == {"listItems"}
+    assert validators["ROUTES"] == {("GET", "/items"): validators["validate_list_items"]}
+    assert "is_valid_order" in validators
+    assert "is_valid_item" not in validators
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ({"query": "a"}, {"query": "a", "order": "asc"}),
+        (
+            {"query": "a", "limit": "10", "order": "desc", "deleted": "true"},
+            {"query": "a", "limit": 10, "order": "desc", "deleted": True},
+        ),
+        ({"query": "a", "deleted": "false"}, {"query": "a", "order": "asc", "deleted": False}),
+    ],
+)
+def test_compiled_validator(validators, query, expected):
+    """Parameters are converted to their schema type, defaults filled in."""
+    assert validators["validate_list_items"]({"queryStringParameters": query}) == expected
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "query, error, message",
+    [
+        (
+            {},
+            MissingRequiredQueryStringParameterError,
+            "'query' query string parameter is required",
+        ),
+        ({"query": "abcdef"}, InvalidQueryStringParameterError, "Invalid query provided"),
+        ({"query": "a", "limit": "0"}, InvalidQueryStringParameterError, "Invalid limit provided"),
+        ({"query": "a", "limit": "x"}, InvalidQueryStringParameterError, "Invalid limit provided"),
+        ({"query": "a", "order": "up"}, InvalidQueryStringParameterError, "Invalid order provided"),
+        (
+            {"query": "a", "deleted": "1"},
+            InvalidQueryStringParameterError,
+            "Invalid deleted provided",
+        ),
+    ],
+)
+def test_compiled_validator_errors(validators, query, error, message):
+    """Invalid parameters raise the errors and messages the handlers always answered with."""
+    with pytest.raises(error) as e:
+        validators["validate_list_items"]({"queryStringParameters": query})
+    assert str(e.value) == message
+
+
+@pytest.mark.unit
+def test_compile_rejects_unsupported_parameters():
+    """Only query parameters are compiled, other locations fail the build."""
+    spec = {
+        "paths": {
+            "/items/{id}": {
+                "get": {
+                    "operationId": "getItem",
+                    "parameters": [{"name": "id", "in": "path", "required": True}],
+                }
+            }
+        }
+    }
+    with pytest.raises(ValueError):
+        ValidatorCompiler(spec).compile()
+
+
+RESPONSE_SPEC = {
+    "paths": {
+        "/items": {
+            "get": {
+                "operationId": "listItems",
+                "responses": {
+                    "200": {
+                        "content": {
+                            "application/json": {"schema": {"$ref": "#/components/schemas/page"}}
+                        }
+                    },
+                    "204": {"description": "No content"},
+                    "400": {
+                        "content": {
+                            "application/json": {
+                                "schema": {
+                                    "type": "object",
+                                    "required": ["error"],
+                                    "properties": {"error": {"type": "string"}},
+                                }
+                            }
+                        }
+                    },
+                },
+            }
+        }
+    },
+    "components": {
+        "schemas": {
+            "item": {
+                "type": "object",
+                "required": ["id"],
+                "properties": {"id": {"type": "integer"}, "tag": {"type": "string"}},
+            },
+            "error": {"type": "object", "required": ["error"]},
+            "page": {
+                "type": "object",
+                "required": ["items"],
+                "properties": {
+                    "items": {
+                        "type": "array",
+                        "items": {
+                            "oneOf": [
+                                {"$ref": "#/components/schemas/item"},
+                                {"$ref": "#/components/schemas/error"},
+                            ]
+                        },
+                    },
+                    "next": {"$ref": "#/components/schemas/item"},
+                },
+            },
+        }
+    },
+}
+
+
+@pytest.fixture(scope="module")
+def checkers():
+    """Namespace of the module compiled from the response test spec."""
+    namespace = {}
+    exec(ValidatorCompiler(RESPONSE_SPEC).compile(), namespace)
+    return namespace
+
+
+@pytest.mark.unit
+def test_compile_indexes_response_checkers(checkers):
+    """JSON responses get a checker by route and status, inline schemas a generated one."""
+    assert checkers["RESPONSES"] == {
+        ("GET", "/items", 200): checkers["check_page"],
+        ("GET", "/items", 400): checkers["check_list_items_400_response"],
+    }
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "body",
+    [
+        {"items": []},
+        {"items": [{"id": 1}, {"id": 2, "tag": "a"}, {"error": "Not found"}]},
+        {"items": [], "next": {"id": 3}, "extra": True},
+    ],
+)
+def test_response_checker_accepts_conforming_bodies(checkers, body):
+    assert checkers["check_page"](body) is None
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "body, violation",
+    [
+        ([], "$: expected object"),
+        ({}, "$.items: required"),
+        ({"items": {}}, "$.items: expected array"),
+        ({"items": [{"tag": "a"}]}, "$.items[]: matches none of ['item', 'error']"),
+        ({"items": [], "next": {}}, "$.next.id: required"),
+        ({"items": [], "next": {"id": True}}, "$.next.id: expected integer"),
+        ({"items": [], "next": {"id": 1, "tag": 2}}, "$.next.tag: expected string"),
+    ],
+)
+def test_response_checker_reports_first_violation(checkers, body, violation):
+    """Violations are reported with the JSON path of the offending value."""
+    assert checkers["check_page"](body) == violation
+
+
+@pytest.mark.unit
+def test_compile_rejects_inline_one_of():
+    """oneOf alternatives must be component references to get a checker."""
+    spec = {"components": {"schemas": {"either": {"oneOf": [{"type": "string"}]}}}}
+    with pytest.raises(ValueError):
+        ValidatorCompiler(spec).compile()
+
+
+@pytest.mark.unit
+def test_compile_leaves_header_parameters_to_the_pipeline():
+    """Header parameters are documented in the spec but never passed to producers."""
+    spec = {
+        "paths": {
+            "/items": {
+                "get": {
+                    "operationId": "listItems",
+                    "parameters": [
+                        {"name": "If-None-Match", "in": "header", "schema": {"type": "string"}}
+                    ],
+                }
+            }
+        }
+    }
+    namespace = {}
+    exec(ValidatorCompiler(spec).compile(), namespace)
+    event = {"headers": {"If-None-Match": '"a"'}, "queryStringParameters": None}
+    assert namespace["validate_list_items"](event) == {}
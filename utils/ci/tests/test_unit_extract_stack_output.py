@@ -0,0 +1,129 @@
+import argparse
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+from botocore.stub import Stubber  # noqa: E402
+
+from utils.ci.extract_stack_output import (  # noqa: E402
+    AWSStack,
+    OutputCache,
+    parse_arguments,
+    parse_pair,
+)
+
+STACK_NAME = "aws-api-example"
+DESCRIBE_STACKS_RESPONSE = {
+    "Stacks": [
+        {
+            "StackName": STACK_NAME,
+            "CreationTime": "2024-01-01T00:00:00Z",
+            "StackStatus": "UPDATE_COMPLETE",
+            "Outputs": [
+                {"OutputKey": "DocsBucketNameOutput", "OutputValue": "docs-bucket"},
+                {"OutputKey": "DocsCloudFrontDistributionIdOutput", "OutputValue": "E123"},
+            ],
+        }
+    ]
+}
+
+
+@pytest.fixture
+def cloudformation():
+    """CloudFormation client answering a single DescribeStacks call."""
+    client = boto3.client(
+        "cloudformation",
+        region_name="us-east-1",
+        aws_access_key_id="testing",
+        aws_secret_access_key="testing",
+    )
+    with Stubber(client) as stubber:
+        stubber.add_response("describe_stacks", DESCRIBE_STACKS_RESPONSE, {"StackName": STACK_NAME})
+        yield client
+        stubber.assert_no_pending_responses()
+
+
+@pytest.mark.unit
+def test_find_output_value_fetches_once(cloudformation):
+    """Every output is read from a single DescribeStacks call."""
+    stack = AWSStack(STACK_NAME, cloudformation)
+
+    assert stack.find_output_value("DocsBucketNameOutput") == "docs-bucket"
+    assert stack.find_output_value("DocsCloudFrontDistributionIdOutput") == "E123"
+    assert stack.find_output_value("MissingOutput") is None
+
+
+@pytest.mark.unit
+def test_outputs_are_cached(cloudformation, tmp_path):
+    """Cached outputs are reused by the next run until they expire."""
+    cache = OutputCache(str(tmp_path), ttl=60)
+    stack = AWSStack(STACK_NAME, cloudformation, cache)
+    assert stack.find_output_value("DocsBucketNameOutput") == "docs-bucket"
+
+    # The stubbed client has no response left, a second call would fail
+    stack = AWSStack(STACK_NAME, cloudformation, cache)
+    assert stack.find_output_value("DocsCloudFrontDistributionIdOutput") == "E123"
+
+
+@pytest.mark.unit
+def test_output_cache_expires(tmp_path):
+    """Entries older than the TTL, or unreadable, are ignored."""
+    cache = OutputCache(str(tmp_path), ttl=60)
+    cache.set(STACK_NAME, {"Key": "value"})
+    assert cache.get(STACK_NAME) == {"Key": "value"}
+
+    expired = os.path.getmtime(cache.path(STACK_NAME)) + 120
+    with patch("utils.ci.extract_stack_output.time.time", return_value=expired):
+        assert cache.get(STACK_NAME) is None
+
+    with open(cache.path(STACK_NAME), "w") as file:
+        file.write("not json")
+    assert cache.get(STACK_NAME) is None
+    assert cache.get("other-stack") is None
+
+
+@pytest.mark.unit
+def test_fetch_output_error():
+    """Failed lookups are reported as a RuntimeError."""
+    client = boto3.client(
+        "cloudformation",
+        region_name="us-east-1",
+        aws_access_key_id="testing",
+        aws_secret_access_key="testing",
+    )
+    with Stubber(client) as stubber:
+        stubber.add_client_error("describe_stacks", "ValidationError", "Stack does not exist")
+        with pytest.raises(RuntimeError):
+            AWSStack(STACK_NAME, client).find_output_value("DocsBucketNameOutput")
+
+
+@pytest.mark.unit
+def test_parse_arguments():
+    """Several output key and variable name pairs are accepted in one call."""
+    args = parse_arguments(["DocsBucketNameOutput=DOC_BUCKET_NAME", "Other=OTHER"])
+    assert args.pairs == [("DocsBucketNameOutput", "DOC_BUCKET_NAME"), ("Other", "OTHER")]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("value", ["DocsBucketNameOutput", "=DOC_BUCKET_NAME", "Key="])
+def test_parse_pair_invalid(value):
+    """Pairs need both an output key and a variable name."""
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_pair(value)
+
+
+@pytest.mark.unit
+def test_cache_file_content(cloudformation, tmp_path):
+    """The cache stores the outputs index with the time it was fetched."""
+    cache = OutputCache(str(tmp_path))
+    AWSStack(STACK_NAME, cloudformation, cache).find_output_value("DocsBucketNameOutput")
+
+    with open(tmp_path / f"{STACK_NAME}.json") as file:
+        entry = json.load(file)
+    assert entry["outputs"] == {
+        "DocsBucketNameOutput": "docs-bucket",
+        "DocsCloudFrontDistributionIdOutput": "E123",
+    }
@@ -0,0 +1,168 @@
+import pytest
+
+yaml = pytest.importorskip("yaml")
+
+from yaml import SafeLoader  # noqa: E402
+
+from utils.ci.generate_cache_settings import (  # noqa: E402
+    BEGIN_MARKER,
+    CACHE_CONDITION,
+    END_MARKER,
+    SPEC_PATH,
+    TEMPLATE_PATH,
+    CacheSettings,
+    MethodCache,
+    generate_cache_settings,
+    read_cache_settings,
+    resource_path,
+    update_template,
+)
+
+
+class TemplateLoader(SafeLoader):
+    """YAML loader keeping CloudFormation tags (`!Ref`, `!Sub`...) as plain values."""
+
+
+def construct_tag(loader, suffix, node):
+    if isinstance(node, yaml.ScalarNode):
+        return loader.construct_scalar(node)
+    if isinstance(node, yaml.SequenceNode):
+        return loader.construct_sequence(node)
+    return loader.construct_mapping(node)
+
+
+TemplateLoader.add_multi_constructor("!", construct_tag)
+
+
+def cached_operation(ttl=300, keys=("method.request.querystring.name",), headers=()):
+    return {
+        "parameters": [{"name": "name", "in": "query"}]
+        + [{"name": header, "in": "header"} for header in headers],
+        "x-cache": {"ttlInSeconds": ttl},
+        "x-amazon-apigateway-integration": {"cacheKeyParameters": list(keys)},
+    }
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "path, expected", [("/hello", "/~1hello"), ("/hello/batch", "/~1hello~1batch")]
+)
+def test_resource_path(path, expected):
+    assert resource_path(path) == expected
+
+
+@pytest.mark.unit
+def test_read_cache_settings():
+    """Only methods with an x-cache are cached, with their integration's cache keys."""
+    spec = {
+        "x-cache-cluster-size": 0.5,
+        "paths": {
+            "/items": {"get": cached_operation(), "post": {"operationId": "createItem"}},
+        },
+    }
+    assert read_cache_settings(spec) == CacheSettings(
+        "0.5", [MethodCache("/items", "GET", 300, ["method.request.querystring.name"])]
+    )
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "spec",
+    [
+        {"x-cache-cluster-size": "0.5", "paths": {"/items": {"get": cached_operation(ttl=0)}}},
+        {"x-cache-cluster-size": "0.5", "paths": {"/items": {"get": cached_operation(ttl=7200)}}},
+        {"x-cache-cluster-size": "0.5", "paths": {"/items": {"get": cached_operation(keys=())}}},
+        {
+            "x-cache-cluster-size": "0.5",
+            "paths": {"/items": {"get": cached_operation(keys=["method.request.querystring.id"])}},
+        },
+        {
+            "x-cache-cluster-size": "0.5",
+            "paths": {"/items": {"get": cached_operation(headers=["If-None-Match"])}},
+        },
+        {"x-cache-cluster-size": "2", "paths": {"/items": {"get": cached_operation()}}},
+        {"paths": {"/items": {"get": cached_operation()}}},
+    ],
+    ids=[
+        "ttl-too-low",
+        "ttl-too-high",
+        "no-keys",
+        "undeclared-key",
+        "unkeyed-if-none-match",
+        "bad-size",
+        "no-size",
+    ],
+)
+def test_read_cache_settings_rejects_invalid_declarations(spec):
+    with pytest.raises(ValueError):
+        read_cache_settings(spec)
+
+
+@pytest.mark.unit
+def test_update_template_replaces_the_generated_block():
+    template = "\n".join(
+        ["Properties:", f"  {BEGIN_MARKER}", "  Stale: true", f"  {END_MARKER}", "  Other: 1"]
+    )
+    settings = CacheSettings("0.5", [MethodCache("/items", "GET", 60, [])])
+
+    updated = yaml.load(update_template(template, settings), Loader=TemplateLoader)["Properties"]
+    enabled = [CACHE_CONDITION, True, False]
+    assert updated == {
+        "CacheClusterEnabled": enabled,
+        "CacheClusterSize": [CACHE_CONDITION, "0.5", "AWS::NoValue"],
+        "MethodSettings": [
+            {
+                "ResourcePath": "/~1items",
+                "HttpMethod": "GET",
+                "CachingEnabled": enabled,
+                "CacheTtlInSeconds": 60,
+            }
+        ],
+        "Other": 1,
+    }
+    no_cache = yaml.safe_load(update_template(template, CacheSettings(None, [])))
+    assert no_cache["Properties"] == {"CacheClusterEnabled": False, "Other": 1}
+
+
+@pytest.mark.unit
+def test_update_template_requires_markers():
+    with pytest.raises(ValueError):
+        update_template("Properties: {}\n", CacheSettings(None, []))
+
+
+@pytest.mark.unit
+def test_template_is_up_to_date():
+    """The template's cache settings match the bundled spec."""
+    with open(TEMPLATE_PATH) as file:
+        assert file.read() == generate_cache_settings()
+
+
+@pytest.mark.unit
+def test_template_caches_greetings_by_name():
+    """
+    Once enabled, the stage caches the greeting GETs by name and If-None-Match, nothing else,
+    and the hello lambda stops rate limiting.
+    """
+    with open(TEMPLATE_PATH) as file:
+        template = yaml.load(file, Loader=TemplateLoader)
+    api = template["Resources"]["MainApi"]["Properties"]
+    with open(SPEC_PATH) as file:
+        spec = yaml.safe_load(file)
+
+    assert template["Parameters"]["StageCache"]["Default"] == "DISABLED"
+    assert template["Conditions"][CACHE_CONDITION] == ["StageCache", "ENABLED"]
+    assert api["CacheClusterEnabled"] == [CACHE_CONDITION, True, False]
+    assert api["CacheClusterSize"][:2] == [CACHE_CONDITION, "0.5"]
+    variables = template["Resources"]["HelloLambda"]["Properties"]["Environment"]["Variables"]
+    assert variables["RATE_LIMIT_PER_SECOND"] == [CACHE_CONDITION, "0", "10"]
+    settings = {(s["ResourcePath"], s["HttpMethod"]): s for s in api["MethodSettings"]}
+    assert set(settings) == {("/~1hello", "GET"), ("/~1goodbye", "GET")}
+    for (path, _), setting in settings.items():
+        operation = spec["paths"][path.replace("~1", "/")[1:]]["get"]
+        assert setting["CachingEnabled"] == [CACHE_CONDITION, True, False]
+        assert setting["CacheTtlInSeconds"] == operation["x-cache"]["ttlInSeconds"]
+        integration = operation["x-amazon-apigateway-integration"]
+        assert integration["cacheKeyParameters"] == [
+            "method.request.querystring.name",
+            "method.request.header.If-None-Match",
+        ]
@@ -0,0 +1,322 @@
+import hashlib
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+from utils.ci import upload_to_s3 as uploader  # noqa: E402
+
+BUCKET_NAME = "docs-bucket"
+
+
+@pytest.fixture
+def s3():
+    """S3 client backed by moto, with an empty bucket."""
+    with patch.dict(
+        os.environ,
+        {
+            "AWS_ACCESS_KEY_ID": "testing",
+            "AWS_SECRET_ACCESS_KEY": "testing",
+            "AWS_DEFAULT_REGION": "us-east-1",
+        },
+    ), moto.mock_aws():
+        client = uploader.create_client(workers=2)
+        client.create_bucket(Bucket=BUCKET_NAME)
+        yield client
+
+
+@pytest.fixture
+def dist(tmp_path):
+    """A small swagger-ui like directory."""
+    (tmp_path / "index.html").write_text("<html></html>")
+    (tmp_path / "swagger-ui.css").write_text("body {}")
+    (tmp_path / "js").mkdir()
+    (tmp_path / "js" / "swagger-initializer.js").write_text("window.onload = () => {};")
+    return tmp_path
+
+
+@pytest.fixture
+def small_parts():
+    """Switch to multipart uploads for files of 5 MiB and more, the S3 minimum part size."""
+    with patch.object(uploader, "MULTIPART_THRESHOLD", 5 * 1024 * 1024), patch.object(
+        uploader, "MULTIPART_CHUNKSIZE", 5 * 1024 * 1024
+    ):
+        yield
+
+
+def list_objects(s3):
+    response = s3.list_objects_v2(Bucket=BUCKET_NAME)
+    return {item["Key"]: item["ETag"].strip('"') for item in response.get("Contents", [])}
+
+
+@pytest.mark.unit
+def test_compute_etag(tmp_path):
+    """ETags are the MD5 of small files and the MD5 of the parts' MD5s for large ones."""
+    path = tmp_path / "file"
+    path.write_bytes(b"a" * 10)
+
+    assert uploader.compute_etag(str(path)) == hashlib.md5(b"a" * 10).hexdigest()
+    parts = hashlib.md5(b"a" * 4).digest() * 2 + hashlib.md5(b"a" * 2).digest()
+    assert uploader.compute_etag(str(path), 4, 4) == f"{hashlib.md5(parts).hexdigest()}-3"
+
+
+@pytest.mark.unit
+def test_upload_to_s3(s3, dist):
+    """Every file is uploaded under its relative path, with its content type."""
+    result = uploader.upload_to_s3(str(dist), BUCKET_NAME, prefix="dist/", s3=s3)
+
+    expected_keys = {"dist/index.html", "dist/swagger-ui.css", "dist/js/swagger-initializer.js"}
+    assert set(result.uploaded) == expected_keys
+    assert result.skipped == result.failed == []
+    assert set(list_objects(s3)) == expected_keys
+    head = s3.head_object(Bucket=BUCKET_NAME, Key="dist/swagger-ui.css")
+    assert head["ContentType"] == "text/css"
+
+
+@pytest.mark.unit
+def test_upload_to_s3_skips_unchanged_files(s3, dist):
+    """A second run only uploads the files whose content changed."""
+    uploader.upload_to_s3(str(dist), BUCKET_NAME, s3=s3)
+    (dist / "index.html").write_text("<html>changed</html>")
+
+    with patch.object(s3, "upload_file", wraps=s3.upload_file) as mock_upload:
+        result = uploader.upload_to_s3(str(dist), BUCKET_NAME, s3=s3)
+
+    assert result.uploaded == ["index.html"]
+    assert sorted(result.skipped) == ["js/swagger-initializer.js", "swagger-ui.css"]
+    assert mock_upload.call_count == 1
+    assert list_objects(s3)["index.html"] == hashlib.md5(b"<html>changed</html>").hexdigest()
+
+
+@pytest.mark.unit
+def test_upload_to_s3_force(s3, dist):
+    """Forced runs upload unchanged files too."""
+    uploader.upload_to_s3(str(dist), BUCKET_NAME, s3=s3)
+    result = uploader.upload_to_s3(str(dist), BUCKET_NAME, force=True, s3=s3)
+    assert len(result.uploaded) == 3
+    assert result.skipped == []
+
+
+@pytest.mark.unit
+@pytest.mark.usefixtures("small_parts")
+def test_upload_to_s3_multipart(s3, tmp_path):
+    """Large files are uploaded in parts, and the local ETag matches the multipart one."""
+    (tmp_path / "bundle.js").write_bytes(os.urandom(11 * 1024 * 1024))
+
+    result = uploader.upload_to_s3(str(tmp_path), BUCKET_NAME, s3=s3)
+    etag = list_objects(s3)["bundle.js"]
+
+    assert result.uploaded == ["bundle.js"]
+    assert etag.endswith("-3")
+    assert uploader.upload_to_s3(str(tmp_path), BUCKET_NAME, s3=s3).skipped == ["bundle.js"]
+
+
+@pytest.mark.unit
+def test_upload_to_s3_manifest(s3, dist, tmp_path_factory):
+    """With a manifest, unchanged files are skipped without listing the bucket."""
+    manifest_path = str(tmp_path_factory.mktemp("manifest") / "manifest.json")
+    uploader.upload_to_s3(str(dist), BUCKET_NAME, manifest_path=manifest_path, s3=s3)
+    with open(manifest_path) as file:
+        assert set(json.load(file)) == {"index.html", "swagger-ui.css", "js/swagger-initializer.js"}
+
+    with patch.object(uploader, "fetch_remote_objects") as mock_fetch, patch.object(
+        s3, "head_object"
+    ) as mock_head:
+        result = uploader.upload_to_s3(str(dist), BUCKET_NAME, manifest_path=manifest_path, s3=s3)
+
+    mock_fetch.assert_not_called()
+    mock_head.assert_not_called()
+    assert result.uploaded == []
+    assert len(result.skipped) == 3
+
+
+@pytest.mark.unit
+def test_upload_to_s3_legacy_manifest(s3, dist, tmp_path_factory):
+    """Manifests holding only ETags are completed with the headers of the stored objects."""
+    uploader.upload_to_s3(str(dist), BUCKET_NAME, s3=s3)
+    manifest_path = tmp_path_factory.mktemp("manifest") / "manifest.json"
+    manifest_path.write_text(json.dumps(list_objects(s3)))
+
+    result = uploader.upload_to_s3(str(dist), BUCKET_NAME, manifest_path=str(manifest_path), s3=s3)
+
+    assert result.uploaded == []
+    manifest = json.loads(manifest_path.read_text())
+    assert manifest["swagger-ui.css"]["headers"] == {
+        "ContentType": "text/css",
+        "CacheControl": uploader.DEFAULT_CACHE_CONTROL,
+    }
+
+
+@pytest.mark.unit
+def test_upload_to_s3_updates_changed_headers(s3, dist):
+    """Objects with the same content but outdated headers are uploaded again."""
+    with patch.object(uploader, "cache_control_for", return_value="no-cache"):
+        uploader.upload_to_s3(str(dist), BUCKET_NAME, s3=s3)
+    assert s3.head_object(Bucket=BUCKET_NAME, Key="index.html")["CacheControl"] == "no-cache"
+
+    result = uploader.upload_to_s3(str(dist), BUCKET_NAME, s3=s3)
+
+    assert len(result.uploaded) == 3
+    head = s3.head_object(Bucket=BUCKET_NAME, Key="index.html")
+    assert head["CacheControl"] == uploader.DEFAULT_CACHE_CONTROL
+    assert uploader.upload_to_s3(str(dist), BUCKET_NAME, s3=s3).uploaded == []
+
+
+@pytest.mark.unit
+def test_upload_to_s3_delete(s3, dist, tmp_path_factory):
+    """Objects without a local file are deleted only when asked, and left out of the manifest."""
+    manifest_path = str(tmp_path_factory.mktemp("manifest") / "manifest.json")
+    uploader.upload_to_s3(str(dist), BUCKET_NAME, s3=s3)
+    (dist / "swagger-ui.css").unlink()
+
+    assert uploader.upload_to_s3(str(dist), BUCKET_NAME, s3=s3).deleted == []
+    assert "swagger-ui.css" in list_objects(s3)
+
+    result = uploader.upload_to_s3(
+        str(dist), BUCKET_NAME, manifest_path=manifest_path, delete=True, s3=s3
+    )
+    assert result.deleted == ["swagger-ui.css"]
+    assert set(list_objects(s3)) == {"index.html", "js/swagger-initializer.js"}
+    with open(manifest_path) as file:
+        assert set(json.load(file)) == {"index.html", "js/swagger-initializer.js"}
+
+
+@pytest.mark.unit
+def test_upload_to_s3_keeps_stale_objects_on_failure(s3, dist):
+    """Nothing is deleted when a file failed to upload."""
+    uploader.upload_to_s3(str(dist), BUCKET_NAME, s3=s3)
+    (dist / "swagger-ui.css").unlink()
+    (dist / "index.html").write_text("<html>changed</html>")
+
+    with patch.object(s3, "upload_file", side_effect=RuntimeError("boom")):
+        result = uploader.upload_to_s3(str(dist), BUCKET_NAME, delete=True, s3=s3)
+
+    assert result.failed == ["index.html"]
+    assert result.deleted == []
+    assert "swagger-ui.css" in list_objects(s3)
+
+
+@pytest.mark.unit
+def test_upload_to_s3_reports_failures(s3, dist):
+    """Failed uploads are reported and left out of the manifest."""
+    original_upload = s3.upload_file
+
+    def upload_file(path, bucket, key, **kwargs):
+        if key == "index.html":
+            raise RuntimeError("boom")
+        return original_upload(path, bucket, key, **kwargs)
+
+    with patch.object(s3, "upload_file", side_effect=upload_file):
+        result = uploader.upload_to_s3(str(dist), BUCKET_NAME, s3=s3)
+
+    assert result.failed == ["index.html"]
+    assert "index.html" not in list_objects(s3)
+
+
+@pytest.mark.unit
+def test_upload_to_s3_headers(s3, tmp_path):
+    """Content hashed files are immutable, and precompressed variants keep their type."""
+    (tmp_path / "index.html").write_text("<html></html>")
+    (tmp_path / "index.html.br").write_bytes(b"br")
+    (tmp_path / "swagger-ui.0123456789.css").write_text("body {}")
+    (tmp_path / "swagger-ui.0123456789.css.gz").write_bytes(b"gz")
+    (tmp_path / "bundled.yaml").write_text("openapi: 3.0.1")
+
+    uploader.upload_to_s3(str(tmp_path), BUCKET_NAME, s3=s3)
+
+    def head(key):
+        return s3.head_object(Bucket=BUCKET_NAME, Key=key)
+
+    assert head("index.html")["CacheControl"] == uploader.DEFAULT_CACHE_CONTROL
+    assert "ContentEncoding" not in head("index.html")
+    assert head("index.html.br")["ContentType"] == "text/html"
+    assert head("index.html.br")["ContentEncoding"] == "br"
+    css = head("swagger-ui.0123456789.css.gz")
+    assert css["ContentType"] == "text/css"
+    assert css["ContentEncoding"] == "gzip"
+    assert css["CacheControl"] == uploader.IMMUTABLE_CACHE_CONTROL
+    assert head("bundled.yaml")["ContentType"] == "application/x-yaml"
+
+
+@pytest.mark.unit
+def test_upload_to_s3_uploads_hashed_files_first(s3, tmp_path):
+    """Pages are only uploaded once the content hashed files they reference are."""
+    (tmp_path / "index.html").write_text("<html></html>")
+    (tmp_path / "app.0123456789.js").write_text("var app;")
+    (tmp_path / "app.abcdef0123.css").write_text("body {}")
+
+    with patch.object(s3, "upload_file", wraps=s3.upload_file) as mock_upload:
+        uploader.upload_to_s3(str(tmp_path), BUCKET_NAME, s3=s3)
+
+    keys = [call.args[2] for call in mock_upload.call_args_list]
+    assert keys[-1] == "index.html"
+
+
+@pytest.mark.unit
+def test_upload_to_s3_skips_pages_when_assets_fail(s3, tmp_path):
+    """Pages are not uploaded when a file they may reference failed."""
+    (tmp_path / "index.html").write_text("<html></html>")
+    (tmp_path / "app.0123456789.js").write_text("var app;")
+
+    with patch.object(s3, "upload_file", side_effect=RuntimeError("boom")) as mock_upload:
+        result = uploader.upload_to_s3(str(tmp_path), BUCKET_NAME, s3=s3)
+
+    assert mock_upload.call_count == 1
+    assert sorted(result.failed) == ["app.0123456789.js", "index.html"]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "keys, expected_paths",
+    [
+        ([], []),
+        (["app.0123456789.js", "app.0123456789.js.br"], []),
+        (
+            ["index.html", "index.html.br", "index.html.gz", "app.0123456789.js"],
+            ["/", "/index.html", "/index.html.br", "/index.html.gz"],
+        ),
+        (
+            ["docs/index.html.gz", "bundled.yaml"],
+            ["/bundled.yaml", "/docs/", "/docs/index.html.gz"],
+        ),
+        ([f"page{i}.html" for i in range(20)], ["/*"]),
+    ],
+)
+def test_invalidation_paths(keys, expected_paths):
+    """Only changed files that are not content hashed are invalidated."""
+    assert uploader.invalidation_paths(keys) == expected_paths
+
+
+@pytest.mark.unit
+def test_invalidate_cloudfront():
+    """The changed paths are invalidated in one request, and nothing is sent without any."""
+    from botocore.stub import ANY, Stubber
+
+    cloudfront = boto3.client(
+        "cloudfront",
+        region_name="us-east-1",
+        aws_access_key_id="testing",
+        aws_secret_access_key="testing",
+    )
+    with Stubber(cloudfront) as stubber:
+        stubber.add_response(
+            "create_invalidation",
+            {},
+            {
+                "DistributionId": "E123",
+                "InvalidationBatch": {
+                    "Paths": {"Quantity": 2, "Items": ["/", "/index.html"]},
+                    "CallerReference": ANY,
+                },
+            },
+        )
+        assert uploader.invalidate_cloudfront(cloudfront, "E123", ["index.html"]) == [
+            "/",
+            "/index.html",
+        ]
+        assert uploader.invalidate_cloudfront(cloudfront, "E123", ["app.0123456789.js"]) == []
+        stubber.assert_no_pending_responses()
@@ -1,63 +1,453 @@
 import argparse
+import hashlib
+import json
 import logging
 import mimetypes
 import os
+import re
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, NamedTuple, Optional
 
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+
+DEFAULT_WORKERS = 8
+# Parts uploaded concurrently for each multipart file
+DEFAULT_PART_CONCURRENCY = 4
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
+HASH_BLOCK_SIZE = 1024 * 1024
+DEFAULT_CONTENT_TYPE = "binary/octet-stream"
+# Names made unique by their content (see build_docs.py) never change, the others are cached by
+# CloudFront and revalidated by browsers, then invalidated when they change
+HASHED_NAME_PATTERN = re.compile(r"\.[0-9a-f]{10}\.[\w.]+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = "public, max-age=0, s-maxage=86400"
+# Past this many paths a single wildcard invalidation is cheaper
+MAX_INVALIDATION_PATHS = 15
+COMPRESSED_SUFFIXES = (".gz", ".br")
+INDEX_NAME = "index.html"
+# Object headers set on upload, an object whose headers differ is uploaded again
+HEADER_FIELDS = ("ContentType", "CacheControl", "ContentEncoding")
+# Keys per DeleteObjects request
+DELETE_BATCH_SIZE = 1000
+
+mimetypes.add_type("application/x-yaml", ".yaml")
+mimetypes.add_type("application/json", ".map")
 
 
 def configure_logging():
     logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
 
-def upload_to_s3(directory_path, bucket_name):
-    """Upload files from a local directory to an S3 bucket.
+class LocalFile(NamedTuple):
+    """A file to upload and the ETag S3 will report for it."""
+
+    path: str
+    key: str
+    content_type: str
+    etag: str
+    content_encoding: Optional[str] = None
+    cache_control: str = DEFAULT_CACHE_CONTROL
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """Headers the object is uploaded with, by `HEADER_FIELDS` name."""
+        headers = {"ContentType": self.content_type, "CacheControl": self.cache_control}
+        if self.content_encoding:
+            headers["ContentEncoding"] = self.content_encoding
+        return headers
+
+
+class RemoteObject(NamedTuple):
+    """An object already in the bucket, its headers are None until fetched."""
+
+    etag: str
+    headers: Optional[Dict[str, str]] = None
+
+
+class UploadResult(NamedTuple):
+    """Keys uploaded, skipped because unchanged, failed, and deleted during a run."""
 
-    Args:
-        directory_path (str): The local directory path.
-        bucket_name (str): The name of the S3 bucket.
+    uploaded: List[str]
+    skipped: List[str]
+    failed: List[str]
+    deleted: List[str]
+
+
+def compute_etag(
+    file_path: str,
+    threshold: int = MULTIPART_THRESHOLD,
+    chunksize: int = MULTIPART_CHUNKSIZE,
+) -> str:
+    """
+    Compute the ETag S3 assigns to a file uploaded with the given transfer settings.
+    Single part uploads get the MD5 of the content, multipart uploads the MD5 of the parts' MD5s
+    followed by the number of parts.
+    :param file_path: Local file
+    :param threshold: Size from which the file is uploaded in parts
+    :param chunksize: Size of each part
+    :return: ETag, without quotes
     """
-    s3 = boto3.client("s3")
-    logging.info(f"Started uploading files from '{directory_path}' to S3 " "bucket '{bucket_name}'")
+    if os.path.getsize(file_path) < threshold:
+        digest = hashlib.md5()
+        with open(file_path, "rb") as data:
+            for block in iter(lambda: data.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    part_digests = []
+    with open(file_path, "rb") as data:
+        for part in iter(lambda: data.read(chunksize), b""):
+            part_digests.append(hashlib.md5(part).digest())
+    return f"{hashlib.md5(b''.join(part_digests)).hexdigest()}-{len(part_digests)}"
+
 
-    for root, _, files in os.walk(directory_path):
-        for filename in files:
+def cache_control_for(key: str) -> str:
+    """Cache content hashed files forever, and the others until they are invalidated."""
+    return IMMUTABLE_CACHE_CONTROL if HASHED_NAME_PATTERN.search(key) else DEFAULT_CACHE_CONTROL
+
+
+def collect_files(
+    directory_path: str, prefix: str = "", transfer_config: Optional[TransferConfig] = None
+) -> List[LocalFile]:
+    """
+    List the files of a directory with their S3 keys, headers and expected ETags.
+    Precompressed `.gz` and `.br` variants keep the content type of the original file.
+    :param directory_path: The local directory path
+    :param prefix: Prefix prepended to every key
+    :param transfer_config: Transfer settings the files will be uploaded with
+    :return: Files, in walking order
+    """
+    transfer_config = transfer_config or create_transfer_config()
+    files = []
+    for root, _, filenames in os.walk(directory_path):
+        for filename in filenames:
             file_path = os.path.join(root, filename)
-            s3_key = os.path.relpath(file_path, directory_path)
-
-            content_type, _ = mimetypes.guess_type(file_path)
-            content_type = content_type or "binary/octet-stream"
-
-            try:
-                with open(file_path, "rb") as data:
-                    s3.put_object(
-                        Bucket=bucket_name,
-                        Key=s3_key,
-                        Body=data,
-                        ContentType=content_type,
-                    )
-                logging.info(
-                    f"Uploaded file '{file_path}' to S3 bucket "
-                    "'{bucket_name}' with key '{s3_key}'"
+            relative_path = os.path.relpath(file_path, directory_path).replace(os.sep, "/")
+            key = prefix + relative_path
+            content_type, content_encoding = mimetypes.guess_type(file_path)
+            etag = compute_etag(
+                file_path, transfer_config.multipart_threshold, transfer_config.multipart_chunksize
+            )
+            files.append(
+                LocalFile(
+                    file_path,
+                    key,
+                    content_type or DEFAULT_CONTENT_TYPE,
+                    etag,
+                    content_encoding,
+                    cache_control_for(key),
                 )
-            except Exception as e:
-                logging.error(f"Error while uploading file '{file_path}': {e}")
+            )
+    return files
+
+
+def fetch_remote_objects(s3, bucket_name: str, prefix: str = "") -> Dict[str, RemoteObject]:
+    """
+    List the objects already in the bucket, a page of 1000 keys per request. The listing has
+    no headers, see `fetch_headers`.
+    :param s3: S3 client
+    :param bucket_name: The name of the S3 bucket
+    :param prefix: Only list keys starting with this prefix
+    :return: Objects by key, with their ETag without quotes
+    """
+    objects = {}
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+        for item in page.get("Contents", []):
+            objects[item["Key"]] = RemoteObject(item["ETag"].strip('"'))
+    return objects
+
+
+def fetch_headers(s3, bucket_name: str, key: str) -> Dict[str, str]:
+    """
+    Read the headers of an object, by `HEADER_FIELDS` name.
+    :param s3: S3 client
+    :param bucket_name: The name of the S3 bucket
+    :param key: Object key
+    :return: Headers, empty if they could not be read so that the object is uploaded again
+    """
+    try:
+        response = s3.head_object(Bucket=bucket_name, Key=key)
+    except Exception as e:
+        logging.warning(f"Could not read the headers of '{key}', uploading it again: {e}")
+        return {}
+    return {field: response[field] for field in HEADER_FIELDS if response.get(field)}
+
+
+def load_manifest(manifest_path: Optional[str]) -> Dict[str, RemoteObject]:
+    """Load the objects recorded by a previous run, if any."""
+    if not manifest_path or not os.path.isfile(manifest_path):
+        return {}
+    with open(manifest_path) as file:
+        manifest = json.load(file)
+    # Manifests of older runs only hold ETags, their headers are fetched
+    return {
+        key: RemoteObject(value) if isinstance(value, str) else RemoteObject(**value)
+        for key, value in manifest.items()
+    }
+
+
+def save_manifest(manifest_path: str, objects: Dict[str, RemoteObject]):
+    """Record the ETags and headers of the uploaded files for the next run."""
+    with open(manifest_path, "w") as file:
+        json.dump(
+            {key: remote._asdict() for key, remote in objects.items()},
+            file,
+            indent=2,
+            sort_keys=True,
+        )
+
+
+def create_client(workers: int = DEFAULT_WORKERS, part_concurrency: int = DEFAULT_PART_CONCURRENCY):
+    """
+    Create an S3 client shared by all the upload threads.
+    :param workers: Files uploaded concurrently
+    :param part_concurrency: Parts uploaded concurrently for each file
+    :return: S3 client with a connection pool large enough for every thread
+    """
+    config = Config(
+        max_pool_connections=workers * part_concurrency,
+        retries={"max_attempts": 10, "mode": "adaptive"},
+    )
+    return boto3.client("s3", config=config)
+
+
+def create_transfer_config(part_concurrency: int = DEFAULT_PART_CONCURRENCY) -> TransferConfig:
+    """Transfer settings switching to multipart uploads for large files."""
+    return TransferConfig(
+        multipart_threshold=MULTIPART_THRESHOLD,
+        multipart_chunksize=MULTIPART_CHUNKSIZE,
+        max_concurrency=part_concurrency,
+    )
+
+
+def upload_file(s3, bucket_name: str, local_file: LocalFile, transfer_config: TransferConfig):
+    """Upload a single file, in parts if it is large."""
+    s3.upload_file(
+        local_file.path,
+        bucket_name,
+        local_file.key,
+        ExtraArgs=local_file.headers,
+        Config=transfer_config,
+    )
+
+
+def delete_objects(s3, bucket_name: str, keys: List[str]) -> List[str]:
+    """
+    Delete objects, a batch of `DELETE_BATCH_SIZE` keys per request.
+    :param s3: S3 client
+    :param bucket_name: The name of the S3 bucket
+    :param keys: Keys to delete
+    :return: Keys deleted
+    """
+    deleted = []
+    for start in range(0, len(keys), DELETE_BATCH_SIZE):
+        end = start + DELETE_BATCH_SIZE
+        batch = keys[start:end]
+        response = s3.delete_objects(
+            Bucket=bucket_name,
+            Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+        )
+        for error in response.get("Errors", []):
+            logging.error(f"Error while deleting key '{error['Key']}': {error.get('Message')}")
+        failed = {error["Key"] for error in response.get("Errors", [])}
+        deleted += [key for key in batch if key not in failed]
+    return deleted
+
+
+def upload_to_s3(
+    directory_path: str,
+    bucket_name: str,
+    prefix: str = "",
+    workers: int = DEFAULT_WORKERS,
+    manifest_path: Optional[str] = None,
+    force: bool = False,
+    delete: bool = False,
+    s3=None,
+) -> UploadResult:
+    """
+    Upload the new and changed files of a local directory to an S3 bucket.
+
+    Files whose content and headers match the object already stored under their key are
+    skipped. The stored ETags come from the manifest of a previous run when there is one, from
+    listing the bucket otherwise. Headers the manifest does not hold are read from the objects
+    whose ETag matches. The other files are uploaded from a bounded thread pool over a shared
+    client, large ones in parts, content hashed ones before the pages referencing them.
+    :param directory_path: The local directory path
+    :param bucket_name: The name of the S3 bucket
+    :param prefix: Prefix prepended to every key
+    :param workers: Files uploaded concurrently
+    :param manifest_path: JSON file of the ETags uploaded by the previous run, updated after
+        this one (default: compare with the bucket listing)
+    :param force: Upload every file, even unchanged ones
+    :param delete: Delete the objects under the prefix that have no local file, once every
+        file is uploaded (the manifest's keys when there is one, the listed ones otherwise)
+    :param s3: S3 client (default: new client sized for the workers)
+    :return: Keys uploaded, skipped, failed and deleted
+    """
+    s3 = s3 or create_client(workers)
+    transfer_config = create_transfer_config()
+    logging.info(f"Started uploading files from '{directory_path}' to S3 bucket '{bucket_name}'")
+
+    files = collect_files(directory_path, prefix, transfer_config)
+    remote: Dict[str, RemoteObject] = {}
+    if not force or delete:
+        remote = load_manifest(manifest_path) or fetch_remote_objects(s3, bucket_name, prefix)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        same_content = [
+            file
+            for file in files
+            if not force and file.key in remote and remote[file.key].etag == file.etag
+        ]
+        unknown = [file for file in same_content if remote[file.key].headers is None]
+        headers = executor.map(lambda file: fetch_headers(s3, bucket_name, file.key), unknown)
+        for file, file_headers in zip(unknown, headers):
+            remote[file.key] = RemoteObject(file.etag, file_headers)
+        unchanged = {file.key for file in same_content if remote[file.key].headers == file.headers}
+        changed = [file for file in files if file.key not in unchanged]
+        result = UploadResult([], [file.key for file in files if file.key in unchanged], [], [])
+
+        # Content hashed files go first, so that pages never reference files not uploaded yet
+        hashed = [file for file in changed if file.cache_control == IMMUTABLE_CACHE_CONTROL]
+        others = [file for file in changed if file.cache_control != IMMUTABLE_CACHE_CONTROL]
+        for batch in (hashed, others):
+            if result.failed:
+                logging.error("Not uploading the pages, some of the files they reference failed")
+                result.failed.extend(file.key for file in batch)
+                break
+            futures = {
+                executor.submit(upload_file, s3, bucket_name, file, transfer_config): file
+                for file in batch
+            }
+            for future in as_completed(futures):
+                file = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    logging.error(f"Error while uploading file '{file.path}': {e}")
+                    result.failed.append(file.key)
+                else:
+                    logging.info(f"Uploaded file '{file.path}' with key '{file.key}'")
+                    result.uploaded.append(file.key)
+
+    local_keys = {file.key for file in files}
+    stale = sorted(key for key in remote if key.startswith(prefix) and key not in local_keys)
+    if delete and stale:
+        if result.failed:
+            logging.error("Not deleting the stale objects, some files failed to upload")
+        else:
+            result.deleted.extend(delete_objects(s3, bucket_name, stale))
+
+    logging.info(
+        f"Uploaded {len(result.uploaded)} files, skipped {len(result.skipped)} unchanged files, "
+        f"{len(result.failed)} failed, deleted {len(result.deleted)} stale objects"
+    )
+    if manifest_path:
+        failed = set(result.failed)
+        remote.update(
+            {
+                file.key: RemoteObject(file.etag, file.headers)
+                for file in files
+                if file.key not in failed
+            }
+        )
+        for key in result.deleted:
+            remote.pop(key, None)
+        save_manifest(manifest_path, remote)
+    return result
+
+
+def invalidation_paths(keys: List[str]) -> List[str]:
+    """
+    Paths to invalidate in CloudFront after uploading the given keys.
+    Content hashed files are new objects that were never cached, only the other ones are
+    invalidated, with the directory itself for index pages.
+    :param keys: Uploaded keys
+    :return: Sorted paths, a single wildcard when there are too many of them
+    """
+    paths = set()
+    for key in keys:
+        if HASHED_NAME_PATTERN.search(key):
+            continue
+        paths.add(f"/{key}")
+        original = key[:-3] if key.endswith(COMPRESSED_SUFFIXES) else key
+        if original == INDEX_NAME or original.endswith(f"/{INDEX_NAME}"):
+            paths.add(f"/{original[: -len(INDEX_NAME)]}")
+    if len(paths) > MAX_INVALIDATION_PATHS:
+        return ["/*"]
+    return sorted(paths)
+
+
+def invalidate_cloudfront(cloudfront, distribution_id: str, keys: List[str]) -> List[str]:
+    """
+    Invalidate the cached copies of the changed files.
+    :param cloudfront: CloudFront client
+    :param distribution_id: Distribution serving the bucket
+    :param keys: Uploaded keys
+    :return: Invalidated paths, none when only new content hashed files were uploaded
+    """
+    paths = invalidation_paths(keys)
+    if not paths:
+        logging.info("No cached path changed, skipping the CloudFront invalidation")
+        return paths
+    cloudfront.create_invalidation(
+        DistributionId=distribution_id,
+        InvalidationBatch={
+            "Paths": {"Quantity": len(paths), "Items": paths},
+            "CallerReference": str(time.time()),
+        },
+    )
+    logging.info(f"Invalidated {len(paths)} paths: {', '.join(paths)}")
+    return paths
 
 
 def main():
     parser = argparse.ArgumentParser(
-        description="Upload files from a local directory to an S3 bucket."
+        description="Upload the new and changed files of a local directory to an S3 bucket."
     )
     parser.add_argument("directory_path", type=str, help="The local directory path")
     parser.add_argument("bucket_name", type=str, help="The name of the S3 bucket")
+    parser.add_argument("--prefix", default="", help="Prefix prepended to every key")
+    parser.add_argument(
+        "--workers", type=int, default=DEFAULT_WORKERS, help="Files uploaded concurrently"
+    )
+    parser.add_argument(
+        "--manifest", help="JSON file of the ETags uploaded by the previous run, to skip listing"
+    )
+    parser.add_argument("--force", action="store_true", help="Upload unchanged files too")
+    parser.add_argument(
+        "--delete", action="store_true", help="Delete the objects that have no local file"
+    )
+    parser.add_argument(
+        "--distribution-id", help="CloudFront distribution to invalidate the changed paths of"
+    )
 
     args = parser.parse_args()
 
     if not os.path.isdir(args.directory_path):
         sys.exit(f"Directory not found: {args.directory_path}")
 
-    upload_to_s3(args.directory_path, args.bucket_name)
+    result = upload_to_s3(
+        args.directory_path,
+        args.bucket_name,
+        prefix=args.prefix,
+        workers=args.workers,
+        manifest_path=args.manifest,
+        force=args.force,
+        delete=args.delete,
+    )
+    if result.failed:
+        sys.exit(1)
+    if args.distribution_id:
+        invalidate_cloudfront(
+            boto3.client("cloudfront"), args.distribution_id, result.uploaded + result.deleted
+        )
 
 
 if __name__ == "__main__":
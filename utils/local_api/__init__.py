@@ -0,0 +1,406 @@
+import importlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import yaml
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+API_DIR = ROOT_DIR / "aws" / "api" / "v1"
+SPEC_PATH = API_DIR / "api-spec" / "main.yaml"
+TEMPLATE_PATH = API_DIR / "template.yaml"
+
+HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch")
+DEFAULT_ENVIRONMENT = {"DOCS_DOMAIN_NAME": "localhost"}
+DEFAULT_TIMEOUT_SECONDS = 3
+# `${Function.Arn}`, or `${FunctionAlias<name>}` for the alias SAM publishes with AutoPublishAlias
+INTEGRATION_FUNCTION_PATTERN = re.compile(r"\$\{(\w+?)(?:\.Arn|Alias\w+)\}")
+PATH_PARAMETER_PATTERN = re.compile(r"\{(\w+)\+?\}")
+# What API Gateway answers for paths and methods without an integration
+MISSING_ROUTE_RESPONSE = {
+    "statusCode": 403,
+    "headers": {"Content-Type": "application/json"},
+    "body": '{"message":"Missing Authentication Token"}',
+}
+
+Handler = Callable[[Dict, object], Dict]
+
+
+class _TemplateLoader(yaml.SafeLoader):
+    """YAML loader keeping CloudFormation intrinsic tags (!Ref, !Sub, ...) as plain values."""
+
+
+_TemplateLoader.add_multi_constructor(
+    "!",
+    lambda loader, suffix, node: {
+        suffix: (
+            loader.construct_scalar(node)
+            if isinstance(node, yaml.ScalarNode)
+            else loader.construct_sequence(node)
+            if isinstance(node, yaml.SequenceNode)
+            else loader.construct_mapping(node)
+        )
+    },
+)
+
+
+def load_yaml(path: Path) -> Dict:
+    """Load a spec or template file."""
+    with open(path) as file:
+        return yaml.load(file, Loader=_TemplateLoader)
+
+
+class LocalContext:
+    """Minimal stand-in for the Lambda context object."""
+
+    def __init__(self, function_name: str, timeout: float = DEFAULT_TIMEOUT_SECONDS):
+        self.function_name = function_name
+        self.aws_request_id = str(uuid.uuid4())
+        self.invoked_function_arn = f"arn:aws:lambda:local:000000000000:function:{function_name}"
+        self.memory_limit_in_mb = 128
+        self._deadline = time.monotonic() + timeout
+
+    def get_remaining_time_in_millis(self) -> int:
+        return max(int((self._deadline - time.monotonic()) * 1000), 0)
+
+
+class Route:
+    """An API path and method served by a lambda handler."""
+
+    def __init__(
+        self, method: str, resource: str, function_name: str, handler: Handler, timeout: float
+    ):
+        self.method = method
+        self.resource = resource
+        self.function_name = function_name
+        self.handler = handler
+        self.timeout = timeout
+        # Split into alternating literal parts and parameter names
+        parts = PATH_PARAMETER_PATTERN.split(resource)
+        self.pattern = re.compile(
+            "^"
+            + "".join(
+                f"(?P<{part}>[^/]+)" if i % 2 else re.escape(part) for i, part in enumerate(parts)
+            )
+            + "$"
+        )
+        self.has_parameters = "{" in resource
+
+
+def build_event(
+    route: Route,
+    path: str,
+    query: Optional[Dict[str, List[str]]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    body: Optional[str] = None,
+    path_parameters: Optional[Dict[str, str]] = None,
+    source_ip: str = "127.0.0.1",
+) -> Dict:
+    """
+    Build an API Gateway (REST) proxy event.
+    :param route: Matched route
+    :param path: Request path
+    :param query: Query string parameters, with all their values
+    :param headers: Request headers
+    :param body: Request body
+    :param path_parameters: Values of the path template parameters
+    :param source_ip: Client address
+    :return: Lambda event data
+    """
+    query = query or {}
+    headers = headers or {}
+    return {
+        "resource": route.resource,
+        "path": path,
+        "httpMethod": route.method,
+        "headers": headers or None,
+        "multiValueHeaders": {key: [value] for key, value in headers.items()} or None,
+        "queryStringParameters": {key: values[-1] for key, values in query.items()} or None,
+        "multiValueQueryStringParameters": query or None,
+        "pathParameters": path_parameters or None,
+        "stageVariables": None,
+        "requestContext": {
+            "resourcePath": route.resource,
+            "httpMethod": route.method,
+            "path": path,
+            "stage": "local",
+            "requestId": str(uuid.uuid4()),
+            "requestTimeEpoch": int(time.time() * 1000),
+            "identity": {"sourceIp": source_ip},
+        },
+        "body": body,
+        "isBase64Encoded": False,
+    }
+
+
+def build_function_url_event(
+    route: Route,
+    path: str,
+    query: Optional[Dict[str, List[str]]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    body: Optional[str] = None,
+    source_ip: str = "127.0.0.1",
+) -> Dict:
+    """
+    Build a function URL event (payload format 2.0), which carries the path but no resource.
+    :param route: Matched route
+    :param path: Request path
+    :param query: Query string parameters, with all their values
+    :param headers: Request headers, lowercased like function URLs do
+    :param body: Request body
+    :param source_ip: Client address
+    :return: Lambda event data
+    """
+    query = query or {}
+    headers = {key.lower(): value for key, value in (headers or {}).items()}
+    now = time.time()
+    return {
+        "version": "2.0",
+        "routeKey": "$default",
+        "rawPath": path,
+        "rawQueryString": urlencode(query, doseq=True),
+        "headers": headers,
+        "queryStringParameters": {key: ",".join(values) for key, values in query.items()} or None,
+        "requestContext": {
+            "accountId": "anonymous",
+            "apiId": "local",
+            "domainName": "localhost",
+            "domainPrefix": "localhost",
+            "http": {
+                "method": route.method,
+                "path": path,
+                "protocol": "HTTP/1.1",
+                "sourceIp": source_ip,
+                "userAgent": headers.get("user-agent"),
+            },
+            "requestId": str(uuid.uuid4()),
+            "routeKey": "$default",
+            "stage": "$default",
+            "time": time.strftime("%d/%b/%Y:%H:%M:%S +0000", time.gmtime(now)),
+            "timeEpoch": int(now * 1000),
+        },
+        "body": body,
+        "isBase64Encoded": False,
+    }
+
+
+def read_body(response: Dict) -> str:
+    """
+    Get the whole body of a response, joining the chunks of a streamed one.
+    :param response: Lambda proxy response
+    :return: Response body
+    """
+    body = response.get("body") or ""
+    return body if isinstance(body, str) else "".join(body)
+
+
+class LocalApi:
+    """
+    In-process stand-in for `sam local start-api`.
+
+    Routes are read from the OpenAPI spec, and the lambda serving each one from the SAM template,
+    then requests are turned into API Gateway proxy events and handed straight to the handlers.
+    `invoke` skips HTTP entirely, `serve` exposes the routes over a threaded HTTP server.
+
+    With `function_url`, the handlers get function URL events instead, as behind a function URL
+    in RESPONSE_STREAM invoke mode: bodies returned as iterators of chunks are then served with
+    chunked transfer encoding, each chunk written as soon as it is produced.
+    """
+
+    def __init__(self, routes: List[Route], function_url: bool = False):
+        self.routes = routes
+        self.function_url = function_url
+        self._static: Dict[Tuple[str, str], Route] = {
+            (route.method, route.resource): route for route in routes if not route.has_parameters
+        }
+
+    @classmethod
+    def from_spec(
+        cls,
+        spec_path: Path = SPEC_PATH,
+        template_path: Path = TEMPLATE_PATH,
+        environment: Optional[Dict[str, str]] = None,
+        function_url: bool = False,
+    ) -> "LocalApi":
+        """
+        Create the harness for the API described by a spec and a SAM template.
+        :param spec_path: OpenAPI spec, path items may be `$ref`s to other files
+        :param template_path: SAM template declaring the lambdas referenced by the spec
+        :param environment: Variables set, if missing, before the handlers are imported
+            (default: docs domain set to localhost)
+        :param function_url: Whether the handlers get function URL events rather than API Gateway
+            REST proxy events (default: False)
+        :return: Local API
+        """
+        for key, value in (environment or DEFAULT_ENVIRONMENT).items():
+            os.environ.setdefault(key, value)
+
+        spec = load_yaml(spec_path)
+        template = load_yaml(template_path)
+        resources = template.get("Resources", {})
+        timeout = template.get("Globals", {}).get("Function", {}).get("Timeout")
+
+        routes = []
+        for resource, path_item in spec.get("paths", {}).items():
+            if "$ref" in path_item:
+                path_item = load_yaml(spec_path.parent / path_item["$ref"])
+            for method in HTTP_METHODS:
+                operation = path_item.get(method)
+                if not operation:
+                    continue
+                uri = operation.get("x-amazon-apigateway-integration", {}).get("uri", {})
+                match = INTEGRATION_FUNCTION_PATTERN.search(json.dumps(uri))
+                if not match:
+                    continue
+                function_name = match.group(1)
+                properties = resources[function_name]["Properties"]
+                handler = cls.import_handler(template_path.parent, properties)
+                routes.append(
+                    Route(
+                        method.upper(),
+                        resource,
+                        function_name,
+                        handler,
+                        properties.get("Timeout", timeout or DEFAULT_TIMEOUT_SECONDS),
+                    )
+                )
+        return cls(routes, function_url)
+
+    @staticmethod
+    def import_handler(template_dir: Path, properties: Dict) -> Handler:
+        """
+        Import a lambda handler the way the tests do, as a module relative to the repository root.
+        :param template_dir: Directory of the SAM template
+        :param properties: Properties of the function resource
+        :return: Handler function
+        """
+        module_name, function_name = properties["Handler"].rsplit(".", 1)
+        code_dir = (template_dir / properties["CodeUri"]).resolve().relative_to(ROOT_DIR)
+        module = importlib.import_module(".".join(code_dir.parts + (module_name,)))
+        return getattr(module, function_name)
+
+    def match(self, method: str, path: str) -> Tuple[Optional[Route], Dict[str, str]]:
+        """
+        Find the route serving a request.
+        :param method: HTTP method
+        :param path: Request path
+        :return: Matching route, if any, and the values of its path parameters
+        """
+        route = self._static.get((method, path))
+        if route is not None:
+            return route, {}
+        for route in self.routes:
+            if route.has_parameters and route.method == method:
+                match = route.pattern.match(path)
+                if match:
+                    return route, match.groupdict()
+        return None, {}
+
+    def invoke(
+        self,
+        method: str,
+        path: str,
+        query: Optional[Dict[str, List[str]]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        body: Optional[str] = None,
+    ) -> Dict:
+        """
+        Call the handler serving a request directly, without going through HTTP.
+        :param method: HTTP method
+        :param path: Request path
+        :param query: Query string parameters, with all their values
+        :param headers: Request headers
+        :param body: Request body
+        :return: Lambda proxy response, or a 403 like API Gateway for unknown routes, the body of
+            a streamed response is an iterator of chunks (see `read_body`)
+        """
+        route, path_parameters = self.match(method.upper(), path)
+        if route is None:
+            return dict(MISSING_ROUTE_RESPONSE)
+        if self.function_url:
+            event = build_function_url_event(route, path, query, headers, body)
+        else:
+            event = build_event(route, path, query, headers, body, path_parameters)
+        return route.handler(event, LocalContext(route.function_name, route.timeout))
+
+    def make_request_handler(self):
+        """Create the HTTP request handler class translating requests into invocations."""
+        api = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def handle_request(self):
+                url = urlsplit(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length).decode() if length else None
+                response = api.invoke(
+                    self.command,
+                    url.path,
+                    parse_qs(url.query, keep_blank_values=True),
+                    dict(self.headers.items()),
+                    body,
+                )
+                body = response.get("body") or ""
+                self.send_response(int(response.get("statusCode", 200)))
+                for key, value in (response.get("headers") or {}).items():
+                    self.send_header(key, value)
+                for key, values in (response.get("multiValueHeaders") or {}).items():
+                    for value in values:
+                        self.send_header(key, value)
+                if isinstance(body, str):
+                    payload = body.encode()
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                else:
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    self.write_chunks(body)
+
+            def write_chunks(self, chunks: Iterator[str]):
+                try:
+                    for chunk in chunks:
+                        data = chunk.encode()
+                        if data:
+                            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                            self.wfile.flush()
+                except Exception:
+                    # The status line is sent, the client sees a truncated body
+                    self.close_connection = True
+                    return
+                self.wfile.write(b"0\r\n\r\n")
+
+            do_GET = do_POST = do_PUT = do_DELETE = do_PATCH = do_OPTIONS = handle_request
+
+            def log_message(self, format, *args):
+                pass
+
+        return RequestHandler
+
+    @contextmanager
+    def serve(self, host: str = "127.0.0.1", port: int = 0) -> Iterator[str]:
+        """
+        Serve the API over HTTP from a background thread.
+        :param host: Interface to bind
+        :param port: Port to bind (default: any free port)
+        :return: Context manager yielding the base URL of the server
+        """
+        server = ThreadingHTTPServer((host, port), self.make_request_handler())
+        server.daemon_threads = True
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            yield f"http://{host}:{server.server_address[1]}"
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
@@ -0,0 +1,77 @@
+import argparse
+import cProfile
+import logging
+import pstats
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from utils.local_api import DEFAULT_ENVIRONMENT, LocalApi
+
+
+def configure_logging():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+
+def serve(api: LocalApi, args):
+    """Serve the API over HTTP until interrupted."""
+    with api.serve(args.host, args.port) as url:
+        logging.info(f"Serving {len(api.routes)} routes on {url}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+def load(api: LocalApi, args):
+    """Invoke a route in-process repeatedly and report the throughput."""
+    url = urlsplit(args.url)
+    query = parse_qs(url.query, keep_blank_values=True)
+    profiler = cProfile.Profile() if args.profile else None
+
+    if profiler:
+        profiler.enable()
+    started = time.perf_counter()
+    for _ in range(args.requests):
+        api.invoke(args.method, url.path, query, body=args.body)
+    elapsed = time.perf_counter() - started
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
+
+    logging.info(
+        f"{args.requests} requests in {elapsed:.3f}s: {args.requests / elapsed:.0f} requests/s, "
+        f"{elapsed / args.requests * 1e6:.1f}us/request"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the API handlers in-process, from the OpenAPI spec and SAM template."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="Serve the API over HTTP")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    serve_parser.add_argument("--port", type=int, default=3000, help="Port to bind")
+    serve_parser.add_argument("--log-level", default="INFO", help="Handlers' LOG_LEVEL")
+    serve_parser.set_defaults(func=serve)
+
+    load_parser = subparsers.add_parser("load", help="Invoke a route repeatedly, without HTTP")
+    load_parser.add_argument("method", help="HTTP method, e.g. GET")
+    load_parser.add_argument("url", help="Path and query string, e.g. '/hello?name=John'")
+    load_parser.add_argument("--body", help="Request body")
+    load_parser.add_argument("-n", "--requests", type=int, default=10_000, help="Invocations")
+    load_parser.add_argument("--profile", help="Write a cProfile dump of the run to this file")
+    load_parser.add_argument("--log-level", default="WARNING", help="Handlers' LOG_LEVEL")
+    load_parser.set_defaults(func=load)
+
+    args = parser.parse_args()
+    environment = {**DEFAULT_ENVIRONMENT, "LOG_LEVEL": args.log_level}
+    args.func(LocalApi.from_spec(environment=environment), args)
+
+
+if __name__ == "__main__":
+    configure_logging()
+    main()
@@ -1,2 +1,307 @@
-STARTED_PROCESSING_LOG = "Start processing lambda with event: {}"
-ENDED_PROCESSING_LOG = "End processing lambda with event: {}"
+import json
+import os
+import sys
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+
+# Same values as the standard library levels, without importing `logging` on cold start
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+LEVELS = {name: level for level, name in LEVEL_NAMES.items()}
+
+STARTED_PROCESSING_LOG = "Start processing lambda"
+ENDED_PROCESSING_LOG = "End processing lambda"
+EXCEPTION_LOG = "Exception while processing lambda"
+
+DEFAULT_LOG_LEVEL = "INFO"
+DEFAULT_BATCH_SIZE = 20
+DEFAULT_MAX_FIELD_LENGTH = 256
+DEFAULT_TRACE_LIMIT = 5
+DEFAULT_TRACE_WINDOW_SECONDS = 60.0
+MAX_TRACKED_TRACES = 256
+
+REDACTED = "[REDACTED]"
+SENSITIVE_HEADERS = frozenset({"authorization", "cookie", "set-cookie", "x-api-key"})
+EVENT_FIELDS = ("httpMethod", "resource", "path")
+
+# Sampling decisions are taken on a fixed scale so they are stable for a given request id
+_SAMPLING_SCALE = 10_000
+
+
+def truncate(value: Any, max_length: int = DEFAULT_MAX_FIELD_LENGTH) -> Any:
+    """
+    Truncate long strings, leaving other values untouched.
+    :param value: Value to truncate
+    :param max_length: Maximum number of characters kept (default: 256)
+    :return: Truncated value
+    """
+    if isinstance(value, str) and len(value) > max_length:
+        return f"{value[:max_length]}...[{len(value) - max_length} more chars]"
+    return value
+
+
+def summarize_event(event: Dict, max_length: int = DEFAULT_MAX_FIELD_LENGTH) -> Dict:
+    """
+    Reduce an API Gateway event to the fields worth logging.
+    Credentials in headers are redacted and long values truncated.
+    :param event: Lambda event data
+    :param max_length: Maximum number of characters kept per value (default: 256)
+    :return: Event summary
+    """
+    if not isinstance(event, dict):
+        return {"event": truncate(str(event), max_length)}
+
+    summary = {key: event[key] for key in EVENT_FIELDS if key in event}
+
+    query_parameters = event.get("queryStringParameters")
+    if query_parameters:
+        summary["queryStringParameters"] = {
+            key: truncate(value, max_length) for key, value in query_parameters.items()
+        }
+
+    headers = event.get("headers")
+    if headers:
+        summary["headers"] = {
+            key: REDACTED if key.lower() in SENSITIVE_HEADERS else truncate(value, max_length)
+            for key, value in headers.items()
+        }
+
+    body = event.get("body")
+    if body is not None:
+        summary["body"] = truncate(body, max_length)
+
+    # Test invocations and some proxies send a null identity
+    source_ip = ((event.get("requestContext") or {}).get("identity") or {}).get("sourceIp")
+    if source_ip:
+        summary["sourceIp"] = source_ip
+
+    return summary
+
+
+class TraceLimiter:
+    """
+    Cap how many identical tracebacks are logged per time window.
+
+    Exceptions are identical when they share their type, message and the line that raised them.
+    At most `max_keys` distinct exceptions are tracked, the oldest being forgotten first.
+    """
+
+    def __init__(
+        self,
+        limit: int = DEFAULT_TRACE_LIMIT,
+        window: float = DEFAULT_TRACE_WINDOW_SECONDS,
+        max_keys: int = MAX_TRACKED_TRACES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self.clock = clock
+        # Key -> [window start, traces logged in window, traces suppressed in window]
+        self._windows: Dict[Tuple, List] = {}
+
+    @classmethod
+    def from_env(cls) -> "TraceLimiter":
+        """
+        Create a limiter configured from the lambda environment.
+        :return: Trace limiter
+        """
+        return cls(
+            limit=int(os.getenv("LOG_TRACE_LIMIT", DEFAULT_TRACE_LIMIT)),
+            window=float(os.getenv("LOG_TRACE_WINDOW_SECONDS", DEFAULT_TRACE_WINDOW_SECONDS)),
+        )
+
+    @staticmethod
+    def key(error: BaseException) -> Tuple:
+        """
+        Identify an exception by its type, message and raising line.
+        :param error: Exception instance
+        :return: Hashable key
+        """
+        tb = error.__traceback__
+        while tb is not None and tb.tb_next is not None:
+            tb = tb.tb_next
+        location = (tb.tb_frame.f_code.co_filename, tb.tb_lineno) if tb is not None else None
+        return type(error), str(error), location
+
+    def allow(self, error: BaseException) -> Tuple[bool, int]:
+        """
+        Decide whether the traceback of an exception may be logged.
+        :param error: Exception instance
+        :return: Whether the traceback may be logged, and how many identical tracebacks were
+            suppressed in the previous window
+        """
+        now = self.clock()
+        key = self.key(error)
+        state = self._windows.get(key)
+        if state is None or now - state[0] >= self.window:
+            suppressed = state[2] if state is not None else 0
+            if state is None and len(self._windows) >= self.max_keys:
+                del self._windows[next(iter(self._windows))]
+            self._windows[key] = [now, 1, 0]
+            return True, suppressed
+        if state[1] < self.limit:
+            state[1] += 1
+            return True, 0
+        state[2] += 1
+        return False, 0
+
+
+class StructuredLogger:
+    """
+    JSON logger writing one line per record to stdout.
+
+    Records below the enabled level are dropped before any formatting happens. Enabled records
+    are buffered as-is and only formatted, using the per-field formatters, when the buffer is
+    flushed, which happens once it holds `batch_size` records and at the end of every invocation.
+    Debug records are enabled for a stable sample of request ids.
+    """
+
+    def __init__(
+        self,
+        level: int = INFO,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        debug_sample_rate: float = 0.0,
+        stream: Optional[TextIO] = None,
+        field_formatters: Optional[Dict[str, Callable[[Any], Any]]] = None,
+        trace_limiter: Optional[TraceLimiter] = None,
+    ):
+        self.level = level
+        self.batch_size = max(batch_size, 1)
+        self.debug_sample_rate = debug_sample_rate
+        self.stream = stream
+        self.field_formatters = (
+            field_formatters if field_formatters is not None else {"event": summarize_event}
+        )
+        self.trace_limiter = trace_limiter if trace_limiter is not None else TraceLimiter()
+        self.request_id: Optional[str] = None
+        self._effective_level = level
+        self._records: List[Dict] = []
+
+    @classmethod
+    def from_env(cls) -> "StructuredLogger":
+        """
+        Create a logger configured from the lambda environment.
+        :return: Structured logger
+        """
+        return cls(
+            level=LEVELS.get(os.getenv("LOG_LEVEL", DEFAULT_LOG_LEVEL).upper(), INFO),
+            batch_size=int(os.getenv("LOG_BATCH_SIZE", DEFAULT_BATCH_SIZE)),
+            debug_sample_rate=float(os.getenv("LOG_DEBUG_SAMPLE_RATE", 0.0)),
+            trace_limiter=TraceLimiter.from_env(),
+        )
+
+    def bind(self, request_id: Optional[str]) -> None:
+        """
+        Attach the records that follow to a request and decide whether its debug logs are kept.
+        :param request_id: Lambda request id
+        """
+        self.request_id = request_id
+        self._effective_level = self.level
+        if self.debug_sample_rate > 0 and request_id is not None:
+            bucket = zlib.crc32(str(request_id).encode()) % _SAMPLING_SCALE
+            if bucket < self.debug_sample_rate * _SAMPLING_SCALE:
+                self._effective_level = min(self.level, DEBUG)
+
+    def is_enabled_for(self, level: int) -> bool:
+        """
+        Check whether records of the given level are kept for the current request.
+        :param level: Log level
+        :return: True if enabled
+        """
+        return level >= self._effective_level
+
+    def log(self, level: int, message: str, **fields) -> None:
+        """
+        Buffer a record, formatting is deferred to the next flush.
+        :param level: Log level
+        :param message: Log message
+        :param fields: Additional record fields
+        """
+        if level < self._effective_level:
+            return
+        self._records.append(
+            {
+                "timestamp": int(time.time() * 1000),
+                "level": LEVEL_NAMES.get(level, str(level)),
+                "message": message,
+                "requestId": self.request_id,
+                **fields,
+            }
+        )
+        if len(self._records) >= self.batch_size:
+            self.flush()
+
+    def debug(self, message: str, **fields) -> None:
+        self.log(DEBUG, message, **fields)
+
+    def info(self, message: str, **fields) -> None:
+        self.log(INFO, message, **fields)
+
+    def warning(self, message: str, **fields) -> None:
+        self.log(WARNING, message, **fields)
+
+    def error(self, message: str, **fields) -> None:
+        self.log(ERROR, message, **fields)
+
+    def exception(
+        self,
+        message: str,
+        error: BaseException,
+        level: int = ERROR,
+        with_traceback: bool = True,
+        **fields,
+    ) -> None:
+        """
+        Buffer a record describing an exception.
+        The traceback is only formatted when requested and allowed by the trace limiter.
+        :param message: Log message
+        :param error: Exception instance
+        :param level: Log level (default: ERROR)
+        :param with_traceback: Whether to include the traceback (default: True)
+        :param fields: Additional record fields
+        """
+        if level < self._effective_level:
+            return
+        fields["error"] = str(error)
+        fields["errorType"] = type(error).__name__
+        if with_traceback:
+            allowed, suppressed = self.trace_limiter.allow(error)
+            if allowed:
+                # Only unexpected errors need it, keep it off the cold start path
+                import traceback
+
+                fields["trace"] = "".join(
+                    traceback.format_exception(type(error), error, error.__traceback__)
+                )
+            if suppressed:
+                fields["suppressedTraces"] = suppressed
+        self.log(level, message, **fields)
+
+    def format(self, record: Dict) -> str:
+        """
+        Format a buffered record as a single JSON line.
+        :param record: Buffered record
+        :return: JSON line
+        """
+        for field, formatter in self.field_formatters.items():
+            if field in record:
+                record[field] = formatter(record[field])
+        return json.dumps(record, default=str, separators=(",", ":"))
+
+    def flush(self) -> None:
+        """Format the buffered records and write them to stdout in a single call."""
+        if not self._records:
+            return
+        records, self._records = self._records, []
+        stream = self.stream or sys.stdout
+        stream.write("".join(f"{self.format(record)}\n" for record in records))
+        stream.flush()
+
+
+# Configured once per container
+logger = StructuredLogger.from_env()
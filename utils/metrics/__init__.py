@@ -0,0 +1,174 @@
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, Optional, TextIO, Tuple
+
+from utils.serializers import Serializer, serializer
+
+DEFAULT_NAMESPACE = "HelloWorldApi"
+ROUTE_DIMENSION = "route"
+UNROUTED = "unrouted"
+MAX_CACHED_DIRECTIVES = 128
+
+# Phases of an invocation timed by the pipeline
+VALIDATE_PHASE = "Validate"
+PRODUCE_PHASE = "Produce"
+SERIALIZE_PHASE = "Serialize"
+EXCEPTION_PHASE = "Exception"
+
+COLD_START_METRIC = "ColdStart"
+INVOCATION_TIME_METRIC = "InvocationTime"
+ERROR_METRIC_PREFIX = "Errors."
+MILLISECONDS = "Milliseconds"
+COUNT = "Count"
+
+
+class Metrics:
+    """
+    CloudWatch metrics in embedded metric format (EMF), aggregated per invocation.
+
+    Timings and counts are added to in-memory dictionaries while the invocation runs and
+    written by `flush` as a single JSON line on stdout, which CloudWatch Logs turns into metrics
+    with no extra network call. Every metric of the line shares the route dimension.
+    """
+
+    def __init__(
+        self,
+        namespace: str = DEFAULT_NAMESPACE,
+        enabled: bool = True,
+        stream: Optional[TextIO] = None,
+        clock: Callable[[], int] = time.perf_counter_ns,
+        json_serializer: Serializer = serializer,
+    ):
+        self.namespace = namespace
+        self.enabled = enabled
+        self.stream = stream
+        self.clock = clock
+        self.json_serializer = json_serializer
+        self.cold_start = True
+        self.route: Optional[str] = None
+        self.request_id: Optional[str] = None
+        self._started_at = 0
+        self._timings: Dict[str, int] = {}
+        self._counts: Dict[str, float] = {}
+        self._directives: Dict[Tuple[Tuple[str, ...], Tuple[str, ...]], str] = {}
+
+    @classmethod
+    def from_env(cls) -> "Metrics":
+        """
+        Create a metrics recorder configured from the lambda environment.
+        :return: Metrics recorder
+        """
+        return cls(
+            namespace=os.getenv("METRICS_NAMESPACE", DEFAULT_NAMESPACE),
+            enabled=os.getenv("METRICS_ENABLED", "true").lower() != "false",
+        )
+
+    def start(self, request_id: Optional[str] = None) -> None:
+        """
+        Start recording the metrics of an invocation.
+        :param request_id: Lambda request id, kept as a property of the metrics line
+        """
+        self.request_id = request_id
+        self.route = None
+        self._timings = {}
+        self._counts = {}
+        self._started_at = self.clock()
+
+    def add_time(self, phase: str, started_at: int) -> int:
+        """
+        Add the time elapsed since `started_at` to a phase.
+        :param phase: Phase name, the metric is `<phase>Time`
+        :param started_at: Value of `clock()` when the phase started
+        :return: Current value of `clock()`, the start of the next phase
+        """
+        now = self.clock()
+        self.add_elapsed(phase, now - started_at)
+        return now
+
+    def add_elapsed(self, phase: str, elapsed_ns: int) -> None:
+        """
+        Add a duration measured by the caller to a phase.
+        :param phase: Phase name, the metric is `<phase>Time`
+        :param elapsed_ns: Duration in nanoseconds
+        """
+        self._timings[phase] = self._timings.get(phase, 0) + elapsed_ns
+
+    def count(self, name: str, value: float = 1) -> None:
+        """
+        Add to a count metric of the invocation.
+        :param name: Metric name
+        :param value: Amount added (default: 1)
+        """
+        self._counts[name] = self._counts.get(name, 0) + value
+
+    def count_error(self, error_class: type) -> None:
+        """
+        Count an error by class, e.g. `Errors.NotFoundError`.
+        :param error_class: Class of the error answered with
+        """
+        self.count(f"{ERROR_METRIC_PREFIX}{error_class.__name__}")
+
+    def directive(self, timing_names: Tuple[str, ...], count_names: Tuple[str, ...]) -> str:
+        """
+        Serialized `_aws` metadata of a metrics line, cached by the metrics it declares.
+        Invocations of a route time the same phases, so the metadata is built once per outcome.
+        :param timing_names: Names of the millisecond metrics
+        :param count_names: Names of the count metrics
+        :return: JSON object, without its timestamp
+        """
+        key = (timing_names, count_names)
+        directive = self._directives.get(key)
+        if directive is None:
+            definitions = [{"Name": name, "Unit": MILLISECONDS} for name in timing_names]
+            definitions += [{"Name": name, "Unit": COUNT} for name in count_names]
+            directive = self.json_serializer.dumps(
+                [
+                    {
+                        "Namespace": self.namespace,
+                        "Dimensions": [[ROUTE_DIMENSION]],
+                        "Metrics": definitions,
+                    }
+                ]
+            )
+            if len(self._directives) < MAX_CACHED_DIRECTIVES:
+                self._directives[key] = directive
+        return directive
+
+    def format(self) -> str:
+        """
+        Format the metrics of the invocation as an EMF JSON line.
+        :return: JSON line
+        """
+        values: Dict[str, Any] = {
+            ROUTE_DIMENSION: self.route or UNROUTED,
+            "requestId": None if self.request_id is None else str(self.request_id),
+            INVOCATION_TIME_METRIC: (self.clock() - self._started_at) / 1e6,
+        }
+        for phase, elapsed in self._timings.items():
+            values[f"{phase}Time"] = elapsed / 1e6
+        values[COLD_START_METRIC] = int(self.cold_start)
+        values.update(self._counts)
+
+        timing_names = (INVOCATION_TIME_METRIC,) + tuple(f"{phase}Time" for phase in self._timings)
+        count_names = (COLD_START_METRIC,) + tuple(self._counts)
+        # The values are serialized by the layer's backend, the metadata comes from the cache
+        return (
+            f'{{"_aws":{{"Timestamp":{int(time.time() * 1000)},"CloudWatchMetrics":'
+            f"{self.directive(timing_names, count_names)}}},"
+            f"{self.json_serializer.dumps(values)[1:]}"
+        )
+
+    def flush(self) -> None:
+        """Write the metrics of the invocation, the next ones are warm invocations."""
+        if self.enabled:
+            stream = self.stream or sys.stdout
+            stream.write(f"{self.format()}\n")
+            stream.flush()
+        self.cold_start = False
+        self._timings = {}
+        self._counts = {}
+
+
+# Configured once per container, METRICS_ENABLED=false turns the metrics line off
+metrics = Metrics.from_env()
@@ -0,0 +1,400 @@
+import os
+import threading
+import time
+import types
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+from utils.errors import (
+    DOWNSTREAM_UNAVAILABLE_ERROR,
+    GatewayTimeoutError,
+    LoadSheddingError,
+    ServiceUnavailableError,
+)
+from utils.logging import logger
+from utils.metrics import Metrics, metrics
+
+CLOSED = "Closed"
+OPEN = "Open"
+HALF_OPEN = "HalfOpen"
+CIRCUIT_METRIC_PREFIX = "Circuit."
+LIMITER_METRIC_PREFIX = "Limiter."
+REJECTED = "Rejected"
+DECREASED = "Decreased"
+CIRCUIT_STATE_LOG = "Circuit breaker state changed"
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RECOVERY_SECONDS = 30.0
+DEFAULT_HALF_OPEN_CALLS = 1
+# Shared state is read at most this often, a remote backend costs a round trip per read
+DEFAULT_SYNC_SECONDS = 1.0
+SHARED_LIMIT_TTL_SECONDS = 60.0
+DEFAULT_INITIAL_LIMIT = 10
+DEFAULT_MIN_LIMIT = 1
+DEFAULT_MAX_LIMIT = 100
+DEFAULT_DECREASE_FACTOR = 0.5
+# Outcomes counted as failures: the dependency is down, slow, or unreachable
+FAILURE_ERRORS: Tuple[Type[BaseException], ...] = (
+    ServiceUnavailableError,
+    GatewayTimeoutError,
+    OSError,
+)
+
+
+def _is_failure(
+    error: Optional[BaseException], failure_errors: Tuple[Type[BaseException], ...]
+) -> bool:
+    """
+    Tell whether a call's error counts against its dependency. A `LoadSheddingError` is a
+    `ServiceUnavailableError`, but one raised by a nested breaker or limiter says nothing about
+    this dependency: counting it would turn shedding into more shedding.
+    """
+    return isinstance(error, failure_errors) and not isinstance(error, LoadSheddingError)
+
+
+def _close(awaitable: Awaitable) -> None:
+    """Close a coroutine that will not be awaited, so it is not reported as never awaited."""
+    if isinstance(awaitable, types.CoroutineType):
+        awaitable.close()
+
+
+class StateBackend:
+    """
+    Storage for state shared between containers, e.g. a key-value table or a cache cluster.
+    Values are JSON compatible dictionaries, a backend may expire them after `ttl` seconds.
+    """
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+
+class MemoryBackend(StateBackend):
+    """In-memory stand-in for a shared backend, for tests and local runs."""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self._values: Dict[str, Tuple[Dict[str, Any], Optional[float]]] = {}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        item = self._values.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and self.clock() >= expires_at:
+            del self._values[key]
+            return None
+        return value
+
+    def set(self, key: str, value: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        self._values[key] = (value, None if ttl is None else self.clock() + ttl)
+
+
+class CircuitBreaker:
+    """
+    Stop calling a dependency that keeps failing, and answer 503 right away instead.
+
+    After `failure_threshold` consecutive failures the circuit opens: calls are rejected with a
+    `LoadSheddingError` without waiting out the function timeout. After `recovery_seconds`,
+    `half_open_calls` trial calls go through; a success closes the circuit, a failure opens it
+    again. The state lives in the container, a backend shares openings with the other
+    containers so they stop calling the dependency too. Transitions and rejections are counted
+    in the invocation's metrics, e.g. `Circuit.<name>.Open`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        recovery_seconds: float = DEFAULT_RECOVERY_SECONDS,
+        half_open_calls: int = DEFAULT_HALF_OPEN_CALLS,
+        backend: Optional[StateBackend] = None,
+        sync_seconds: float = DEFAULT_SYNC_SECONDS,
+        failure_errors: Tuple[Type[BaseException], ...] = FAILURE_ERRORS,
+        clock: Callable[[], float] = time.time,
+        recorder: Metrics = metrics,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.half_open_calls = half_open_calls
+        self.backend = backend
+        self.sync_seconds = sync_seconds
+        self.failure_errors = failure_errors
+        self.clock = clock
+        self.metrics = recorder
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trials = 0
+        self._synced_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, name: str, backend: Optional[StateBackend] = None) -> "CircuitBreaker":
+        """
+        Create a breaker configured from the lambda environment.
+        :param name: Dependency name, used in the metrics and the shared state key
+        :param backend: Backend sharing the state between containers (default: none)
+        :return: Circuit breaker
+        """
+        return cls(
+            name,
+            failure_threshold=int(
+                os.getenv("CIRCUIT_FAILURE_THRESHOLD", DEFAULT_FAILURE_THRESHOLD)
+            ),
+            recovery_seconds=float(os.getenv("CIRCUIT_RECOVERY_SECONDS", DEFAULT_RECOVERY_SECONDS)),
+            backend=backend,
+        )
+
+    @property
+    def key(self) -> str:
+        return f"circuit:{self.name}"
+
+    def _transition(self, state: str, now: float) -> None:
+        self.state = state
+        if state == OPEN:
+            self.opened_at = now
+        self._trials = 0
+        self.metrics.count(f"{CIRCUIT_METRIC_PREFIX}{self.name}.{state}")
+        logger.warning(CIRCUIT_STATE_LOG, circuit=self.name, state=state)
+
+    def _sync(self, now: float) -> None:
+        """Adopt an opening shared by another container."""
+        if self.backend is None:
+            return
+        if self._synced_at is not None and now - self._synced_at < self.sync_seconds:
+            return
+        self._synced_at = now
+        shared = self.backend.get(self.key)
+        if shared and shared.get("state") == OPEN:
+            opened_at = shared.get("openedAt", now)
+            if now - opened_at < self.recovery_seconds:
+                self._transition(OPEN, now)
+                self.opened_at = opened_at
+
+    def before(self) -> None:
+        """
+        Check that a call may go through, before making it.
+        :raises LoadSheddingError: if the circuit is open, or its trial calls are taken
+        """
+        with self._lock:
+            now = self.clock()
+            if self.state == CLOSED and self.backend is not None:
+                self._sync(now)
+            if self.state == OPEN and now - self.opened_at >= self.recovery_seconds:
+                self._transition(HALF_OPEN, now)
+            if self.state == CLOSED:
+                return
+            if self.state == HALF_OPEN and self._trials < self.half_open_calls:
+                self._trials += 1
+                return
+        self.metrics.count(f"{CIRCUIT_METRIC_PREFIX}{self.name}.{REJECTED}")
+        raise LoadSheddingError(DOWNSTREAM_UNAVAILABLE_ERROR)
+
+    def record_success(self) -> None:
+        """Record a call that succeeded, closing the circuit after a trial call."""
+        with self._lock:
+            self.failures = 0
+            if self.state == HALF_OPEN:
+                self._transition(CLOSED, self.clock())
+                if self.backend is not None:
+                    self.backend.set(self.key, {"state": CLOSED})
+
+    def record_failure(self) -> None:
+        """Record a call that failed, opening the circuit past the threshold or after a trial."""
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or (
+                self.state == CLOSED and self.failures >= self.failure_threshold
+            ):
+                now = self.clock()
+                self._transition(OPEN, now)
+                if self.backend is not None:
+                    self.backend.set(
+                        self.key, {"state": OPEN, "openedAt": now}, ttl=self.recovery_seconds
+                    )
+
+    def record_abandoned(self) -> None:
+        """Record a call given up without an outcome (e.g. cancelled), freeing its trial slot."""
+        with self._lock:
+            if self.state == HALF_OPEN and self._trials > 0:
+                self._trials -= 1
+
+    def _record(self, error: Optional[BaseException]) -> None:
+        if _is_failure(error, self.failure_errors):
+            self.record_failure()
+        elif isinstance(error, LoadSheddingError) or not isinstance(error, (Exception, type(None))):
+            # Shed by a nested breaker or limiter, or cancelled: the dependency was not reached
+            self.record_abandoned()
+        else:
+            # Any other error is an answer, the dependency is up
+            self.record_success()
+
+    def call(self, function: Callable, *args, **kwargs) -> Any:
+        """
+        Call a blocking function through the breaker.
+        :param function: Function calling the dependency
+        :return: Result of the function
+        """
+        self.before()
+        try:
+            result = function(*args, **kwargs)
+        except BaseException as e:
+            self._record(e)
+            raise
+        self._record(None)
+        return result
+
+    async def call_async(self, awaitable: Awaitable) -> Any:
+        """
+        Await a call to the dependency through the breaker, e.g. `AsyncRunner.call(...)`.
+        :param awaitable: Coroutine or future of the call, closed if the call is rejected
+        :return: Result of the call
+        """
+        try:
+            self.before()
+        except LoadSheddingError:
+            _close(awaitable)
+            raise
+        try:
+            result = await awaitable
+        except BaseException as e:
+            self._record(e)
+            raise
+        self._record(None)
+        return result
+
+
+class AdaptiveLimiter:
+    """
+    Bound the calls in flight to a dependency, with a limit adapted to how it copes (AIMD).
+
+    A call over the limit is rejected with a `LoadSheddingError` instead of queueing. Every
+    call that succeeds within `latency_threshold` raises the limit by `1 / limit`, about one per
+    round of calls, and every failure or slow call multiplies it by `decrease_factor`, so the
+    limit follows the concurrency the dependency sustains. The limit lives in the container, a
+    backend shares it: decreases are published and adopted by the other containers.
+    Rejections and decreases are counted in the invocation's metrics, e.g.
+    `Limiter.<name>.Rejected`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: float = DEFAULT_INITIAL_LIMIT,
+        min_limit: float = DEFAULT_MIN_LIMIT,
+        max_limit: float = DEFAULT_MAX_LIMIT,
+        decrease_factor: float = DEFAULT_DECREASE_FACTOR,
+        latency_threshold: Optional[float] = None,
+        backend: Optional[StateBackend] = None,
+        sync_seconds: float = DEFAULT_SYNC_SECONDS,
+        failure_errors: Tuple[Type[BaseException], ...] = FAILURE_ERRORS,
+        clock: Callable[[], float] = time.time,
+        recorder: Metrics = metrics,
+    ):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = min(max(initial_limit, min_limit), max_limit)
+        self.decrease_factor = decrease_factor
+        self.latency_threshold = latency_threshold
+        self.backend = backend
+        self.sync_seconds = sync_seconds
+        self.failure_errors = failure_errors
+        self.clock = clock
+        self.metrics = recorder
+        self.in_flight = 0
+        self._synced_at: Optional[float] = None
+        self._adopted: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def key(self) -> str:
+        return f"limiter:{self.name}"
+
+    def _sync(self, now: float) -> None:
+        """Adopt, once, a decrease published by another container, if it is below the limit."""
+        if self.backend is None:
+            return
+        if self._synced_at is not None and now - self._synced_at < self.sync_seconds:
+            return
+        self._synced_at = now
+        shared = self.backend.get(self.key)
+        if shared and shared.get("publishedAt") != self._adopted:
+            self._adopted = shared.get("publishedAt")
+            self.limit = max(min(self.limit, shared["limit"]), self.min_limit)
+
+    def acquire(self) -> None:
+        """
+        Take a slot for a call, before making it.
+        :raises LoadSheddingError: if the calls in flight already reach the limit
+        """
+        with self._lock:
+            if self.backend is not None:
+                self._sync(self.clock())
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return
+        self.metrics.count(f"{LIMITER_METRIC_PREFIX}{self.name}.{REJECTED}")
+        raise LoadSheddingError(DOWNSTREAM_UNAVAILABLE_ERROR)
+
+    def release(self, error: Optional[BaseException] = None, latency: float = 0.0) -> None:
+        """
+        Give a slot back and adapt the limit to the call's outcome.
+        :param error: Error the call raised, if any, only `failure_errors` decrease the limit
+            (a `LoadSheddingError` from a nested call does not)
+        :param latency: Duration of the call, in seconds
+        """
+        with self._lock:
+            self.in_flight -= 1
+            slow = self.latency_threshold is not None and latency > self.latency_threshold
+            if _is_failure(error, self.failure_errors) or slow:
+                self.limit = max(self.limit * self.decrease_factor, self.min_limit)
+                self.metrics.count(f"{LIMITER_METRIC_PREFIX}{self.name}.{DECREASED}")
+                if self.backend is not None:
+                    self._adopted = self.clock()
+                    self.backend.set(
+                        self.key,
+                        {"limit": self.limit, "publishedAt": self._adopted},
+                        ttl=SHARED_LIMIT_TTL_SECONDS,
+                    )
+            elif error is None:
+                self.limit = min(self.limit + 1 / self.limit, self.max_limit)
+
+    def call(self, function: Callable, *args, **kwargs) -> Any:
+        """
+        Call a blocking function within the limit.
+        :param function: Function calling the dependency
+        :return: Result of the function
+        """
+        self.acquire()
+        started_at = time.perf_counter()
+        try:
+            result = function(*args, **kwargs)
+        except BaseException as e:
+            self.release(e, time.perf_counter() - started_at)
+            raise
+        self.release(None, time.perf_counter() - started_at)
+        return result
+
+    async def call_async(self, awaitable: Awaitable) -> Any:
+        """
+        Await a call to the dependency within the limit, e.g. `AsyncRunner.call(...)`.
+        :param awaitable: Coroutine or future of the call, closed if the call is rejected
+        :return: Result of the call
+        """
+        try:
+            self.acquire()
+        except LoadSheddingError:
+            _close(awaitable)
+            raise
+        started_at = time.perf_counter()
+        try:
+            result = await awaitable
+        except BaseException as e:
+            self.release(e, time.perf_counter() - started_at)
+            raise
+        self.release(None, time.perf_counter() - started_at)
+        return result
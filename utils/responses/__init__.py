@@ -0,0 +1,155 @@
+import http
+import os
+import zlib
+from types import MappingProxyType
+from typing import Dict, Iterable, Iterator, Mapping, Optional, Tuple, Type, Union
+
+from utils.errors import PREDEFINED_ERRORS, CustomError
+from utils.serializers import Serializer, serializer
+
+JSON_CONTENT_TYPE = "application/json"
+CORS_ALLOWED_HEADERS = "Content-Type,If-None-Match"
+CORS_EXPOSED_HEADERS = "ETag"
+CORS_ALLOWED_METHODS = "OPTIONS,GET,POST,PUT,DELETE"
+MAX_CACHED_ERROR_RESPONSES = 128
+ETAG_HEADER = "ETag"
+CACHE_CONTROL_HEADER = "Cache-Control"
+IF_NONE_MATCH_HEADER = "If-None-Match"
+
+
+class ResponseBuilder:
+    """
+    Build API Gateway proxy responses from a header template.
+
+    Configuration is resolved and the header set frozen when the builder is created, which
+    happens once per container at import time. Building a response only copies the template
+    and merges the status-dependent fields.
+    """
+
+    def __init__(self, docs_domain_name: Optional[str], content_type: str = JSON_CONTENT_TYPE):
+        self._headers = {
+            "Content-Type": content_type,
+            "Access-Control-Allow-Headers": CORS_ALLOWED_HEADERS,
+            "Access-Control-Allow-Origin": f"https://{docs_domain_name}",
+            "Access-Control-Allow-Methods": CORS_ALLOWED_METHODS,
+            "Access-Control-Expose-Headers": CORS_EXPOSED_HEADERS,
+        }
+        self.headers: Mapping[str, str] = MappingProxyType(self._headers)
+
+    @classmethod
+    def from_env(cls) -> "ResponseBuilder":
+        """
+        Create a builder configured from the lambda environment.
+        :return: Response builder
+        """
+        return cls(os.getenv("DOCS_DOMAIN_NAME"))
+
+    def build(
+        self,
+        body: Union[str, Iterator[str]],
+        status_code: int = http.HTTPStatus.OK,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Dict:
+        """
+        Build an HTTP response around an already serialized body.
+        :param body: Serialized response body, or an iterator of chunks for a streamed response
+        :param status_code: HTTP status code (default: 200)
+        :param headers: Headers merged over the template (default: none)
+        :return: HTTP response dictionary
+        """
+        response_headers = self._headers.copy()
+        if headers:
+            response_headers.update(headers)
+        return {"statusCode": status_code, "headers": response_headers, "body": body}
+
+
+def compute_etag(body: str) -> str:
+    """
+    Compute the strong entity tag of a serialized body, from its length and CRC-32.
+    zlib is already loaded for the logger, a cryptographic hash would add to cold starts and
+    collisions between two bodies of the same resource are not a concern.
+    :param body: Serialized response body
+    :return: Quoted entity tag, e.g. `"1a-0123abcd"`
+    """
+    data = body.encode()
+    return f'"{len(data):x}-{zlib.crc32(data):08x}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Compare an `If-None-Match` header with an entity tag, weakly as the header requires.
+    :param if_none_match: Header value, a list of entity tags or `*`
+    :param etag: Entity tag of the current response
+    :return: True if the client's copy is current
+    """
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag or tag == "*":
+            return True
+    return False
+
+
+def request_header(event: Dict, name: str) -> Optional[str]:
+    """
+    Get a request header, whatever the case it was sent with.
+    :param event: Lambda event data
+    :param name: Header name
+    :return: Header value, or None if it was not sent
+    """
+    headers = event.get("headers") or {}
+    value = headers.get(name)
+    if value is None:
+        lower_name = name.lower()
+        value = next((v for k, v in headers.items() if k.lower() == lower_name), None)
+    return value
+
+
+class ErrorResponseCache:
+    """
+    Complete error responses, serialized once per (error class, message).
+
+    Predefined errors are serialized when the cache is created at import time, other messages the
+    first time they are seen, up to `max_size` entries. Handing out a cached response only copies
+    the response and its headers.
+    """
+
+    def __init__(
+        self,
+        builder: ResponseBuilder,
+        json_serializer: Serializer = serializer,
+        predefined: Iterable[Tuple[Type[CustomError], str]] = PREDEFINED_ERRORS,
+        max_size: int = MAX_CACHED_ERROR_RESPONSES,
+    ):
+        self.builder = builder
+        self.json_serializer = json_serializer
+        self.max_size = max_size
+        self._responses: Dict[Tuple[Type[CustomError], str], Dict] = {}
+        for error_class, message in predefined:
+            self._responses[(error_class, message)] = self._build(error_class.status_code, message)
+
+    def _build(self, status_code: int, message: str) -> Dict:
+        return self.builder.build(self.json_serializer.dumps({"error": message}), status_code)
+
+    def get(self, error_class: Type[CustomError], message: str) -> Dict:
+        """
+        Get the response for an error.
+        :param error_class: Error class, providing the status code
+        :param message: Error message returned to the client
+        :return: HTTP response dictionary
+        """
+        key = (error_class, message)
+        response = self._responses.get(key)
+        if response is None:
+            response = self._build(error_class.status_code, message)
+            if len(self._responses) < self.max_size:
+                self._responses[key] = response
+        return {**response, "headers": response["headers"].copy()}
+
+
+# Resolved once per container
+response_builder = ResponseBuilder.from_env()
+error_responses = ErrorResponseCache(response_builder)
@@ -0,0 +1,96 @@
+import os
+from collections.abc import Iterator as IteratorABC
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, Tuple, Type
+
+from utils.serializers import Serializer, serializer
+
+# Size a chunk is filled up to before it is handed to the response stream
+DEFAULT_CHUNK_SIZE = 64 * 1024
+# Items of an array serialized in one piece, and largest object serialized in one call
+INLINE_ITEMS = 64
+# Only functions behind a function URL in RESPONSE_STREAM invoke mode can stream their responses
+STREAMING_ENABLED = os.getenv("RESPONSE_STREAMING", "false").lower() == "true"
+
+
+def _encode(obj: Any, dumps: Callable[[Any], str], errors: Tuple[Type[Exception], ...]):
+    """
+    Encode a value as JSON pieces, lazily for arrays and iterators.
+    Arrays and iterators are serialized `INLINE_ITEMS` items at a time and small objects in one
+    call, only a group that holds an iterator is walked item by item.
+    """
+    if isinstance(obj, dict):
+        encoded = None
+        if len(obj) <= INLINE_ITEMS:
+            try:
+                encoded = dumps(obj)
+            except errors:
+                pass
+        if encoded is not None:
+            yield encoded
+            return
+        separator = "{"
+        for key, value in obj.items():
+            yield f"{separator}{dumps(key if isinstance(key, str) else str(key))}:"
+            yield from _encode(value, dumps, errors)
+            separator = ","
+        yield "}"
+    elif isinstance(obj, (list, tuple, IteratorABC)):
+        items = iter(obj)
+        separator = "["
+        while True:
+            group = list(islice(items, INLINE_ITEMS))
+            if not group:
+                break
+            try:
+                # Joined like a buffered batch joins its items, whatever the backend's separators
+                encoded = ",".join(map(dumps, group))
+            except errors:
+                encoded = None
+            if encoded is not None:
+                yield separator + encoded
+                separator = ","
+                continue
+            for item in group:
+                yield separator
+                yield from _encode(item, dumps, errors)
+                separator = ","
+        yield "[]" if separator == "[" else "]"
+    else:
+        yield dumps(obj)
+
+
+def iter_json(
+    obj: Any, json_serializer: Serializer = serializer, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[str]:
+    """
+    Serialize a body as JSON chunks, produced as the body is walked.
+    Iterators in the body (e.g. generators) are encoded as arrays and consumed as the chunks are,
+    so neither the items nor the document are ever held in memory at once. A value the backend
+    can not serialize raises its error when the chunk holding it is produced.
+    :param obj: Response body content
+    :param json_serializer: Backend serializing the values (default: the layer's backend)
+    :param chunk_size: Length a chunk is filled up to, in characters (default: 64 KiB)
+    :return: Iterator over the chunks of the document
+    """
+    pending = []
+    size = 0
+    for piece in _encode(obj, json_serializer.dumps, json_serializer.errors):
+        pending.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield "".join(pending)
+            pending = []
+            size = 0
+    if pending:
+        yield "".join(pending)
+
+
+def accepts_stream(event: Dict) -> bool:
+    """
+    Check whether the response to an event can be streamed, i.e. the event comes from a function
+    URL (payload format 2.0). API Gateway REST proxy events always get a buffered body.
+    :param event: Lambda event data
+    :return: True if the response body may be an iterator of chunks
+    """
+    return event.get("version") == "2.0" and "http" in (event.get("requestContext") or {})
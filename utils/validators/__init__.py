@@ -0,0 +1,180 @@
+"""
+Request validators and response checkers compiled from the OpenAPI spec.
+
+Generated by utils/ci/compile_validators.py from aws/api/v1/api-spec/bundled.yaml, do not edit.
+Every parameter is checked in a single pass with plain Python expressions, no schema is
+interpreted at request time. Response checkers return the first violation of a body, as a
+`$.path: problem` string, or None.
+"""
+import re
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from utils.errors import (
+    INVALID_QUERY_PARAMETER_ERROR,
+    REQUIRED_QUERY_PARAMETER_ERROR,
+    InvalidQueryStringParameterError,
+    MissingRequiredQueryStringParameterError,
+)
+
+_PATTERN_0 = re.compile(r"\S")
+_NAME_REQUIRED = REQUIRED_QUERY_PARAMETER_ERROR.format("name")
+_NAME_INVALID = INVALID_QUERY_PARAMETER_ERROR.format("name")
+
+
+def is_valid_name(value: Any) -> bool:
+    """Check a value against the `name` schema."""
+    return bool(isinstance(value, str) and len(value) >= 1 and _PATTERN_0.search(value))
+
+
+def check_name(body: Any) -> Optional[str]:
+    """Find the first violation of the `name` schema."""
+    if not (isinstance(body, str) and len(body) >= 1 and _PATTERN_0.search(body)):
+        return "$: invalid string"
+    return None
+
+
+def check_hello_response(body: Any) -> Optional[str]:
+    """Find the first violation of the `helloResponse` schema."""
+    if not isinstance(body, dict):
+        return "$: expected object"
+    if "message" not in body:
+        return "$.message: required"
+    value_0 = body["message"]
+    if not isinstance(value_0, str):
+        return "$.message: expected string"
+    return None
+
+
+def check_error(body: Any) -> Optional[str]:
+    """Find the first violation of the `error` schema."""
+    if not isinstance(body, dict):
+        return "$: expected object"
+    if "error" not in body:
+        return "$.error: required"
+    value_0 = body["error"]
+    if not isinstance(value_0, str):
+        return "$.error: expected string"
+    return None
+
+
+def check_goodbye_response(body: Any) -> Optional[str]:
+    """Find the first violation of the `goodbyeResponse` schema."""
+    if not isinstance(body, dict):
+        return "$: expected object"
+    if "message" not in body:
+        return "$.message: required"
+    value_0 = body["message"]
+    if not isinstance(value_0, str):
+        return "$.message: expected string"
+    return None
+
+
+def check_batch_request(body: Any) -> Optional[str]:
+    """Find the first violation of the `batchRequest` schema."""
+    if not isinstance(body, list):
+        return "$: expected array"
+    for item_0 in body:
+        if not isinstance(item_0, str):
+            return "$[]: expected string"
+    return None
+
+
+def check_hello_batch_response(body: Any) -> Optional[str]:
+    """Find the first violation of the `helloBatchResponse` schema."""
+    if not isinstance(body, dict):
+        return "$: expected object"
+    if "results" not in body:
+        return "$.results: required"
+    value_0 = body["results"]
+    if not isinstance(value_0, list):
+        return "$.results: expected array"
+    for item_1 in value_0:
+        if check_hello_response(item_1) is not None and check_error(item_1) is not None:
+            return "$.results[]: matches none of ['helloResponse', 'error']"
+    return None
+
+
+def check_goodbye_batch_response(body: Any) -> Optional[str]:
+    """Find the first violation of the `goodbyeBatchResponse` schema."""
+    if not isinstance(body, dict):
+        return "$: expected object"
+    if "results" not in body:
+        return "$.results: required"
+    value_0 = body["results"]
+    if not isinstance(value_0, list):
+        return "$.results: expected array"
+    for item_1 in value_0:
+        if check_goodbye_response(item_1) is not None and check_error(item_1) is not None:
+            return "$.results[]: matches none of ['goodbyeResponse', 'error']"
+    return None
+
+
+def validate_get_hello(event: Dict) -> Dict[str, Any]:
+    """
+    Validate the request of the getHello operation (GET /hello).
+    :param event: Lambda event data
+    :return: Keyword arguments for the body producer
+    """
+    query = event.get("queryStringParameters") or {}
+    kwargs: Dict[str, Any] = {}
+    if "name" in query:
+        name = query["name"]
+        if not (isinstance(name, str) and len(name) >= 1 and _PATTERN_0.search(name)):
+            raise InvalidQueryStringParameterError(_NAME_INVALID)
+        kwargs["name"] = name
+    else:
+        raise MissingRequiredQueryStringParameterError(_NAME_REQUIRED)
+    return kwargs
+
+
+def validate_get_goodbye(event: Dict) -> Dict[str, Any]:
+    """
+    Validate the request of the getGoodbye operation (GET /goodbye).
+    :param event: Lambda event data
+    :return: Keyword arguments for the body producer
+    """
+    query = event.get("queryStringParameters") or {}
+    kwargs: Dict[str, Any] = {}
+    if "name" in query:
+        name = query["name"]
+        if not (isinstance(name, str) and len(name) >= 1 and _PATTERN_0.search(name)):
+            raise InvalidQueryStringParameterError(_NAME_INVALID)
+        kwargs["name"] = name
+    else:
+        raise MissingRequiredQueryStringParameterError(_NAME_REQUIRED)
+    return kwargs
+
+
+# Validators by operationId
+VALIDATORS: Dict[str, Callable] = {
+    "getHello": validate_get_hello,
+    "getGoodbye": validate_get_goodbye,
+}
+# Validators by method and API Gateway resource path
+ROUTES: Dict[Tuple[str, str], Callable] = {
+    ("GET", "/hello"): validate_get_hello,
+    ("GET", "/goodbye"): validate_get_goodbye,
+}
+# Response checkers by method, API Gateway resource path and status code
+RESPONSES: Dict[Tuple[str, str, int], Callable] = {
+    ("GET", "/hello", 200): check_hello_response,
+    ("GET", "/hello", 400): check_error,
+    ("GET", "/hello", 429): check_error,
+    ("GET", "/hello", 500): check_error,
+    ("GET", "/hello", 503): check_error,
+    ("GET", "/hello", 504): check_error,
+    ("POST", "/hello/batch", 200): check_hello_batch_response,
+    ("POST", "/hello/batch", 400): check_error,
+    ("POST", "/hello/batch", 429): check_error,
+    ("POST", "/hello/batch", 500): check_error,
+    ("GET", "/goodbye", 200): check_goodbye_response,
+    ("GET", "/goodbye", 400): check_error,
+    ("GET", "/goodbye", 429): check_error,
+    ("GET", "/goodbye", 500): check_error,
+    ("GET", "/goodbye", 503): check_error,
+    ("GET", "/goodbye", 504): check_error,
+    ("POST", "/goodbye/batch", 200): check_goodbye_batch_response,
+    ("POST", "/goodbye/batch", 400): check_error,
+    ("POST", "/goodbye/batch", 429): check_error,
+    ("POST", "/goodbye/batch", 500): check_error,
+}